@@ -0,0 +1,12 @@
+class PreconditionFailed(Exception):
+    def __init__(self, current_version: int):
+        super().__init__(f"version mismatch, current version is {current_version}")
+        self.current_version = current_version
+
+
+class IdempotencyKeyInProgress(Exception):
+    pass
+
+
+class IdempotencyKeyReused(Exception):
+    pass
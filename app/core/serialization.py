@@ -0,0 +1,19 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+from app.services import tracing
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONResponse(JSONResponse):
+    # строки уже собраны в форме схемы — повторная валидация pydantic не нужна
+    def render(self, content: Any) -> bytes:
+        with tracing.span("serialize"):
+            return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
@@ -1,11 +1,16 @@
 from typing import List, Optional
+import datetime
+import math
 import uuid
 
-from sqlalchemy import select, update
+from sqlalchemy import func, insert, inspect, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.models import Appeal, AppealHistory
+from app.core.exceptions import PreconditionFailed
+from app.models.models import Appeal, AppealHistory, AppealType, SeverityLevel, AppealStatus
 from app.schemas.appeal import AppealCreate, AppealUpdate
+from app.services import appeal_history, appeal_stats
+from app.services.reference_cache import reference_cache
 from sqlalchemy.orm import joinedload
 from app.ws_manager import manager
 
@@ -24,31 +29,210 @@ async def get_appeal(db: AsyncSession, appeal_id: uuid.UUID) -> Optional[Appeal]
     return result.scalar_one_or_none()
 
 
-async def get_appeals(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Appeal]:
-    result = await db.execute(
-        select(Appeal).where(Appeal.is_deleted == False).order_by(Appeal.created_at.desc()).offset(skip).limit(limit)
+async def get_appeal_version(db: AsyncSession, appeal_id) -> Optional[int]:
+    result = await db.execute(select(Appeal.version).where(Appeal.id == appeal_id))
+    return result.scalar_one_or_none()
+
+
+EARTH_RADIUS_M = 6_371_000.0
+METERS_PER_DEGREE = 111_320.0
+
+
+def _in_box(min_lon: float, min_lat: float, max_lon: float, max_lat: float):
+    # выражение совпадает с ix_appeals_geo, поэтому фильтр идёт по GiST-индексу
+    return func.point(Appeal.longitude, Appeal.latitude).op("<@")(
+        func.box(func.point(min_lon, min_lat), func.point(max_lon, max_lat))
+    )
+
+
+def _distance_m(lat: float, lon: float):
+    dlat = func.radians(Appeal.latitude - lat) / 2
+    dlon = func.radians(Appeal.longitude - lon) / 2
+    a = (
+        func.pow(func.sin(dlat), 2)
+        + math.cos(math.radians(lat)) * func.cos(func.radians(Appeal.latitude)) * func.pow(func.sin(dlon), 2)
     )
+    return 2 * EARTH_RADIUS_M * func.asin(func.sqrt(a))
+
+
+def _location_filters(stmt, bbox=None, near=None, building_id=None, floor=None):
+    if bbox is not None or near is not None:
+        stmt = stmt.where(Appeal.latitude.isnot(None), Appeal.longitude.isnot(None))
+    if bbox is not None:
+        stmt = stmt.where(_in_box(*bbox))
+    if near is not None:
+        # грубый квадрат по индексу, затем точное расстояние по гаверсинусу
+        lat, lon, radius = near
+        dlat = radius / METERS_PER_DEGREE
+        dlon = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        stmt = stmt.where(_in_box(lon - dlon, lat - dlat, lon + dlon, lat + dlat), _distance_m(lat, lon) <= radius)
+    if building_id is not None:
+        stmt = stmt.where(Appeal.building_id == building_id)
+    if floor is not None:
+        stmt = stmt.where(Appeal.floor == floor)
+    return stmt
+
+
+async def get_appeals(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        bbox: Optional[tuple[float, float, float, float]] = None,
+        near: Optional[tuple[float, float, float]] = None,
+        building_id: Optional[int] = None,
+        floor: Optional[int] = None,
+) -> List[Appeal]:
+    stmt = _location_filters(select(Appeal).where(Appeal.is_deleted == False), bbox, near, building_id, floor)
+    result = await db.execute(stmt.order_by(Appeal.created_at.desc()).offset(skip).limit(limit))
     return result.scalars().all()
 
 
-async def create_appeal(db: AsyncSession, appeal_in: AppealCreate, current_user_id: str) -> Appeal:
-    new_obj = Appeal(
-        type_id=appeal_in.type_id,
-        severity_id=appeal_in.severity_id,
-        status_id=appeal_in.status_id,
-        location=appeal_in.location,
-        description=appeal_in.description,
-        reporter_id=appeal_in.reporter_id,
-        source=appeal_in.source,
-        assigned_to_id=appeal_in.assigned_to_id,
-        payload=appeal_in.payload or {},
+APPEAL_READ_COLUMNS = (
+    Appeal.id,
+    Appeal.type_id,
+    Appeal.severity_id,
+    Appeal.status_id,
+    Appeal.location,
+    Appeal.description,
+    Appeal.reporter_id,
+    Appeal.source,
+    Appeal.assigned_to_id,
+    Appeal.payload.label("payload"),
+    Appeal.created_at,
+    Appeal.updated_at,
+    Appeal.ticket_number,
+    Appeal.is_deleted,
+    Appeal.version,
+    Appeal.latitude,
+    Appeal.longitude,
+    Appeal.building_id,
+    Appeal.floor,
+    AppealType.name.label("type_name"),
+    SeverityLevel.name.label("severity_name"),
+    AppealStatus.name.label("status_name"),
+)
+
+APPEAL_HISTORY_READ_COLUMNS = (
+    AppealHistory.id,
+    AppealHistory.event_time,
+    AppealHistory.event_type,
+    AppealHistory.changed_by_id,
+    AppealHistory.payload.label("payload"),
+    AppealHistory.field_name,
+    AppealHistory.old_value,
+    AppealHistory.new_value,
+    AppealHistory.comment,
+)
+
+
+async def get_appeals_rows(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        bbox: Optional[tuple[float, float, float, float]] = None,
+        near: Optional[tuple[float, float, float]] = None,
+        building_id: Optional[int] = None,
+        floor: Optional[int] = None,
+) -> List[dict]:
+    # те же данные, что и get_appeals, но плоскими dict в форме AppealRead — без ORM и валидации
+    stmt = (
+        select(*APPEAL_READ_COLUMNS)
+        .join(AppealType, AppealType.id == Appeal.type_id)
+        .join(SeverityLevel, SeverityLevel.id == Appeal.severity_id)
+        .join(AppealStatus, AppealStatus.id == Appeal.status_id)
+        .where(Appeal.is_deleted == False)
     )
-    db.add(new_obj)
+    stmt = _location_filters(stmt, bbox, near, building_id, floor)
+    result = await db.execute(stmt.order_by(Appeal.created_at.desc()).offset(skip).limit(limit))
+    return [dict(row) for row in result.mappings()]
+
+
+# колонки appeals под именами атрибутов модели (metadata → payload), как их ждёт AppealRead
+APPEAL_RETURNING = tuple(prop.columns[0].label(prop.key) for prop in inspect(Appeal).column_attrs)
+
+# поля AppealUpdate, которые update_appeal переносит в запись
+UPDATABLE_FIELDS = (
+    "status_id", "assigned_to_id", "location", "description", "latitude", "longitude", "building_id", "floor",
+)
+
+
+async def _execute_write(db: AsyncSession, written, old, event_type: str, current_user_id, now) -> Optional[dict]:
+    # запись обращения, история и статистика уходят одним statement; commit закрывает транзакцию
+    if old is None:
+        stmt = select(written)
+    else:
+        # old LEFT JOIN written: строка old есть, а written пуст — не совпала версия из If-Match
+        stmt = (
+            select(old.c.version.label("current_version"), *written.c)
+            .select_from(old.outerjoin(written, written.c.id == old.c.id))
+        )
+    history = appeal_history.capture_cte(old, written, appeal_history.TRACKED_FIELDS, event_type, current_user_id, now)
+    stmt = stmt.add_cte(appeal_stats.rollup_cte(old, written, now))
+    if history is not None:
+        stmt = stmt.add_cte(history)
+    await appeal_history.set_actor(db, current_user_id)
+    row = (await db.execute(stmt)).mappings().first()
     await db.commit()
-    await db.refresh(new_obj)
+    if row is None:
+        return None
+    if row["id"] is None:
+        raise PreconditionFailed(row["current_version"])
+    appeal = {key: row[key] for key in written.c.keys()}
+    appeal.update(await reference_cache.appeal_names(appeal))
+    return appeal
+
+
+def _locked_old(appeal_id):
+    return (
+        select(*APPEAL_RETURNING)
+        .where(Appeal.id == appeal_id)
+        .with_for_update()
+        .cte("old")
+    )
+
+
+async def get_appeal_dict(db: AsyncSession, appeal_id) -> Optional[dict]:
+    result = await db.execute(
+        select(*APPEAL_READ_COLUMNS)
+        .join(AppealType, AppealType.id == Appeal.type_id)
+        .join(SeverityLevel, SeverityLevel.id == Appeal.severity_id)
+        .join(AppealStatus, AppealStatus.id == Appeal.status_id)
+        .where(Appeal.id == appeal_id)
+    )
+    row = result.mappings().first()
+    return dict(row) if row else None
+
+
+async def create_appeal(db: AsyncSession, appeal_in: AppealCreate, current_user_id: str) -> dict:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    written = (
+        insert(Appeal.__table__)
+        .values({
+            Appeal.id: uuid.uuid4(),
+            Appeal.type_id: appeal_in.type_id,
+            Appeal.severity_id: appeal_in.severity_id,
+            Appeal.status_id: appeal_in.status_id,
+            Appeal.location: appeal_in.location,
+            Appeal.description: appeal_in.description,
+            Appeal.reporter_id: appeal_in.reporter_id,
+            Appeal.source: appeal_in.source,
+            Appeal.assigned_to_id: appeal_in.assigned_to_id,
+            Appeal.payload: appeal_in.payload or {},
+            Appeal.latitude: appeal_in.latitude,
+            Appeal.longitude: appeal_in.longitude,
+            Appeal.building_id: appeal_in.building_id,
+            Appeal.floor: appeal_in.floor,
+            Appeal.is_deleted: False,
+            Appeal.created_at: now,
+            Appeal.updated_at: now,
+        })
+        .returning(*APPEAL_RETURNING)
+        .cte("written")
+    )
+    new_obj = await _execute_write(db, written, None, "create", current_user_id, now)
     message = {
         "event_type": "create",
-        "id": str(new_obj.id),
+        "id": str(new_obj["id"]),
 
     }
     await manager.broadcast(message)
@@ -57,43 +241,56 @@ async def create_appeal(db: AsyncSession, appeal_in: AppealCreate, current_user_
 
 
 async def update_appeal(db: AsyncSession, appeal_id: str, appeal_in: AppealUpdate,
-                        current_user_id: str) -> Appeal | None:
-    stmt = select(Appeal).where(Appeal.id == appeal_id)
-    result = await db.execute(stmt)
-    obj = result.scalar_one_or_none()
-    if not obj:
-        return None
-    if appeal_in.status_id is not None:
-        obj.status_id = appeal_in.status_id
-    if appeal_in.assigned_to_id is not None:
-        obj.assigned_to_id = appeal_in.assigned_to_id
-    if appeal_in.location is not None:
-        obj.location = appeal_in.location
-    if appeal_in.description is not None:
-        obj.description = appeal_in.description
+                        current_user_id: str, expected_version: Optional[int] = None) -> dict | None:
+    values = {
+        field: getattr(appeal_in, field)
+        for field in UPDATABLE_FIELDS
+        if getattr(appeal_in, field) is not None
+    }
+    if not values:
+        current = await get_appeal_dict(db, appeal_id)
+        if current and expected_version is not None and current["version"] != expected_version:
+            raise PreconditionFailed(current["version"])
+        return current
 
-    await db.commit()
-    await db.refresh(obj)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    old = _locked_old(appeal_id)
+    stmt = update(Appeal.__table__).where(Appeal.id == old.c.id)
+    if expected_version is not None:
+        stmt = stmt.where(Appeal.version == expected_version)
+    written = (
+        stmt
+        .values(**values, version=Appeal.version + 1, updated_at=now)
+        .returning(*APPEAL_RETURNING)
+        .cte("written")
+    )
+    obj = await _execute_write(db, written, old, "update", current_user_id, now)
+    if obj is None:
+        return None
 
     message = {
         "event_type": "update",
         "appeal": {
-            "id": str(obj.id),
-            "type_id": obj.type_id,
-            "type_name": obj.type_name,
-            "severity_id": obj.severity_id,
-            "severity_name": obj.severity_name,
-            "status_id": obj.status_id,
-            "status_name": obj.status_name,
-            "location": obj.location,
-            "description": obj.description,
-            "source": obj.source,
-            "reporter_id": str(obj.reporter_id) if obj.reporter_id else None,
-            "assigned_to_id": str(obj.assigned_to_id) if obj.assigned_to_id else None,
-            "payload": obj.payload,
-            "is_deleted": obj.is_deleted,
-            "created_at": obj.created_at.isoformat(),
-            "updated_at": obj.updated_at.isoformat(),
+            "id": str(obj["id"]),
+            "type_id": obj["type_id"],
+            "type_name": obj["type_name"],
+            "severity_id": obj["severity_id"],
+            "severity_name": obj["severity_name"],
+            "status_id": obj["status_id"],
+            "status_name": obj["status_name"],
+            "location": obj["location"],
+            "description": obj["description"],
+            "source": obj["source"],
+            "reporter_id": str(obj["reporter_id"]) if obj["reporter_id"] else None,
+            "assigned_to_id": str(obj["assigned_to_id"]) if obj["assigned_to_id"] else None,
+            "payload": obj["payload"],
+            "is_deleted": obj["is_deleted"],
+            "latitude": obj["latitude"],
+            "longitude": obj["longitude"],
+            "building_id": obj["building_id"],
+            "floor": obj["floor"],
+            "created_at": obj["created_at"].isoformat(),
+            "updated_at": obj["updated_at"].isoformat(),
         },
     }
     await manager.broadcast(message)
@@ -101,22 +298,25 @@ async def update_appeal(db: AsyncSession, appeal_id: str, appeal_in: AppealUpdat
     return obj
 
 
-async def soft_delete_appeal(db: AsyncSession, appeal_id: str, current_user_id: str) -> Appeal | None:
-    stmt = select(Appeal).where(Appeal.id == appeal_id)
-    result = await db.execute(stmt)
-    obj = result.scalar_one_or_none()
-    if not obj:
+async def soft_delete_appeal(db: AsyncSession, appeal_id: str, current_user_id: str) -> dict | None:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    old = _locked_old(appeal_id)
+    written = (
+        update(Appeal.__table__)
+        .where(Appeal.id == old.c.id)
+        .values(is_deleted=True, version=Appeal.version + 1, updated_at=now)
+        .returning(*APPEAL_RETURNING)
+        .cte("written")
+    )
+    obj = await _execute_write(db, written, old, "delete", current_user_id, now)
+    if obj is None:
         return None
 
-    obj.is_deleted = True
-    await db.commit()
-    await db.refresh(obj)
-
     message = {
         "event_type": "delete",
         "appeal": {
-            "id": str(obj.id),
-            "is_deleted": obj.is_deleted,
+            "id": str(obj["id"]),
+            "is_deleted": obj["is_deleted"],
         },
     }
     await manager.broadcast(message)
@@ -124,8 +324,27 @@ async def soft_delete_appeal(db: AsyncSession, appeal_id: str, current_user_id:
     return obj
 
 
+async def get_appeal_history_marker(db: AsyncSession, appeal_id) -> tuple[int, Optional[datetime.datetime]]:
+    # история только дописывается: число событий и время последнего однозначно задают её версию.
+    # Запрос покрывается индексом (appeal_id, event_time)
+    result = await db.execute(
+        select(func.count(), func.max(AppealHistory.event_time)).where(AppealHistory.appeal_id == appeal_id)
+    )
+    count, last = result.one()
+    return count, last
+
+
 async def get_appeal_history(db: AsyncSession, appeal_id: uuid.UUID) -> List[AppealHistory]:
     result = await db.execute(
         select(AppealHistory).where(AppealHistory.appeal_id == appeal_id).order_by(AppealHistory.event_time.desc())
     )
     return result.scalars().all()
+
+
+async def get_appeal_history_rows(db: AsyncSession, appeal_id: uuid.UUID) -> List[dict]:
+    result = await db.execute(
+        select(*APPEAL_HISTORY_READ_COLUMNS)
+        .where(AppealHistory.appeal_id == appeal_id)
+        .order_by(AppealHistory.event_time.desc())
+    )
+    return [dict(row) for row in result.mappings()]
@@ -4,7 +4,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select
 from app.core.security import get_password_hash
-from app.models.models import Permission, Role, User
+from app.models.models import Permission, Role, User, user_roles
+from app.services.permission_cache import permission_cache
 from app.schemas.auth import (
     PermissionCreate, RoleCreate, UserCreate, )
 
@@ -40,6 +41,7 @@ async def delete_permission(
         return None
     await db.delete(perm)
     await db.commit()
+    permission_cache.invalidate()
     return perm
 
 
@@ -68,6 +70,7 @@ async def create_role(
         role.permissions = perms
     db.add(role)
     await db.commit()
+    permission_cache.invalidate()
     await db.refresh(role)
     return role
 
@@ -101,6 +104,7 @@ async def update_role(
         role.permissions = perms
 
     await db.commit()
+    permission_cache.invalidate()
     await db.refresh(role)
     return role
 
@@ -114,6 +118,7 @@ async def delete_role(
         return None
     await db.delete(role)
     await db.commit()
+    permission_cache.invalidate()
     return role
 
 
@@ -208,6 +213,11 @@ async def delete_user(
     await db.commit()
     return user
 
+async def get_user_role_ids(db: AsyncSession, user_id: int) -> List[int]:
+    result = await db.execute(select(user_roles.c.role_id).where(user_roles.c.user_id == user_id))
+    return result.scalars().all()
+
+
 async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
     result = await db.execute(select(User).filter(User.username == username))
     return result.scalars().first()
\ No newline at end of file
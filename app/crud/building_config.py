@@ -1,9 +1,14 @@
-from typing import List, Optional
+from typing import Any, List, Optional
 from uuid import UUID
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, func, literal, cast, Text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, array
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.exceptions import PreconditionFailed
 from app.models.models import BuildingConfig
 from app.schemas.building_config import BuildingConfigCreate, BuildingConfigUpdate
+from app.services.config_cache import config_cache
+from app.services.json_patch import apply_merge_patch, apply_patch, parse_pointer, sql_compatible, validate_ops
+from app.ws_manager import manager
 
 
 async def get_configs(
@@ -22,6 +27,14 @@ async def get_config(
     return res.scalar_one_or_none()
 
 
+async def get_config_version(
+        db: AsyncSession, config_id: UUID
+) -> Optional[int]:
+    q = select(BuildingConfig.version).where(BuildingConfig.id == config_id)
+    res = await db.execute(q)
+    return res.scalar_one_or_none()
+
+
 async def create_config(
         db: AsyncSession, cfg: BuildingConfigCreate
 ) -> BuildingConfig:
@@ -38,18 +51,128 @@ async def update_config(
     q = (
         update(BuildingConfig)
         .where(BuildingConfig.id == config_id)
-        .values(**{k: v for k, v in patch.dict().items() if v is not None})
+        .values(
+            **{k: v for k, v in patch.dict().items() if v is not None},
+            version=BuildingConfig.version + 1,
+        )
         .execution_options(synchronize_session="fetch")
     )
     await db.execute(q)
     await db.commit()
+    config_cache.invalidate(config_id)
     return await get_config(db, config_id)
 
 
+def _pointer_array(tokens: list[str]):
+    return cast(array([literal(t, Text) for t in tokens]), ARRAY(Text))
+
+
+def _build_sql_patch(ops: list[dict]):
+    # цепочка jsonb_set / #- поверх колонки + условия существования путей.
+    # Условия смотрят на исходную колонку: sql_compatible пропускает сюда только независимые операции
+    col = BuildingConfig.config
+    expr = col
+    conds = []
+    for op in ops:
+        tokens = parse_pointer(op["path"])
+        path = _pointer_array(tokens)
+        if op["op"] == "remove":
+            conds.append(col.op("#>", return_type=JSONB)(path).isnot(None))
+            expr = expr.op("#-", return_type=JSONB)(path)
+        elif op["op"] == "replace":
+            conds.append(col.op("#>", return_type=JSONB)(path).isnot(None))
+            expr = func.jsonb_set(expr, path, literal(op["value"], JSONB), False, type_=JSONB)
+        else:
+            parent = col.op("#>", return_type=JSONB)(_pointer_array(tokens[:-1])) if len(tokens) > 1 else col
+            conds.append(func.jsonb_typeof(parent) == "object")
+            expr = func.jsonb_set(expr, path, literal(op["value"], JSONB), True, type_=JSONB)
+    return expr, conds
+
+
+def _build_sql_merge(merge: Any):
+    # плоский merge patch без null и вложенных объектов — это просто jsonb ||
+    if not isinstance(merge, dict) or any(v is None or isinstance(v, dict) for v in merge.values()):
+        return None
+    return BuildingConfig.config.op("||", return_type=JSONB)(literal(merge, JSONB))
+
+
+async def patch_config(
+        db: AsyncSession,
+        config_id: UUID,
+        ops: Optional[list[dict]] = None,
+        merge: Any = None,
+        expected_version: Optional[int] = None,
+) -> Optional[dict]:
+    if ops is not None:
+        validate_ops(ops)
+
+    sql_expr, conds = None, []
+    if ops is not None and sql_compatible(ops):
+        sql_expr, conds = _build_sql_patch(ops)
+    elif ops is None:
+        sql_expr = _build_sql_merge(merge)
+
+    row = None
+    if sql_expr is not None:
+        q = update(BuildingConfig).where(BuildingConfig.id == config_id, *conds)
+        if expected_version is not None:
+            q = q.where(BuildingConfig.version == expected_version)
+        q = (
+            q.values(config=sql_expr, version=BuildingConfig.version + 1)
+            .returning(BuildingConfig.version, BuildingConfig.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        row = (await db.execute(q)).first()
+
+    if row is None:
+        # несовпадение версии, отсутствующий путь или операция, недоступная в SQL:
+        # читаем документ под блокировкой и применяем патч в Python
+        try:
+            cur = (await db.execute(
+                select(BuildingConfig.config, BuildingConfig.version)
+                .where(BuildingConfig.id == config_id)
+                .with_for_update()
+            )).first()
+            if cur is None:
+                await db.rollback()
+                return None
+            if expected_version is not None and cur.version != expected_version:
+                raise PreconditionFailed(cur.version)
+            new_doc = apply_patch(cur.config, ops) if ops is not None else apply_merge_patch(cur.config, merge)
+        except Exception:
+            await db.rollback()
+            raise
+        row = (await db.execute(
+            update(BuildingConfig)
+            .where(BuildingConfig.id == config_id)
+            .values(config=new_doc, version=BuildingConfig.version + 1)
+            .returning(BuildingConfig.version, BuildingConfig.updated_at)
+            .execution_options(synchronize_session=False)
+        )).first()
+
+    await db.commit()
+    config_cache.invalidate(config_id)
+
+    message = {
+        "event_type": "building_config_patch",
+        "id": str(config_id),
+        "version": row.version,
+        "base_version": row.version - 1,
+    }
+    if ops is not None:
+        message["ops"] = ops
+    else:
+        message["merge_patch"] = merge
+    await manager.broadcast(message)
+
+    return {"id": config_id, "version": row.version, "updated_at": row.updated_at}
+
+
 async def delete_config(
         db: AsyncSession, config_id: UUID
 ) -> bool:
     q = delete(BuildingConfig).where(BuildingConfig.id == config_id)
     res = await db.execute(q)
     await db.commit()
+    config_cache.invalidate(config_id)
     return res.rowcount > 0
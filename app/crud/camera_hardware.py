@@ -1,12 +1,30 @@
+import datetime
+import json
 import uuid
-from sqlalchemy import select, delete
+from typing import Optional, Sequence
+from sqlalchemy import select, delete, update, bindparam, tuple_, literal_column, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.models import CameraHardware
 from app.schemas.camera_hardware import CameraHardwareCreate
+from app.services import camera_events
+from app.services.camera_directory import camera_directory
+from app.settings.config import settings
 
 
-async def get_cameras(db: AsyncSession, skip: int = 0, limit: int = 100):
-    stmt = select(CameraHardware).offset(skip).limit(limit)
+async def get_cameras(
+        db: AsyncSession,
+        limit: int = 100,
+        after: Optional[tuple[datetime.datetime, uuid.UUID]] = None,
+        skip: int = 0,
+):
+    stmt = select(CameraHardware)
+    if after is not None:
+        stmt = stmt.where(tuple_(CameraHardware.created_at, CameraHardware.id) > tuple_(*after))
+    stmt = stmt.order_by(CameraHardware.created_at, CameraHardware.id).limit(limit)
+    if skip:
+        # устаревшая постраничка через OFFSET для старых клиентов
+        stmt = stmt.offset(skip)
     result = await db.execute(stmt)
     return result.scalars().all()
 
@@ -23,9 +41,37 @@ async def create_camera(db: AsyncSession, cam_in: CameraHardwareCreate):
     db.add(db_cam)
     await db.commit()
     await db.refresh(db_cam)
+    camera_directory.upsert([db_cam])
     return db_cam
 
 
+async def upsert_cameras(db: AsyncSession, cams_in: list[CameraHardwareCreate]) -> tuple[list, int]:
+    # повторяющийся stream_url в одной пачке ломает ON CONFLICT — оставляем последнюю запись
+    rows = list({cam.stream_url: cam.dict() for cam in cams_in}.values())
+    table = CameraHardware.__table__
+    cameras, created = [], 0
+    batch_size = settings.CAMERA_BULK_BATCH_SIZE
+    for start in range(0, len(rows), batch_size):
+        stmt = insert(table).values(rows[start:start + batch_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.stream_url],
+            set_={
+                "name": stmt.excluded.name,
+                "ptz_enabled": stmt.excluded.ptz_enabled,
+                "ptz_protocol": stmt.excluded.ptz_protocol,
+                "username": stmt.excluded.username,
+                "password": stmt.excluded.password,
+            },
+        ).returning(*table.c, literal_column("xmax = 0").label("inserted"))
+        result = await db.execute(stmt)
+        for row in result:
+            cameras.append(row)
+            created += int(row.inserted)
+    await db.commit()
+    camera_directory.upsert(cameras)
+    return cameras, created
+
+
 async def delete_camera(db: AsyncSession, camera_id: uuid.UUID) -> bool:
     stmt = (
         delete(CameraHardware)
@@ -34,4 +80,41 @@ async def delete_camera(db: AsyncSession, camera_id: uuid.UUID) -> bool:
     )
     result = await db.execute(stmt)
     await db.commit()
+    camera_directory.remove(camera_id)
     return result.rowcount > 0
+
+
+async def list_camera_directory(db: AsyncSession) -> list:
+    result = await db.execute(
+        select(
+            CameraHardware.id,
+            CameraHardware.name,
+            CameraHardware.stream_url,
+            CameraHardware.ptz_enabled,
+            CameraHardware.ptz_protocol,
+            CameraHardware.status,
+        )
+    )
+    return result.all()
+
+
+async def save_camera_statuses(db: AsyncSession, rows: list[dict], events: Sequence[dict] = ()) -> None:
+    # один executemany на пачку результатов проверок
+    stmt = (
+        update(CameraHardware.__table__)
+        .where(CameraHardware.__table__.c.id == bindparam("camera_id"))
+        .values(
+            status=bindparam("status"),
+            latency_ms=bindparam("latency_ms"),
+            last_seen_at=bindparam("last_seen_at"),
+            last_checked_at=bindparam("last_checked_at"),
+        )
+    )
+    await db.execute(stmt, rows)
+    if events:
+        # NOTIFY уходит подписчикам при COMMIT — вместе с сохранёнными статусами, одним запросом на пачку
+        await db.execute(
+            text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+            {"channel": camera_events.CHANNEL, "payloads": [json.dumps(e) for e in events]},
+        )
+    await db.commit()
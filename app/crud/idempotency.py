@@ -0,0 +1,67 @@
+import datetime
+from typing import Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import IdempotencyKey
+
+
+async def claim_key(db: AsyncSession, scope: str, key: str, request_hash: str, lock_timeout: int) -> bool:
+    # занимаем ключ на время выполнения; просроченную запись (в т.ч. брошенную упавшим воркером)
+    # перехватываем тем же запросом
+    table = IdempotencyKey.__table__
+    expires_at = func.now() + datetime.timedelta(seconds=lock_timeout)
+    stmt = insert(table).values(scope=scope, key=key, request_hash=request_hash, expires_at=expires_at)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.scope, table.c.key],
+        set_={
+            "request_hash": stmt.excluded.request_hash,
+            "status_code": None,
+            "response_body": None,
+            "created_at": func.now(),
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=table.c.expires_at < func.now(),
+    ).returning(table.c.key)
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.first() is not None
+
+
+async def get_key(db: AsyncSession, scope: str, key: str) -> Optional[IdempotencyKey]:
+    result = await db.execute(
+        select(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+    )
+    return result.scalar_one_or_none()
+
+
+async def complete_key(db: AsyncSession, scope: str, key: str, status_code: int, body: bytes, ttl: int) -> None:
+    await db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+        .values(
+            status_code=status_code,
+            response_body=body,
+            expires_at=func.now() + datetime.timedelta(seconds=ttl),
+        )
+    )
+    await db.commit()
+
+
+async def release_key(db: AsyncSession, scope: str, key: str) -> None:
+    await db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None),
+        )
+    )
+    await db.commit()
+
+
+async def purge_expired(db: AsyncSession) -> int:
+    result = await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < func.now()))
+    await db.commit()
+    return result.rowcount
@@ -1,17 +1,103 @@
+import datetime
+from typing import Optional
+from uuid import UUID
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.models.models import Image
+from sqlalchemy import select, update, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from app.models.models import Image, ImageBlob
 
 
-async def create_image(db: AsyncSession, filename: str, filepath: str) -> Image:
-    img = Image(filename=filename, filepath=filepath)
+async def create_image(
+        db: AsyncSession,
+        filename: str,
+        filepath: str,
+        blob_sha256: Optional[str] = None,
+        ext: Optional[str] = None,
+        size: Optional[int] = None,
+        camera_id: Optional[UUID] = None,
+        appeal_id: Optional[UUID] = None,
+) -> Image:
+    if blob_sha256 is not None:
+        acquire = (
+            insert(ImageBlob)
+            .values(sha256=blob_sha256, ext=ext, size=size, ref_count=1)
+            .on_conflict_do_update(
+                index_elements=[ImageBlob.sha256],
+                set_={"ref_count": ImageBlob.ref_count + 1},
+            )
+        )
+        await db.execute(acquire)
+    img = Image(
+        filename=filename,
+        filepath=filepath,
+        blob_sha256=blob_sha256,
+        camera_id=camera_id,
+        appeal_id=appeal_id,
+    )
     db.add(img)
     await db.commit()
     await db.refresh(img)
     return img
 
 
-async def list_images(db: AsyncSession) -> list[Image]:
-    q = select(Image).order_by(Image.uploaded_at.desc())
+async def get_blob(db: AsyncSession, sha256: str) -> Optional[ImageBlob]:
+    return await db.get(ImageBlob, sha256)
+
+
+async def list_images(
+        db: AsyncSession,
+        limit: int = 100,
+        after: Optional[tuple[datetime.datetime, UUID]] = None,
+        date_from: Optional[datetime.datetime] = None,
+        date_to: Optional[datetime.datetime] = None,
+        camera_id: Optional[UUID] = None,
+        appeal_id: Optional[UUID] = None,
+) -> list[Image]:
+    # keyset по (uploaded_at, id): страница читается из индекса без OFFSET
+    q = select(Image)
+    if camera_id is not None:
+        q = q.where(Image.camera_id == camera_id)
+    if appeal_id is not None:
+        q = q.where(Image.appeal_id == appeal_id)
+    if date_from is not None:
+        q = q.where(Image.uploaded_at >= date_from)
+    if date_to is not None:
+        q = q.where(Image.uploaded_at < date_to)
+    if after is not None:
+        q = q.where(tuple_(Image.uploaded_at, Image.id) < tuple_(*after))
+    q = q.order_by(Image.uploaded_at.desc(), Image.id.desc()).limit(limit)
     res = await db.execute(q)
     return res.scalars().all()
+
+
+async def delete_image(db: AsyncSession, image_id: UUID) -> bool:
+    res = await db.execute(delete(Image).where(Image.id == image_id).returning(Image.blob_sha256))
+    row = res.first()
+    if row is None:
+        return False
+    if row.blob_sha256 is not None:
+        await db.execute(
+            update(ImageBlob)
+            .where(ImageBlob.sha256 == row.blob_sha256)
+            .values(ref_count=ImageBlob.ref_count - 1)
+        )
+    await db.commit()
+    return True
+
+
+async def delete_orphan_blobs(db: AsyncSession) -> list[tuple[str, str]]:
+    res = await db.execute(
+        delete(ImageBlob)
+        .where(ImageBlob.ref_count <= 0)
+        .where(~select(Image.id).where(Image.blob_sha256 == ImageBlob.sha256).exists())
+        .returning(ImageBlob.sha256, ImageBlob.ext)
+    )
+    rows = [(r.sha256, r.ext) for r in res]
+    await db.commit()
+    return rows
+
+
+async def list_blob_keys(db: AsyncSession) -> set[tuple[str, str]]:
+    res = await db.execute(select(ImageBlob.sha256, ImageBlob.ext))
+    return {(r.sha256, r.ext) for r in res}
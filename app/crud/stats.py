@@ -0,0 +1,78 @@
+import datetime
+from typing import List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import AppealStatsHourly
+
+GROUP_COLUMNS = {
+    "type": AppealStatsHourly.type_id,
+    "severity": AppealStatsHourly.severity_id,
+    "status": AppealStatsHourly.status_id,
+    "source": AppealStatsHourly.source,
+}
+
+
+def _filters(stmt, type_id, severity_id, status_id, source):
+    for column, value in (
+            (AppealStatsHourly.type_id, type_id),
+            (AppealStatsHourly.severity_id, severity_id),
+            (AppealStatsHourly.status_id, status_id),
+            (AppealStatsHourly.source, source),
+    ):
+        if value is not None:
+            stmt = stmt.where(column == value)
+    return stmt
+
+
+async def get_hourly_stats(
+        db: AsyncSession,
+        date_from: datetime.datetime,
+        date_to: datetime.datetime,
+        group_by: List[str],
+        type_id: Optional[int] = None,
+        severity_id: Optional[int] = None,
+        status_id: Optional[int] = None,
+        source: Optional[str] = None,
+) -> List[dict]:
+    columns = [GROUP_COLUMNS[g] for g in group_by]
+    stmt = (
+        select(
+            AppealStatsHourly.bucket,
+            *columns,
+            func.sum(AppealStatsHourly.created).label("created"),
+            func.sum(AppealStatsHourly.delta).label("delta"),
+        )
+        .where(AppealStatsHourly.bucket >= date_from, AppealStatsHourly.bucket < date_to)
+        .group_by(AppealStatsHourly.bucket, *columns)
+        .order_by(AppealStatsHourly.bucket, *columns)
+    )
+    stmt = _filters(stmt, type_id, severity_id, status_id, source)
+    result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings()]
+
+
+async def get_current_stats(
+        db: AsyncSession,
+        group_by: List[str],
+        at: Optional[datetime.datetime] = None,
+        type_id: Optional[int] = None,
+        severity_id: Optional[int] = None,
+        status_id: Optional[int] = None,
+        source: Optional[str] = None,
+) -> List[dict]:
+    # число обращений в каждом состоянии на момент at — сумма дельт до него
+    columns = [GROUP_COLUMNS[g] for g in group_by]
+    count = func.sum(AppealStatsHourly.delta)
+    stmt = (
+        select(*columns, count.label("count"))
+        .group_by(*columns)
+        .having(count != 0)
+        .order_by(*columns)
+    )
+    if at is not None:
+        stmt = stmt.where(AppealStatsHourly.bucket <= at)
+    stmt = _filters(stmt, type_id, severity_id, status_id, source)
+    result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings()]
@@ -1,3 +1,6 @@
+import asyncio
+
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.settings.config import settings
@@ -6,8 +9,10 @@ DATABASE_URL = settings.DATABASE_URL
 
 async_engine: AsyncEngine = create_async_engine(
     DATABASE_URL,
-    echo=True,
+    echo=settings.DB_ECHO,
     pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
 )
 
 AsyncSessionLocal = sessionmaker(
@@ -23,3 +28,12 @@ async def get_db() -> AsyncSession:
             yield session
         finally:
             await session.close()
+
+
+async def warm_pool(size: int) -> None:
+    # открываем соединения одновременно и возвращаем их в пул
+    async def touch():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(touch() for _ in range(min(size, settings.DB_POOL_SIZE))))
@@ -1,3 +1,8 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,10 +13,60 @@ from app.routes.reference import router as reference_router
 from app.routes.export import router as export_router
 from app.routes.images import router as images_router
 from app.routes.auth import router as auth_router
-from fastapi.staticfiles import StaticFiles
+from app.routes.uploads import router as uploads_router
+from app.routes.stats import router as stats_router
+from app.routes.metrics import router as metrics_router
+from app.routes.admin import router as admin_router
 from app.routes import building_config
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.tracing import TracingMiddleware
+from app.settings.config import settings
+from app.services import camera_events, camera_health, history_partitions, idempotency, leader, metrics, thumbnails, tracing
+from app.services.camera_directory import camera_directory
+from app.services.permission_cache import permission_cache
+from app.services.reference_cache import reference_cache
+from app.database import async_engine, warm_pool
+from app.ws_manager import manager
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(warm_pool(settings.DB_POOL_WARM), reference_cache.load(), permission_cache.load()),
+            settings.STARTUP_WARM_TIMEOUT,
+        )
+    except Exception:
+        # без БД сервис всё равно поднимается: кэши и пул заполнятся при первых запросах
+        logger.exception("startup warm-up failed")
+    await camera_directory.start()
+    if settings.CAMERA_HEALTH_ENABLED:
+        # статусы камер проверяет лидер, а слушают и рассылают своим клиентам все воркеры
+        await camera_events.start()
+    await metrics.start()
+    # при нескольких воркерах фоновые задачи запускает только один из них
+    if leader.acquire():
+        await camera_health.start_scheduler()
+        await history_partitions.start()
+        await idempotency.start()
+    yield
+    await manager.close_all(timeout=settings.SHUTDOWN_DRAIN_TIMEOUT)
+    await idempotency.stop()
+    await history_partitions.stop()
+    await camera_health.stop_scheduler()
+    await camera_events.stop()
+    await camera_directory.stop()
+    await metrics.stop()
+    await thumbnails.drain(settings.SHUTDOWN_DRAIN_TIMEOUT)
+    await async_engine.dispose()
+    leader.release()
 
-app = FastAPI(title="Appeals Service", version="1.0.0")
+
+app = FastAPI(title="Appeals Service", version="1.0.0", lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",
@@ -24,7 +79,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Idempotent-Replayed", "X-Trace-Id", "Server-Timing"],
+)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    encodings=settings.COMPRESSION_ENCODINGS,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
 )
+if settings.TRACING_ENABLED:
+    tracing.install()
+    app.add_middleware(TracingMiddleware)
+if settings.METRICS_ENABLED:
+    # внешним слоем: в задержку входят CORS и сжатие
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(appeal_router)
 
@@ -35,8 +105,19 @@ app.include_router(export_router)
 app.include_router(images_router)
 app.include_router(auth_router)
 app.include_router(building_config.router)
+app.include_router(stats_router)
+app.include_router(uploads_router)
+app.include_router(admin_router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    # режим разработки; в продакшене — python -m app.server
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
+    )
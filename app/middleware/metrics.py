@@ -0,0 +1,47 @@
+from time import perf_counter
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.services.metrics import HTTP_DURATION, HTTP_IN_PROGRESS, HTTP_REQUESTS
+
+# пути без маршрута в одну серию: иначе сканеры раздувают число меток
+UNMATCHED = "<unmatched>"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.values
+        in_progress[()] = in_progress.get((), 0) + 1
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - started
+            in_progress[()] -= 1
+            # маршрут кладёт в scope роутер FastAPI; шаблон пути, а не сам путь
+            route = scope.get("route")
+            if route is not None:
+                path = route.path
+            elif "endpoint" in scope:
+                # маршруты Starlette (/docs, /openapi.json) без параметров: путь и есть шаблон
+                path = scope["path"]
+            else:
+                path = UNMATCHED
+            labels = (scope["method"], path)
+            HTTP_DURATION.observe(elapsed, labels)
+            HTTP_REQUESTS.inc((*labels, status))
@@ -7,12 +7,15 @@ from sqlalchemy import (
     Text,
     Integer,
     Boolean,
+    Float,
     TIMESTAMP,
     ForeignKey,
     JSON,
     text,
     func,
     Table,
+    Index,
+    LargeBinary,
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
@@ -47,6 +50,19 @@ class AppealStatus(Base):
 
 class Appeal(Base):
     __tablename__ = "appeals"
+    __table_args__ = (
+        # GiST по встроенному point: bbox (<@ box) и радиус идут по индексу без PostGIS
+        Index(
+            "ix_appeals_geo",
+            func.point(text("longitude"), text("latitude")),
+            postgresql_using="gist",
+            postgresql_where=text("latitude IS NOT NULL AND longitude IS NOT NULL AND NOT is_deleted"),
+        ),
+        Index("ix_appeals_building_floor", "building_id", "floor"),
+        Index("ix_appeals_live_created_at", text("created_at DESC"), postgresql_where=text("NOT is_deleted")),
+        Index("ix_appeals_reporter_id", "reporter_id", postgresql_where=text("reporter_id IS NOT NULL")),
+        Index("ix_appeals_assigned_to_id", "assigned_to_id", postgresql_where=text("assigned_to_id IS NOT NULL")),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, default=datetime.datetime.utcnow)
     updated_at = Column(TIMESTAMP(timezone=True), nullable=False, default=datetime.datetime.utcnow,
@@ -61,6 +77,12 @@ class Appeal(Base):
     assigned_to_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
     payload = Column("metadata", JSON, nullable=True)
     is_deleted = Column(Boolean, nullable=False, default=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    latitude = Column(Float)
+    longitude = Column(Float)
+    # building_config.id_build не уникален, поэтому без внешнего ключа
+    building_id = Column(Integer)
+    floor = Column(Integer)
     reporter = relationship("User", foreign_keys=[reporter_id])
     assigned_to = relationship("User", foreign_keys=[assigned_to_id])
     history = relationship("AppealHistory", back_populates="appeal", cascade="all, delete-orphan")
@@ -89,25 +111,56 @@ class Appeal(Base):
 
 class AppealHistory(Base):
     __tablename__ = "appeal_history"
+    # помесячные партиции по event_time создаёт и архивирует app.services.history_partitions
+    __table_args__ = (
+        Index("ix_appeal_history_appeal_event_time", "appeal_id", "event_time"),
+        {"postgresql_partition_by": "RANGE (event_time)"},
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     appeal_id = Column(UUID(as_uuid=True), ForeignKey("appeals.id", ondelete="NO ACTION"))
-    event_time = Column(TIMESTAMP(timezone=True), nullable=False, default=datetime.datetime.utcnow)
+    event_time = Column(TIMESTAMP(timezone=True), primary_key=True, nullable=False,
+                        default=datetime.datetime.utcnow)
     event_type = Column(String(50), nullable=False)
-    changed_by_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
+    # без внешнего ключа: users.id — integer, а колонка UUID; в базе (миграции 0001–0003) ключа тоже нет
+    changed_by_id = Column(UUID(as_uuid=True))
     field_name = Column(String(100))
     old_value = Column(Text)
     new_value = Column(Text)
     comment = Column(Text)
     payload = Column("metadata", JSON, nullable=True)
     appeal = relationship("Appeal", back_populates="history")
-    changed_by = relationship("User")
+
+
+class AppealStatsHourly(Base):
+    # дельты по часам: created — сколько обращений создано, delta — сколько вошло (+) и вышло (−) из состояния
+    __tablename__ = "appeal_stats_hourly"
+    bucket = Column(TIMESTAMP(timezone=True), primary_key=True)
+    type_id = Column(Integer, primary_key=True)
+    severity_id = Column(Integer, primary_key=True)
+    status_id = Column(Integer, primary_key=True)
+    source = Column(String(50), primary_key=True)
+    created = Column(Integer, nullable=False, default=0, server_default="0")
+    delta = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class IdempotencyKey(Base):
+    # ответ на первый запрос с данным Idempotency-Key; status_code NULL — запрос ещё выполняется
+    __tablename__ = "idempotency_keys"
+    scope = Column(String(100), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer)
+    response_body = Column(LargeBinary)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False, index=True)
 
 
 class Attachment(Base):
     __tablename__ = "attachments"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    appeal_id = Column(UUID(as_uuid=True), ForeignKey("appeals.id", ondelete="CASCADE"), nullable=False)
-    uploaded_by_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"))
+    appeal_id = Column(UUID(as_uuid=True), ForeignKey("appeals.id", ondelete="CASCADE"), nullable=False, index=True)
+    # как и appeal_history.changed_by_id — без внешнего ключа на users
+    uploaded_by_id = Column(UUID(as_uuid=True))
     file_path = Column(String(1024), nullable=False)
     file_name = Column(String(255))
     file_size = Column(Integer)
@@ -115,19 +168,36 @@ class Attachment(Base):
     uploaded_at = Column(TIMESTAMP(timezone=True), nullable=False, default=datetime.datetime.utcnow)
     payload = Column("metadata", JSON, nullable=True)
     appeal = relationship("Appeal", back_populates="attachments")
-    uploaded_by = relationship("User")
 
 
 class CameraHardware(Base):
     __tablename__ = "camera_hardware"
     id = Column(UUID(as_uuid=True), primary_key=True, index=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
-    stream_url = Column(String, nullable=False)
+    stream_url = Column(String, nullable=False, unique=True)
     ptz_enabled = Column(Boolean, default=False)
     ptz_protocol = Column(String, nullable=True)
     username = Column(String, nullable=True)
     password = Column(String, nullable=True)
-    created_at = Column(TIMESTAMP(timezone=True), default=datetime.datetime.utcnow)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, default=datetime.datetime.utcnow,
+                        server_default=func.now())
+    status = Column(String(20), nullable=True)
+    latency_ms = Column(Float, nullable=True)
+    last_seen_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    last_checked_at = Column(TIMESTAMP(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_camera_hardware_created_at_id", "created_at", "id"),
+    )
+
+
+class ImageBlob(Base):
+    __tablename__ = "image_blobs"
+    sha256 = Column(String(64), primary_key=True)
+    ext = Column(String(10), nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, default=datetime.datetime.utcnow)
 
 
 class Image(Base):
@@ -135,7 +205,18 @@ class Image(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     filename = Column(String, nullable=False)
     filepath = Column(String, nullable=False)
-    uploaded_at = Column(TIMESTAMP(timezone=True), default=datetime.datetime.utcnow)
+    uploaded_at = Column(TIMESTAMP(timezone=True), nullable=False, default=datetime.datetime.utcnow,
+                         server_default=func.now())
+    blob_sha256 = Column(String(64), ForeignKey("image_blobs.sha256", ondelete="RESTRICT"), nullable=True, index=True)
+    camera_id = Column(UUID(as_uuid=True), ForeignKey("camera_hardware.id", ondelete="SET NULL"), nullable=True)
+    appeal_id = Column(UUID(as_uuid=True), ForeignKey("appeals.id", ondelete="SET NULL"), nullable=True)
+    blob = relationship("ImageBlob")
+
+    __table_args__ = (
+        Index("ix_images_uploaded_at_id", "uploaded_at", "id"),
+        Index("ix_images_camera_uploaded_at_id", "camera_id", "uploaded_at", "id"),
+        Index("ix_images_appeal_uploaded_at_id", "appeal_id", "uploaded_at", "id"),
+    )
 
 
 class BuildingConfig(Base):
@@ -144,18 +225,22 @@ class BuildingConfig(Base):
     id_build = Column(Integer, nullable=False)
     name_build = Column(Text, nullable=False)
     config = Column(JSONB, nullable=False, default={})
-    updated_at = Column(TIMESTAMP(timezone=True), default=datetime.datetime.utcnow)
+    updated_at = Column(TIMESTAMP(timezone=True), default=datetime.datetime.utcnow,
+                        onupdate=datetime.datetime.utcnow)
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"))
 
 role_permissions = Table(
     'role_permissions', Base.metadata,
     Column('role_id', Integer, ForeignKey('roles.id', ondelete='CASCADE'), primary_key=True),
     Column('permission_id', Integer, ForeignKey('permissions.id', ondelete='CASCADE'), primary_key=True),
+    Index('ix_role_permissions_permission_id', 'permission_id'),
 )
 
 user_roles = Table(
     'user_roles', Base.metadata,
     Column('user_id', Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
     Column('role_id', Integer, ForeignKey('roles.id', ondelete='CASCADE'), primary_key=True),
+    Index('ix_user_roles_role_id', 'role_id'),
 )
 
 
@@ -0,0 +1,45 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.routes.auth import require_permissions
+from app.services import profiler, tracing
+from app.settings.config import settings
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_permissions("profile_service"))],
+)
+
+
+@router.get("/traces", summary="Последние трассировки запросов")
+async def list_traces(limit: int = Query(50, ge=1, le=1000)):
+    return [trace.summary() for trace in list(tracing.recent)[-limit:][::-1]]
+
+
+@router.get("/traces/{trace_id}", summary="Спаны трассировки")
+async def read_trace(trace_id: str):
+    trace = tracing.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Трассировка не найдена")
+    return trace.to_dict()
+
+
+@router.post("/profile", response_class=PlainTextResponse,
+             summary="Статистический профиль воркера в формате collapsed stacks")
+async def run_profile(
+        seconds: float = Query(10.0, gt=0),
+        interval_ms: float = Query(10.0, ge=1, le=1000),
+        include_idle: bool = False,
+):
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Не больше {settings.PROFILER_MAX_SECONDS} секунд")
+    try:
+        # выборки снимает отдельный поток, цикл событий в это время обслуживает запросы
+        stacks = await asyncio.to_thread(profiler.sample, seconds, interval_ms / 1000, include_idle)
+    except profiler.ProfilerBusy:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Профилирование уже запущено")
+    return PlainTextResponse(profiler.collapsed(stacks))
@@ -1,16 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.exceptions import IdempotencyKeyInProgress, IdempotencyKeyReused, PreconditionFailed
+from app.core.serialization import FastJSONResponse
 from app.database import get_db
+from app.services import idempotency
+from app.services.config_cache import make_etag, parse_etag_version
+from app.services.static_files import etag_matches
+from app.settings.config import settings
 from app.schemas.appeal import AppealRead, AppealCreate, AppealUpdate, AppealHistoryRead
 from app.crud.appeal import (
     get_appeals,
+    get_appeals_rows,
     get_appeal,
     create_appeal,
     update_appeal,
     soft_delete_appeal,
-    get_appeal_history
+    get_appeal_history,
+    get_appeal_history_rows,
+    get_appeal_history_marker,
+    get_appeal_version,
 )
 
+
+def appeal_etag(appeal_id, version: int) -> str:
+    # тот же тег, что принимает If-Match в PATCH; слабый, т.к. тело зависит от справочников
+    return "W/" + make_etag(appeal_id, version)
+
+
+def history_etag(appeal_id, count: int, last: Optional[datetime.datetime]) -> str:
+    stamp = int(last.timestamp() * 1_000_000) if last else 0
+    return f'W/"{appeal_id}-h{count}-{stamp}"'
+
+
+MAX_RADIUS_M = 100_000
+
+
+def _parse_bbox(bbox: str) -> tuple[float, float, float, float]:
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="bbox: ожидается min_lon,min_lat,max_lon,max_lat")
+    if not (-180 <= min_lon <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="bbox вне допустимых координат")
+    return min_lon, min_lat, max_lon, max_lat
+
+
 router = APIRouter(
     prefix="/appeals",
     tags=["appeals"],
@@ -21,42 +60,108 @@ router = APIRouter(
 async def read_appeals(
         skip: int = 0,
         limit: int = 100,
+        bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+        lat: Optional[float] = Query(None, ge=-90, le=90),
+        lon: Optional[float] = Query(None, ge=-180, le=180),
+        radius: Optional[float] = Query(None, gt=0, le=MAX_RADIUS_M, description="метры"),
+        building_id: Optional[int] = None,
+        floor: Optional[int] = None,
         db: AsyncSession = Depends(get_db)
 ):
-    return await get_appeals(db, skip=skip, limit=limit)
+    filters = {
+        "bbox": _parse_bbox(bbox) if bbox else None,
+        "near": None,
+        "building_id": building_id,
+        "floor": floor,
+    }
+    if lat is not None or lon is not None or radius is not None:
+        if lat is None or lon is None or radius is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Для поиска по радиусу нужны lat, lon и radius")
+        filters["near"] = (lat, lon, radius)
+    if settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse(await get_appeals_rows(db, skip=skip, limit=limit, **filters))
+    return await get_appeals(db, skip=skip, limit=limit, **filters)
 
 
 @router.get("/{appeal_id}", response_model=AppealRead, summary="Получить обращение по ID")
 async def read_appeal(
         appeal_id: str,
+        request: Request,
+        response: Response,
         db: AsyncSession = Depends(get_db)
 ):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # сначала только версия по первичному ключу: объект грузим лишь если ETag не совпал
+        version = await get_appeal_version(db, appeal_id)
+        if version is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appeal not found")
+        etag = appeal_etag(appeal_id, version)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
     appeal_obj = await get_appeal(db, appeal_id)
     if not appeal_obj:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appeal not found")
+    response.headers["ETag"] = appeal_etag(appeal_obj.id, appeal_obj.version)
+    response.headers["Cache-Control"] = "no-cache"
     return appeal_obj
 
 
 @router.post("/", response_model=AppealRead, status_code=status.HTTP_201_CREATED, summary="Создать новое обращение")
 async def create_new_appeal(
+        request: Request,
         appeal_in: AppealCreate,
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
         db: AsyncSession = Depends(get_db),
         current_user_id: str = Depends(lambda: None)
 ):
-    new_appeal = await create_appeal(db, appeal_in, current_user_id)
-    return new_appeal
+    if idempotency_key is None:
+        return await create_appeal(db, appeal_in, current_user_id)
+
+    async def handler():
+        new_appeal = await create_appeal(db, appeal_in, current_user_id)
+        return JSONResponse(jsonable_encoder(AppealRead.model_validate(new_appeal)),
+                            status_code=status.HTTP_201_CREATED)
+
+    try:
+        return await idempotency.run_once(db, "POST /appeals/", idempotency_key, await request.body(), handler)
+    except IdempotencyKeyInProgress:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail="Запрос с этим Idempotency-Key ещё выполняется")
+    except IdempotencyKeyReused:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail="Idempotency-Key уже использован с другим телом запроса")
 
 
 @router.patch("/{appeal_id}", response_model=AppealRead, summary="Обновить обращение (частично)")
 async def patch_appeal(
         appeal_id: str,
         appeal_in: AppealUpdate,
+        request: Request,
+        response: Response,
         db: AsyncSession = Depends(get_db),
         current_user_id: str = Depends(lambda: None)
 ):
-    updated = await update_appeal(db, appeal_id, appeal_in, current_user_id)
+    expected_version = None
+    if_match = request.headers.get("if-match")
+    if if_match and if_match.strip() != "*":
+        expected_version = parse_etag_version(if_match)
+        if expected_version is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный If-Match")
+
+    try:
+        updated = await update_appeal(db, appeal_id, appeal_in, current_user_id, expected_version)
+    except PreconditionFailed as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Обращение изменено другим пользователем",
+            headers={"ETag": appeal_etag(appeal_id, e.current_version)},
+        )
     if not updated:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Appeal not found")
+    response.headers["ETag"] = appeal_etag(updated["id"], updated["version"])
     return updated
 
 
@@ -75,7 +180,23 @@ async def delete_appeal(
 @router.get("/{appeal_id}/history", response_model=list[AppealHistoryRead], summary="История изменений обращения")
 async def read_appeal_history(
         appeal_id: str,
+        request: Request,
+        response: Response,
         db: AsyncSession = Depends(get_db)
 ):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        count, last = await get_appeal_history_marker(db, appeal_id)
+        etag = history_etag(appeal_id, count, last)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    headers = {"Cache-Control": "no-cache"}
+    if settings.FAST_JSON_RESPONSES:
+        rows = await get_appeal_history_rows(db, appeal_id)
+        headers["ETag"] = history_etag(appeal_id, len(rows), rows[0]["event_time"] if rows else None)
+        return FastJSONResponse(rows, headers=headers)
     history = await get_appeal_history(db, appeal_id)
+    headers["ETag"] = history_etag(appeal_id, len(history), history[0].event_time if history else None)
+    response.headers.update(headers)
     return history
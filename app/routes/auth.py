@@ -7,7 +7,8 @@ from app.schemas import auth
 from app.crud.auth import (
     list_permissions, create_permission, delete_permission, get_permission,
     list_roles, create_role, update_role, delete_role, get_role,
-    list_users, create_user, update_user, delete_user, get_user, get_user_by_username
+    list_users, create_user, update_user, delete_user, get_user, get_user_by_username,
+    get_user_role_ids,
 )
 from app.core.security import verify_password, create_access_token
 from sqlalchemy.exc import IntegrityError
@@ -15,6 +16,7 @@ from jose import JWTError, jwt
 from app.core.security import SECRET_KEY, ALGORITHM
 from app.schemas.auth import UserRead, UserCreate, Token
 from app.models.models import User
+from app.services.permission_cache import permission_cache
 router = APIRouter(prefix="/auth", tags=["auth"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
@@ -272,19 +274,16 @@ def require_permissions(*permission_codes: str):
         current_user: User = Depends(get_current_user),
         db: AsyncSession = Depends(get_db),
     ):
-        # подгружаем роли+права
-        user = await get_user(db, current_user.id)  # selectinload(User.roles)
-        if not user:
-            raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
-        # собираем все коды прав
-        user_perms = {perm.code for role in user.roles for perm in role.permissions}
+        # права ролей берём из кэша, из БД — только id ролей пользователя
+        role_ids = await get_user_role_ids(db, current_user.id)
+        user_perms = await permission_cache.permissions_for(role_ids)
         missing = set(permission_codes) - user_perms
         if missing:
             raise HTTPException(
                 status.HTTP_403_FORBIDDEN,
                 detail=f"Недостаточно прав: {', '.join(missing)}"
             )
-        return user
+        return current_user
     return dependency
 
 @router.get(
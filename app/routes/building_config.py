@@ -1,10 +1,14 @@
 from typing import List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.exceptions import PreconditionFailed
 from app.database import get_db
 import app.crud.building_config as crud
 import app.schemas.building_config as schemas
+from app.services.config_cache import config_cache, make_etag, parse_etag_version
+from app.services.json_patch import JsonPatchConflict, JsonPatchError
+from app.services.static_files import etag_matches
 
 router = APIRouter(prefix="/building-configs", tags=["building-configs"])
 
@@ -21,12 +25,26 @@ async def list_building_configs(
 @router.get("/{config_id}", response_model=schemas.BuildingConfigRead)
 async def get_building_config(
         config_id: UUID,
+        request: Request,
         db: AsyncSession = Depends(get_db),
 ):
-    cfg = await crud.get_config(db, config_id)
-    if cfg is None:
+    # сначала только версия: JSONB читаем и сериализуем лишь при промахе кэша
+    version = await crud.get_config_version(db, config_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Config not found")
-    return cfg
+    etag = make_etag(config_id, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    entry = config_cache.get(config_id, version)
+    if entry is None:
+        cfg = await crud.get_config(db, config_id)
+        if cfg is None:
+            raise HTTPException(status_code=404, detail="Config not found")
+        body = schemas.BuildingConfigRead.model_validate(cfg).model_dump_json().encode()
+        entry = config_cache.put(config_id, version, body)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
 
 
 @router.post("/", response_model=schemas.BuildingConfigRead, status_code=201)
@@ -49,6 +67,51 @@ async def update_building_config(
     return updated
 
 
+@router.patch(
+    "/{config_id}",
+    response_model=schemas.BuildingConfigPatchResult,
+    summary="Частичное обновление конфигурации (JSON Patch / merge patch)",
+)
+async def patch_building_config(
+        config_id: UUID,
+        request: Request,
+        response: Response,
+        db: AsyncSession = Depends(get_db),
+):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некорректный JSON")
+
+    expected_version = None
+    if_match = request.headers.get("if-match")
+    if if_match and if_match.strip() != "*":
+        expected_version = parse_etag_version(if_match)
+        if expected_version is None:
+            raise HTTPException(status_code=400, detail="Некорректный If-Match")
+
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("application/merge-patch+json"):
+            result = await crud.patch_config(db, config_id, merge=body, expected_version=expected_version)
+        else:
+            result = await crud.patch_config(db, config_id, ops=body, expected_version=expected_version)
+    except PreconditionFailed as e:
+        raise HTTPException(
+            status_code=412,
+            detail="Конфигурация изменена другим пользователем",
+            headers={"ETag": make_etag(config_id, e.current_version)},
+        )
+    except JsonPatchConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except JsonPatchError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Config not found")
+    response.headers["ETag"] = make_etag(config_id, result["version"])
+    return result
+
+
 @router.delete("/{config_id}", response_model=bool)
 async def delete_building_config(
         config_id: UUID,
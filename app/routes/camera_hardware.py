@@ -1,28 +1,57 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import io
+import json
+from typing import List, Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.exceptions import IdempotencyKeyInProgress, IdempotencyKeyReused
+from app.core.pagination import decode_cursor, encode_cursor
 from app.crud.camera_hardware import (
     create_camera,
     get_camera,
     get_cameras,
-    delete_camera
+    delete_camera,
+    upsert_cameras,
 )
 from app.schemas.camera_hardware import (
     CameraHardwareRead,
     CameraHardwareCreate,
+    CameraBulkResult,
 )
+from app.crud.images import list_images
+from app.schemas.images import ImageRead
 from app.database import get_db
+from app.services import idempotency
 
 router = APIRouter(tags=["cameras"], prefix="/cameras")
 
+_cameras_adapter = TypeAdapter(List[CameraHardwareCreate])
+
 
 @router.get("/", response_model=List[CameraHardwareRead])
 async def read_cameras(
-        skip: int = 0,
-        limit: int = 100,
+        response: Response,
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = None,
+        skip: int = Query(0, ge=0, deprecated=True, description="Устарело: используйте cursor из X-Next-Cursor"),
         db: AsyncSession = Depends(get_db),
 ):
-    return await get_cameras(db, skip, limit)
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="cursor и skip нельзя передавать вместе")
+    try:
+        after = decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некорректный cursor")
+    cameras = await get_cameras(db, limit=limit, after=after, skip=skip)
+    if len(cameras) == limit:
+        last = cameras[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    return cameras
 
 
 @router.get("/{camera_id}", response_model=CameraHardwareRead)
@@ -36,12 +65,73 @@ async def read_camera(
     return cam
 
 
+@router.get("/{camera_id}/snapshots", response_model=List[ImageRead], summary="Последние снимки камеры")
+async def read_camera_snapshots(
+        camera_id: UUID,
+        limit: int = Query(20, ge=1, le=500),
+        db: AsyncSession = Depends(get_db),
+):
+    return await list_images(db, limit=limit, camera_id=camera_id)
+
+
 @router.post("/", response_model=CameraHardwareRead, status_code=201)
 async def create_camera_endpoint(
         camera: CameraHardwareCreate,
         db: AsyncSession = Depends(get_db),
 ):
-    return await create_camera(db, camera)
+    try:
+        return await create_camera(db, camera)
+    except IntegrityError as exc:
+        await db.rollback()
+        if "camera_hardware_stream_url_key" in str(exc.orig).lower():
+            raise HTTPException(409, detail="Камера с таким stream_url уже существует")
+        raise
+
+
+def _read_csv(raw: bytes) -> list[dict]:
+    reader = csv.DictReader(io.StringIO(raw.decode("utf-8-sig")))
+    return [{k: (v if v != "" else None) for k, v in row.items() if k} for row in reader]
+
+
+@router.post("/bulk", response_model=CameraBulkResult, summary="Массовый импорт камер (JSON или CSV)")
+async def bulk_upsert_cameras(
+        request: Request,
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+        db: AsyncSession = Depends(get_db),
+):
+    # тело читаем заранее: по нему считается отпечаток запроса для Idempotency-Key
+    raw = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None:
+                raise HTTPException(status_code=400, detail="Ожидается CSV-файл в поле file")
+            data = _read_csv(await upload.read())
+        elif content_type.startswith("text/csv"):
+            data = _read_csv(raw)
+        else:
+            data = json.loads(raw)
+        cams_in = _cameras_adapter.validate_python(data)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Не удалось разобрать тело запроса")
+
+    async def handler():
+        cameras, created = await upsert_cameras(db, cams_in)
+        result = {"created": created, "updated": len(cameras) - created, "cameras": cameras}
+        return JSONResponse(jsonable_encoder(CameraBulkResult.model_validate(result, from_attributes=True)))
+
+    if idempotency_key is None:
+        return await handler()
+    try:
+        return await idempotency.run_once(db, "POST /cameras/bulk", idempotency_key, raw, handler)
+    except IdempotencyKeyInProgress:
+        raise HTTPException(status_code=409, detail="Запрос с этим Idempotency-Key ещё выполняется")
+    except IdempotencyKeyReused:
+        raise HTTPException(status_code=422, detail="Idempotency-Key уже использован с другим телом запроса")
 
 
 @router.delete("/{camera_id}", response_model=bool)
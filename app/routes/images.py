@@ -1,39 +1,121 @@
 import os
-import aiofiles
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from uuid import uuid4
+from uuid import UUID
+from app.core.pagination import decode_cursor, encode_cursor
 from app.database import get_db
-from app.crud.images import create_image, list_images
+from app.crud.images import create_image, list_images, delete_image, get_blob
 from app.schemas.images import ImageRead
+from app.services.blob_store import blob_name, blob_path, content_hash, detect_ext, write_blob
+from app.services.static_files import serve_immutable
+from app.services.thumbnails import derivative_path, ensure_derivatives, schedule_derivatives
+from app.settings.config import settings
 
 router = APIRouter(prefix="/images", tags=["images"])
 
-UPLOAD_DIR = "uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
 
 @router.post("/upload", response_model=ImageRead, status_code=201)
 async def upload_image(
         file: UploadFile = File(...),
+        camera_id: Optional[UUID] = Form(None),
+        appeal_id: Optional[UUID] = Form(None),
         db: AsyncSession = Depends(get_db),
 ):
     ext = os.path.splitext(file.filename)[1].lower()
     if ext not in (".jpg", ".jpeg", ".png", ".gif"):
         raise HTTPException(400, "Поддерживаются только изображения JPG/PNG/GIF")
-    new_name = f"{uuid4().hex}{ext}"
-    dst = os.path.join(UPLOAD_DIR, new_name)
     try:
         contents = await file.read()
-        async with aiofiles.open(dst, "wb") as f:
-            await f.write(contents)
+        sha256 = content_hash(contents)
+        ext = detect_ext(contents, ext)
+        await write_blob(contents, sha256, ext)
     except Exception as e:
         raise HTTPException(500, f"Не удалось сохранить файл: {e}")
 
-    img = await create_image(db, filename=new_name, filepath=dst)
+    img = await create_image(
+        db,
+        filename=blob_name(sha256, ext),
+        filepath=blob_path(sha256, ext),
+        blob_sha256=sha256,
+        ext=ext,
+        size=len(contents),
+        camera_id=camera_id,
+        appeal_id=appeal_id,
+    )
+    # GC мог удалить файл между записью и commit — восстановим
+    try:
+        await write_blob(contents, sha256, ext)
+    except Exception as e:
+        raise HTTPException(500, f"Не удалось сохранить файл: {e}")
+    schedule_derivatives(sha256, ext)
     return img
 
 
 @router.get("/", response_model=list[ImageRead])
-async def get_images(db: AsyncSession = Depends(get_db)):
-    return await list_images(db)
+async def get_images(
+        response: Response,
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = None,
+        date_from: Optional[datetime.datetime] = None,
+        date_to: Optional[datetime.datetime] = None,
+        camera_id: Optional[UUID] = None,
+        appeal_id: Optional[UUID] = None,
+        db: AsyncSession = Depends(get_db),
+):
+    try:
+        after = decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некорректный cursor")
+    images = await list_images(
+        db,
+        limit=limit,
+        after=after,
+        date_from=date_from,
+        date_to=date_to,
+        camera_id=camera_id,
+        appeal_id=appeal_id,
+    )
+    if len(images) == limit:
+        last = images[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.uploaded_at, last.id)
+    return images
+
+
+@router.get("/derivatives/{sha256}/{variant}.{fmt}", summary="Превью изображения")
+async def get_image_derivative(
+        sha256: str,
+        variant: str,
+        fmt: str,
+        request: Request,
+        db: AsyncSession = Depends(get_db),
+):
+    if (
+            len(sha256) != 64
+            or not all(c in "0123456789abcdef" for c in sha256)
+            or variant not in settings.THUMBNAIL_SIZES
+            or fmt not in settings.THUMBNAIL_FORMATS
+    ):
+        raise HTTPException(status_code=404, detail="Derivative not found")
+    path = derivative_path(sha256, variant, fmt)
+    if not os.path.exists(path):
+        blob = await get_blob(db, sha256)
+        if blob is None:
+            raise HTTPException(status_code=404, detail="Image not found")
+        try:
+            await ensure_derivatives(sha256, blob.ext)
+        except Exception as e:
+            raise HTTPException(500, f"Не удалось построить превью: {e}")
+    return await serve_immutable(request, path, media_type=f"image/{fmt}")
+
+
+@router.delete("/{image_id}", response_model=bool)
+async def delete_image_endpoint(
+        image_id: UUID,
+        db: AsyncSession = Depends(get_db),
+):
+    ok = await delete_image(db, image_id)
+    if not ok:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return ok
@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Response
+
+from app.services import metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
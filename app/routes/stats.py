@@ -0,0 +1,64 @@
+import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.stats import GROUP_COLUMNS, get_current_stats, get_hourly_stats
+from app.database import get_db
+from app.schemas.stats import CurrentStatsRead, HourlyStatsRead
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+MAX_RANGE = datetime.timedelta(days=366)
+
+
+def _group_by(group_by: str) -> List[str]:
+    groups = [g.strip() for g in group_by.split(",") if g.strip()]
+    unknown = [g for g in groups if g not in GROUP_COLUMNS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Неизвестные поля группировки: {', '.join(unknown)}; допустимы {', '.join(GROUP_COLUMNS)}",
+        )
+    return groups
+
+
+def _utc(value: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+    # время без часового пояса считаем UTC: иначе сравнение с aware-границей падает с TypeError
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value
+
+
+@router.get("/hourly", response_model=List[HourlyStatsRead], summary="Обращения по часам")
+async def read_hourly_stats(
+        date_from: datetime.datetime,
+        date_to: Optional[datetime.datetime] = None,
+        group_by: str = Query("type,severity,status", description="type,severity,status,source"),
+        type_id: Optional[int] = None,
+        severity_id: Optional[int] = None,
+        status_id: Optional[int] = None,
+        source: Optional[str] = None,
+        db: AsyncSession = Depends(get_db),
+):
+    date_from = _utc(date_from)
+    date_to = _utc(date_to) or datetime.datetime.now(datetime.timezone.utc)
+    if date_to <= date_from or date_to - date_from > MAX_RANGE:
+        raise HTTPException(status_code=400, detail="Некорректный интервал (не более 366 дней)")
+    return await get_hourly_stats(
+        db, date_from, date_to, _group_by(group_by), type_id, severity_id, status_id, source
+    )
+
+
+@router.get("/current", response_model=List[CurrentStatsRead], summary="Количество обращений по состояниям")
+async def read_current_stats(
+        at: Optional[datetime.datetime] = None,
+        group_by: str = Query("type,severity,status", description="type,severity,status,source"),
+        type_id: Optional[int] = None,
+        severity_id: Optional[int] = None,
+        status_id: Optional[int] = None,
+        source: Optional[str] = None,
+        db: AsyncSession = Depends(get_db),
+):
+    return await get_current_stats(db, _group_by(group_by), _utc(at), type_id, severity_id, status_id, source)
@@ -0,0 +1,15 @@
+import os
+from fastapi import APIRouter, HTTPException, Request
+from app.services.static_files import serve_immutable
+from app.settings.config import settings
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+
+@router.api_route("/{file_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_upload(file_path: str, request: Request):
+    root = os.path.realpath(settings.UPLOAD_DIR)
+    path = os.path.realpath(os.path.join(root, file_path))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Not Found")
+    return await serve_immutable(request, path)
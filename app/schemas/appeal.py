@@ -15,6 +15,10 @@ class AppealBase(BaseModel):
     source: str
     assigned_to_id: Optional[int] = None
     payload: Optional[dict] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    building_id: Optional[int] = None
+    floor: Optional[int] = None
 
 
 class AppealCreate(AppealBase):
@@ -28,6 +32,10 @@ class AppealUpdate(BaseModel):
     description: Optional[str] = None
     metadata: Optional[dict] = None
     is_deleted: Optional[bool] = None
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    building_id: Optional[int] = None
+    floor: Optional[int] = None
 
 
 class AppealRead(AppealBase):
@@ -36,6 +44,7 @@ class AppealRead(AppealBase):
     updated_at: datetime.datetime
     ticket_number: int
     is_deleted: bool
+    version: int = 1
     type_name: str
     severity_name: str
     status_name: str
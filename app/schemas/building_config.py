@@ -23,6 +23,13 @@ class BuildingConfigUpdate(BaseModel):
 class BuildingConfigRead(BuildingConfigBase):
     id: UUID
     updated_at: datetime
+    version: int = 1
 
     class Config:
         from_attributes = True
+
+
+class BuildingConfigPatchResult(BaseModel):
+    id: UUID
+    version: int
+    updated_at: Optional[datetime]
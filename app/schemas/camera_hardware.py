@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 
@@ -20,6 +20,16 @@ class CameraHardwareCreate(CameraHardwareBase):
 class CameraHardwareRead(CameraHardwareBase):
     id: UUID
     created_at: datetime
+    status: Optional[str] = None
+    latency_ms: Optional[float] = None
+    last_seen_at: Optional[datetime] = None
+    last_checked_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+
+class CameraBulkResult(BaseModel):
+    created: int
+    updated: int
+    cameras: List[CameraHardwareRead]
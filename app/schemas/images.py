@@ -1,13 +1,24 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, computed_field
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
+from app.services.thumbnails import derivative_urls
+
 
 class ImageRead(BaseModel):
     id: UUID
     filename: str
     filepath: str
     uploaded_at: datetime
+    blob_sha256: Optional[str] = None
+    camera_id: Optional[UUID] = None
+    appeal_id: Optional[UUID] = None
+
+    @computed_field
+    @property
+    def derivatives(self) -> dict[str, dict[str, str]]:
+        return derivative_urls(self.blob_sha256)
 
     class Config:
         from_attributes = True
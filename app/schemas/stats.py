@@ -0,0 +1,21 @@
+import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class StatsGroup(BaseModel):
+    type_id: Optional[int] = None
+    severity_id: Optional[int] = None
+    status_id: Optional[int] = None
+    source: Optional[str] = None
+
+
+class HourlyStatsRead(StatsGroup):
+    bucket: datetime.datetime
+    created: int
+    delta: int
+
+
+class CurrentStatsRead(StatsGroup):
+    count: int
@@ -0,0 +1,71 @@
+import glob
+import importlib.util
+import logging
+import os
+import tempfile
+
+import uvicorn
+
+from app.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def cpu_count() -> int:
+    # в контейнере os.cpu_count() видит все ядра хоста; учитываем affinity и квоту cgroup v2
+    count = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            count = min(count, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+def worker_count() -> int:
+    return settings.SERVER_WORKERS if settings.SERVER_WORKERS > 0 else cpu_count()
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def _prepare_metrics_dir(workers: int) -> None:
+    # снимки прошлого запуска удаляем, иначе счётчики мёртвых pid попадут в сумму
+    if workers > 1 and not settings.METRICS_DIR:
+        os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="appeals-metrics-")
+    path = os.environ.get("METRICS_DIR") or settings.METRICS_DIR
+    if path:
+        os.makedirs(path, exist_ok=True)
+        for stale in glob.glob(os.path.join(path, "*.json")):
+            os.remove(stale)
+
+
+def main() -> None:
+    workers = worker_count()
+    _prepare_metrics_dir(workers)
+    # app.main импортирует каждый воркер сам: пул соединений и фоновые задачи не создаются до fork
+    uvicorn.run(
+        "app.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=workers,
+        loop="uvloop" if _available("uvloop") else "asyncio",
+        http="httptools" if _available("httptools") else "h11",
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_TIMEOUT,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+        limit_concurrency=settings.SERVER_LIMIT_CONCURRENCY,
+        ws_ping_interval=settings.WS_PING_INTERVAL,
+        ws_ping_timeout=settings.WS_PING_TIMEOUT,
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE,
+        proxy_headers=True,
+        server_header=False,
+        access_log=settings.SERVER_ACCESS_LOG,
+    )
+
+
+if __name__ == "__main__":
+    main()
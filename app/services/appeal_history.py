@@ -0,0 +1,81 @@
+import asyncio
+import datetime
+import sys
+from pathlib import Path
+
+from sqlalchemy import TIMESTAMP, Text, cast, func, insert, literal, null, select, text, union_all
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.models.models import AppealHistory
+from app.settings.config import settings
+
+TRIGGER_SQL = Path(__file__).resolve().parent.parent / "sql" / "appeal_history_trigger.sql"
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS appeals_history_insert ON appeals;
+DROP TRIGGER IF EXISTS appeals_history_update ON appeals;
+DROP FUNCTION IF EXISTS appeal_history_capture();
+"""
+
+# поля, изменения которых попадают в историю; тот же список зашит в триггер
+TRACKED_FIELDS = (
+    "status_id", "assigned_to_id", "location", "description",
+    "latitude", "longitude", "building_id", "floor", "is_deleted",
+)
+
+
+def capture_cte(old, new, fields, event_type: str, changed_by_id, now: datetime.datetime):
+    # diff считается в самом запросе: old — состояние до изменения (None при создании), new — RETURNING записи.
+    # Возвращает CTE для вставки в тот же statement, что и запись обращения
+    if settings.HISTORY_MODE != "app":
+        return None
+    actor = cast(literal(str(changed_by_id) if changed_by_id is not None else None), UUID(as_uuid=True))
+    base = [func.gen_random_uuid(), new.c.id, cast(literal(now), TIMESTAMP(timezone=True)),
+            cast(literal(event_type), Text), actor]
+    if old is None:
+        source = select(*base, null(), null(), null())
+    else:
+        source = union_all(*(
+            select(*base, cast(literal(f), Text), cast(old.c[f], Text), cast(new.c[f], Text))
+            .where(new.c.id == old.c.id, old.c[f].is_distinct_from(new.c[f]))
+            for f in fields
+        ))
+    return insert(AppealHistory.__table__).from_select(
+        ["id", "appeal_id", "event_time", "event_type", "changed_by_id", "field_name", "old_value", "new_value"],
+        source,
+    ).cte(f"history_{event_type}")
+
+
+async def set_actor(db: AsyncSession, changed_by_id) -> None:
+    # в режиме trigger автор изменения передаётся триггеру через настройку транзакции
+    if settings.HISTORY_MODE == "trigger" and changed_by_id is not None:
+        await db.execute(text("SELECT set_config('app.user_id', :uid, true)"), {"uid": str(changed_by_id)})
+
+
+async def _execute_script(conn: AsyncConnection, sql: str) -> None:
+    # скрипт из нескольких команд и $$-тела asyncpg выполняет только простым протоколом
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.execute(sql)
+
+
+async def install_trigger(conn: AsyncConnection) -> None:
+    await _execute_script(conn, TRIGGER_SQL.read_text())
+
+
+async def drop_trigger(conn: AsyncConnection) -> None:
+    await _execute_script(conn, DROP_TRIGGER_SQL)
+
+
+async def _main(command: str) -> None:
+    from app.database import async_engine
+
+    async with async_engine.begin() as conn:
+        await (install_trigger if command == "install-trigger" else drop_trigger)(conn)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] not in (["install-trigger"], ["drop-trigger"]):
+        print("usage: python -m app.services.appeal_history install-trigger|drop-trigger")
+        sys.exit(2)
+    asyncio.run(_main(sys.argv[1]))
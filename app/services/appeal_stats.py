@@ -0,0 +1,85 @@
+import asyncio
+import datetime
+import sys
+from typing import Optional
+
+from sqlalchemy import TIMESTAMP, Integer, cast, delete, func, literal, literal_column, or_, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import Appeal, AppealStatsHourly
+
+STATE_FIELDS = ("type_id", "severity_id", "status_id", "source")
+
+
+def bucket_of(moment: Optional[datetime.datetime] = None) -> datetime.datetime:
+    moment = moment or datetime.datetime.now(datetime.timezone.utc)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def rollup_cte(old, new, now: datetime.datetime):
+    # old — состояние до изменения (None при создании), new — RETURNING записи.
+    # Уход из прежнего состояния даёт −1, вход в новое +1; удалённые обращения не учитываются
+    # типы констант задаём явно: в UNION ALL нетипизированные параметры Postgres считает text
+    bucket = cast(literal(bucket_of(now)), TIMESTAMP(timezone=True))
+    one, zero, minus_one = (literal_column(v, Integer) for v in ("1", "0", "-1"))
+    if old is None:
+        source = select(bucket, *(new.c[f] for f in STATE_FIELDS), one, one).where(~new.c.is_deleted)
+    else:
+        changed = or_(
+            old.c.is_deleted.is_distinct_from(new.c.is_deleted),
+            *(old.c[f].is_distinct_from(new.c[f]) for f in STATE_FIELDS),
+        )
+        source = union_all(
+            select(bucket, *(old.c[f] for f in STATE_FIELDS), zero, minus_one)
+            .where(old.c.id == new.c.id, changed, ~old.c.is_deleted),
+            select(bucket, *(new.c[f] for f in STATE_FIELDS), zero, one)
+            .where(old.c.id == new.c.id, changed, ~new.c.is_deleted),
+        )
+    table = AppealStatsHourly.__table__
+    stmt = insert(table).from_select(["bucket", *STATE_FIELDS, "created", "delta"], source)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.bucket, *(table.c[f] for f in STATE_FIELDS)],
+        set_={
+            "created": table.c.created + stmt.excluded.created,
+            "delta": table.c.delta + stmt.excluded.delta,
+        },
+    ).cte("stats")
+
+
+async def rebuild(db: AsyncSession) -> int:
+    # полный пересчёт из appeals: created по часу создания, текущее состояние — дельтой в том же часе.
+    # Моменты прошлых переходов при этом теряются, точными остаются created и текущие остатки.
+    await db.execute(delete(AppealStatsHourly))
+    bucket = func.date_trunc(literal_column("'hour'"), Appeal.created_at)
+    source = (
+        select(
+            bucket.label("bucket"),
+            *(getattr(Appeal, f) for f in STATE_FIELDS),
+            func.count().label("created"),
+            func.count().filter(Appeal.is_deleted == False).label("delta"),
+        )
+        .group_by(bucket, *(getattr(Appeal, f) for f in STATE_FIELDS))
+    )
+    result = await db.execute(
+        insert(AppealStatsHourly.__table__).from_select(
+            ["bucket", *STATE_FIELDS, "created", "delta"], source
+        )
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def _main() -> None:
+    from app.database import AsyncSessionLocal, async_engine
+
+    async with AsyncSessionLocal() as db:
+        print({"rows": await rebuild(db)})
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["rebuild"]:
+        print("usage: python -m app.services.appeal_stats rebuild")
+        sys.exit(2)
+    asyncio.run(_main())
@@ -0,0 +1,126 @@
+import asyncio
+import glob
+import hashlib
+import os
+import sys
+import time
+import uuid
+from typing import Iterator, Optional
+
+import aiofiles
+import aiofiles.os
+
+from app.settings.config import settings
+
+_MAGIC = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+)
+_EXT_ALIASES = {".jpeg": ".jpg"}
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def detect_ext(data: bytes, fallback: str) -> str:
+    for magic, ext in _MAGIC:
+        if data.startswith(magic):
+            return ext
+    return _EXT_ALIASES.get(fallback, fallback)
+
+
+def blob_name(sha256: str, ext: str) -> str:
+    # два уровня шардирования: uploads/ab/cd/abcd....jpg
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def blob_path(sha256: str, ext: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, *blob_name(sha256, ext).split("/"))
+
+
+async def write_blob(data: bytes, sha256: str, ext: str) -> bool:
+    dst = blob_path(sha256, ext)
+    if await aiofiles.os.path.exists(dst):
+        return False
+    await aiofiles.os.makedirs(os.path.dirname(dst), exist_ok=True)
+    # уникальное имя: одинаковые кадры с разных камер пишутся параллельно в одном воркере
+    tmp = f"{dst}.{uuid.uuid4().hex}.tmp"
+    try:
+        async with aiofiles.open(tmp, "wb") as f:
+            await f.write(data)
+        await aiofiles.os.replace(tmp, dst)
+    except BaseException:
+        try:
+            await aiofiles.os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    return True
+
+
+async def remove_blob(sha256: str, ext: str) -> None:
+    path = blob_path(sha256, ext)
+    # вместе с оригиналом удаляем производные: <sha>_<variant>.<fmt>
+    derived = glob.glob(os.path.join(os.path.dirname(path), f"{sha256}_*"))
+    for p in [path, *derived]:
+        try:
+            await aiofiles.os.remove(p)
+        except FileNotFoundError:
+            pass
+
+
+def _is_shard(name: str) -> bool:
+    return len(name) == 2 and all(c in "0123456789abcdef" for c in name)
+
+
+def iter_blob_files(root: Optional[str] = None) -> Iterator[tuple[str, str, str]]:
+    root = root or settings.UPLOAD_DIR
+    if not os.path.isdir(root):
+        return
+    for lvl1 in os.scandir(root):
+        if not (lvl1.is_dir() and _is_shard(lvl1.name)):
+            continue
+        for lvl2 in os.scandir(lvl1.path):
+            if not (lvl2.is_dir() and _is_shard(lvl2.name)):
+                continue
+            for entry in os.scandir(lvl2.path):
+                if not entry.is_file():
+                    continue
+                stem, ext = os.path.splitext(entry.name)
+                if len(stem) == 64:
+                    yield entry.path, stem, ext
+
+
+async def collect_garbage(grace_seconds: Optional[int] = None) -> dict:
+    from app.crud.images import delete_orphan_blobs, list_blob_keys
+    from app.database import AsyncSessionLocal
+
+    grace = settings.BLOB_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    stats = {"orphan_rows": 0, "stray_files": 0}
+
+    async with AsyncSessionLocal() as db:
+        for sha256, ext in await delete_orphan_blobs(db):
+            await remove_blob(sha256, ext)
+            stats["orphan_rows"] += 1
+
+        # файлы без строки в image_blobs: обрыв загрузки между записью и commit
+        known = await list_blob_keys(db)
+        deadline = time.time() - grace
+        for path, sha256, ext in iter_blob_files():
+            if (sha256, ext) in known or os.path.getmtime(path) > deadline:
+                continue
+            os.remove(path)
+            stats["stray_files"] += 1
+
+    return stats
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["gc"]:
+        print("usage: python -m app.services.blob_store gc [grace_seconds]")
+        sys.exit(2)
+    grace_arg = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    print(asyncio.run(collect_garbage(grace_arg)))
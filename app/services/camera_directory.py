@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import uuid
+from typing import NamedTuple, Optional
+
+from app.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CameraEntry(NamedTuple):
+    id: uuid.UUID
+    name: str
+    stream_url: str
+    ptz_enabled: bool
+    ptz_protocol: Optional[str]
+    status: Optional[str]
+
+
+class CameraDirectory:
+    # копия camera_hardware в памяти воркера: планировщик и WebSocket читают её без обращения к Postgres
+    def __init__(self):
+        self._entries: dict[uuid.UUID, CameraEntry] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, camera_id: uuid.UUID) -> Optional[CameraEntry]:
+        return self._entries.get(camera_id)
+
+    def all(self) -> list[CameraEntry]:
+        return list(self._entries.values())
+
+    def upsert(self, cameras) -> None:
+        for cam in cameras:
+            self._entries[cam.id] = CameraEntry(
+                cam.id, cam.name, cam.stream_url, bool(cam.ptz_enabled), cam.ptz_protocol, cam.status
+            )
+
+    def remove(self, camera_id: uuid.UUID) -> None:
+        self._entries.pop(camera_id, None)
+
+    def replace(self, cameras) -> None:
+        entries = {}
+        for cam in cameras:
+            entries[cam.id] = CameraEntry(
+                cam.id, cam.name, cam.stream_url, bool(cam.ptz_enabled), cam.ptz_protocol, cam.status
+            )
+        self._entries = entries
+
+    async def load(self) -> None:
+        from app.crud.camera_hardware import list_camera_directory
+        from app.database import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            self.replace(await list_camera_directory(db))
+
+    async def _reload_loop(self) -> None:
+        # изменения из других воркеров подтягиваем периодической перечиткой
+        while True:
+            await asyncio.sleep(settings.CAMERA_DIRECTORY_RELOAD_INTERVAL)
+            try:
+                await self.load()
+            except Exception:
+                logger.exception("camera directory reload failed")
+
+    async def start(self) -> None:
+        try:
+            await self.load()
+        except Exception:
+            logger.exception("camera directory initial load failed")
+        self._task = asyncio.create_task(self._reload_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+camera_directory = CameraDirectory()
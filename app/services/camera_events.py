@@ -0,0 +1,74 @@
+import asyncio
+import json
+import logging
+from typing import Optional
+
+from app.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+# смены статусов камер: планировщик работает только на лидере, а WebSocket-клиенты подключены ко всем воркерам,
+# поэтому события идут через NOTIFY, и каждый воркер рассылает их своим клиентам
+CHANNEL = "camera_status"
+RECONNECT_DELAY = 5.0
+
+_queue: Optional[asyncio.Queue] = None
+_tasks: list[asyncio.Task] = []
+
+
+def _dsn() -> str:
+    from sqlalchemy.engine import make_url
+
+    return make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+def _on_notify(connection, pid, channel, payload) -> None:
+    _queue.put_nowait(payload)
+
+
+async def _listen_loop() -> None:
+    import asyncpg
+
+    # отдельное соединение вне пула: LISTEN живёт, пока открыто соединение
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(_dsn())
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda _: closed.set())
+            await conn.add_listener(CHANNEL, _on_notify)
+            await closed.wait()
+            logger.warning("camera status listener connection lost, reconnecting")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("camera status listener failed")
+        finally:
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(RECONNECT_DELAY)
+
+
+async def _deliver_loop() -> None:
+    from app.ws_manager import manager
+
+    while True:
+        payload = await _queue.get()
+        try:
+            await manager.broadcast(json.loads(payload))
+        except Exception:
+            logger.exception("camera status broadcast failed")
+
+
+async def start() -> None:
+    global _queue
+    if not _tasks:
+        _queue = asyncio.Queue()
+        _tasks.extend([asyncio.create_task(_listen_loop()), asyncio.create_task(_deliver_loop())])
+
+
+async def stop() -> None:
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
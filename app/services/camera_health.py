@@ -0,0 +1,295 @@
+import asyncio
+import datetime
+import heapq
+import logging
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+ONLINE = "online"
+OFFLINE = "offline"
+
+_DEFAULT_PORTS = {"rtsp": 554, "rtsps": 322, "rtmp": 1935, "http": 80, "https": 443}
+
+
+@dataclass
+class ProbeResult:
+    ok: bool
+    latency_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class CameraState:
+    camera_id: uuid.UUID
+    stream_url: str
+    status: Optional[str] = None
+    latency_ms: Optional[float] = None
+    last_seen_at: Optional[datetime.datetime] = None
+    last_checked_at: Optional[datetime.datetime] = None
+    failures: int = 0
+    next_due: float = field(default=0.0)
+
+
+async def _probe_rtsp(url: str, host: str, port: int, timeout: float) -> bool:
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(f"OPTIONS {url} RTSP/1.0\r\nCSeq: 1\r\nUser-Agent: appeals-health\r\n\r\n".encode())
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+    finally:
+        writer.close()
+    parts = status_line.decode(errors="replace").split()
+    # 401/403 тоже означают, что камера жива и отвечает
+    return len(parts) >= 2 and parts[0].startswith("RTSP/") and parts[1].isdigit() and int(parts[1]) < 500
+
+
+async def _probe_http(client: httpx.AsyncClient, url: str, timeout: float) -> bool:
+    # MJPEG-потоки бесконечны: читаем только заголовки и закрываем соединение
+    async with client.stream("GET", url, timeout=timeout) as resp:
+        return resp.status_code < 500
+
+
+async def _probe_tcp(host: str, port: int, timeout: float) -> bool:
+    _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    writer.close()
+    return True
+
+
+async def probe(url: str, timeout: float, client: Optional[httpx.AsyncClient] = None) -> ProbeResult:
+    started = time.perf_counter()
+    try:
+        # порт разбирается лениво: "rtsp://host:99999" падает с ValueError только здесь
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        host = parts.hostname
+        if not host:
+            return ProbeResult(False, error="invalid stream_url")
+        port = parts.port or _DEFAULT_PORTS.get(scheme, 554)
+        if scheme == "rtsp":
+            ok = await _probe_rtsp(url, host, port, timeout)
+        elif scheme in ("http", "https"):
+            if client is None:
+                async with httpx.AsyncClient(verify=False) as own:
+                    ok = await _probe_http(own, url, timeout)
+            else:
+                ok = await _probe_http(client, url, timeout)
+        else:
+            ok = await _probe_tcp(host, port, timeout)
+    except (OSError, ValueError, asyncio.TimeoutError, httpx.HTTPError, httpx.InvalidURL) as e:
+        return ProbeResult(False, error=f"{type(e).__name__}: {e}")
+    latency = (time.perf_counter() - started) * 1000
+    return ProbeResult(ok, latency_ms=round(latency, 2) if ok else None, error=None if ok else "bad response")
+
+
+class CameraHealthScheduler:
+    def __init__(
+            self,
+            interval: float = settings.CAMERA_HEALTH_INTERVAL,
+            timeout: float = settings.CAMERA_HEALTH_TIMEOUT,
+            concurrency: int = settings.CAMERA_HEALTH_CONCURRENCY,
+            max_backoff: float = settings.CAMERA_HEALTH_MAX_BACKOFF,
+            refresh_interval: float = settings.CAMERA_HEALTH_REFRESH_INTERVAL,
+            flush_interval: float = settings.CAMERA_HEALTH_FLUSH_INTERVAL,
+            shard_count: int = settings.CAMERA_HEALTH_SHARD_COUNT,
+            shard_index: int = settings.CAMERA_HEALTH_SHARD_INDEX,
+    ):
+        self.interval = interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.refresh_interval = refresh_interval
+        self.flush_interval = flush_interval
+        self.shard_count = max(shard_count, 1)
+        self.shard_index = shard_index
+        self.states: dict[uuid.UUID, CameraState] = {}
+        self._heap: list[tuple[float, uuid.UUID]] = []
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._dirty: dict[uuid.UUID, CameraState] = {}
+        self._events: list[dict] = []
+        self._flush_now = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._probes: set[asyncio.Task] = set()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _owns(self, camera_id: uuid.UUID) -> bool:
+        return camera_id.int % self.shard_count == self.shard_index
+
+    def _jitter(self, delay: float) -> float:
+        return delay * random.uniform(0.8, 1.2)
+
+    def _push(self, state: CameraState, delay: float) -> None:
+        state.next_due = time.monotonic() + delay
+        heapq.heappush(self._heap, (state.next_due, state.camera_id))
+
+    def sync_targets(self, targets: list[tuple[uuid.UUID, str, Optional[str]]]) -> None:
+        seen = set()
+        for camera_id, stream_url, status in targets:
+            if not self._owns(camera_id):
+                continue
+            seen.add(camera_id)
+            state = self.states.get(camera_id)
+            if state is None:
+                state = CameraState(camera_id, stream_url, status=status)
+                self.states[camera_id] = state
+                # разносим первые проверки по всему интервалу, чтобы не было залпа
+                self._push(state, random.uniform(0, self.interval))
+            elif state.stream_url != stream_url:
+                state.stream_url = stream_url
+                state.failures = 0
+                self._push(state, 0)
+        for camera_id in set(self.states) - seen:
+            del self.states[camera_id]
+        self._wakeup.set()
+
+    def _next_delay(self, state: CameraState, ok: bool) -> float:
+        if ok:
+            state.failures = 0
+            return self._jitter(self.interval)
+        state.failures += 1
+        return self._jitter(min(self.interval * 2 ** state.failures, self.max_backoff))
+
+    async def _run_probe(self, state: CameraState) -> None:
+        from app.services.camera_directory import camera_directory
+
+        async with self._semaphore:
+            try:
+                result = await probe(state.stream_url, self.timeout, self._client)
+            except Exception as e:
+                # без этого задача падает до _push, и камера больше никогда не проверяется
+                logger.exception("camera %s probe failed", state.camera_id)
+                result = ProbeResult(False, error=f"{type(e).__name__}: {e}")
+        if self.states.get(state.camera_id) is not state:
+            return
+        now = datetime.datetime.now(datetime.timezone.utc)
+        previous = state.status
+        state.status = ONLINE if result.ok else OFFLINE
+        state.latency_ms = result.latency_ms
+        state.last_checked_at = now
+        if result.ok:
+            state.last_seen_at = now
+        self._dirty[state.camera_id] = state
+        self._push(state, self._next_delay(state, result.ok))
+        if previous != state.status:
+            entry = camera_directory.get(state.camera_id)
+            # рассылка — через NOTIFY при сохранении статусов: клиенты подключены ко всем воркерам, а не только к этому
+            self._events.append({
+                "event_type": "camera_status",
+                "camera": {
+                    "id": str(state.camera_id),
+                    "name": entry.name if entry else None,
+                    "status": state.status,
+                    "previous_status": previous,
+                    "latency_ms": state.latency_ms,
+                    "last_seen_at": state.last_seen_at.isoformat() if state.last_seen_at else None,
+                    "error": result.error,
+                },
+            })
+            self._flush_now.set()
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                due, camera_id = heapq.heappop(self._heap)
+                state = self.states.get(camera_id)
+                # устаревшие записи кучи (камера удалена или перепланирована) пропускаем
+                if state is None or state.next_due != due:
+                    continue
+                task = asyncio.create_task(self._run_probe(state))
+                self._probes.add(task)
+                task.add_done_callback(self._probes.discard)
+            timeout = min(self._heap[0][0] - now, 1.0) if self._heap else 1.0
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refresh_loop(self) -> None:
+        from app.services.camera_directory import camera_directory
+
+        # список камер берём из справочника в памяти, а не из Postgres
+        while True:
+            self.sync_targets([(c.id, c.stream_url, c.status) for c in camera_directory.all()])
+            await asyncio.sleep(self.refresh_interval)
+
+    async def flush(self) -> None:
+        from app.crud.camera_hardware import save_camera_statuses
+        from app.database import AsyncSessionLocal
+
+        if not self._dirty:
+            return
+        batch, self._dirty = list(self._dirty.values()), {}
+        events, self._events = self._events, []
+        async with AsyncSessionLocal() as db:
+            await save_camera_statuses(db, [
+                {
+                    "camera_id": s.camera_id,
+                    "status": s.status,
+                    "latency_ms": s.latency_ms,
+                    "last_seen_at": s.last_seen_at,
+                    "last_checked_at": s.last_checked_at,
+                }
+                for s in batch
+            ], events)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            # смена статуса сохраняется и рассылается сразу, остальные результаты — раз в flush_interval
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("camera status flush failed")
+
+    def start(self) -> None:
+        self._client = httpx.AsyncClient(
+            verify=False,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=0),
+        )
+        self._tasks = [
+            asyncio.create_task(self._refresh_loop()),
+            asyncio.create_task(self._dispatch_loop()),
+            asyncio.create_task(self._flush_loop()),
+        ]
+
+    async def stop(self) -> None:
+        for task in [*self._tasks, *self._probes]:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._probes, return_exceptions=True)
+        self._tasks = []
+        await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+scheduler: Optional[CameraHealthScheduler] = None
+
+
+async def start_scheduler() -> None:
+    global scheduler
+    if settings.CAMERA_HEALTH_ENABLED and scheduler is None:
+        scheduler = CameraHealthScheduler()
+        scheduler.start()
+
+
+async def stop_scheduler() -> None:
+    global scheduler
+    if scheduler is not None:
+        await scheduler.stop()
+        scheduler = None
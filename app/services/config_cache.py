@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from app.settings.config import settings
+
+
+class CachedConfig(NamedTuple):
+    version: int
+    etag: str
+    body: bytes
+
+
+def make_etag(config_id: UUID, version: int) -> str:
+    return f'"{config_id}-{version}"'
+
+
+def parse_etag_version(etag: str) -> Optional[int]:
+    _, _, version = etag.strip().removeprefix("W/").strip('"').rpartition("-")
+    return int(version) if version.isdigit() else None
+
+
+class ConfigCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[UUID, CachedConfig]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, config_id: UUID, version: int) -> Optional[CachedConfig]:
+        with self._lock:
+            entry = self._entries.get(config_id)
+            if entry is None:
+                return None
+            # запись из другого воркера подняла версию — кэш устарел
+            if entry.version != version:
+                del self._entries[config_id]
+                return None
+            self._entries.move_to_end(config_id)
+            return entry
+
+    def put(self, config_id: UUID, version: int, body: bytes) -> CachedConfig:
+        entry = CachedConfig(version, make_etag(config_id, version), body)
+        with self._lock:
+            self._entries[config_id] = entry
+            self._entries.move_to_end(config_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, config_id: UUID) -> None:
+        with self._lock:
+            self._entries.pop(config_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+config_cache = ConfigCache(settings.BUILDING_CONFIG_CACHE_SIZE)
@@ -1,12 +1,18 @@
 import io
-import pandas as pd
+import time
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.models import AppealHistory, Appeal
 from app.models.models import Appeal, AppealType, AppealStatus, SeverityLevel
+from app.services import tracing
+from app.services.metrics import EXPORT_DURATION
 
 
 async def get_all_history_as_excel(db: AsyncSession) -> io.BytesIO:
+    started = time.perf_counter()
+    # pandas/openpyxl тяжёлые: грузим при первой выгрузке, а не при старте сервиса
+    import pandas as pd
+
     stmt = (
         select(
             AppealHistory.id.label("history_id"),
@@ -66,16 +72,20 @@ async def get_all_history_as_excel(db: AsyncSession) -> io.BytesIO:
             "metadata": row.payload,
         })
 
-    df = pd.DataFrame(data)
-
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="AppealHistory")
+    with tracing.span("export.render", f"{len(data)} rows"):
+        df = pd.DataFrame(data)
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+            df.to_excel(writer, index=False, sheet_name="AppealHistory")
     buffer.seek(0)
+    EXPORT_DURATION.observe(time.perf_counter() - started, ("history",))
     return buffer
 
 
 async def get_all_appeals_as_excel(db: AsyncSession) -> io.BytesIO:
+    started = time.perf_counter()
+    import pandas as pd
+
     stmt = (
         select(
             Appeal.id.label("appeal_id"),
@@ -175,10 +185,11 @@ async def get_all_appeals_as_excel(db: AsyncSession) -> io.BytesIO:
             "payload": payload_str,
             "is_deleted": is_deleted_bool,
         })
-    df = pd.DataFrame(data)
-
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Appeals")
+    with tracing.span("export.render", f"{len(data)} rows"):
+        df = pd.DataFrame(data)
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+            df.to_excel(writer, index=False, sheet_name="Appeals")
     buffer.seek(0)
+    EXPORT_DURATION.observe(time.perf_counter() - started, ("appeals",))
     return buffer
@@ -0,0 +1,212 @@
+import asyncio
+import datetime
+import gzip
+import logging
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT = "appeal_history"
+DEFAULT_PARTITION = f"{PARENT}_default"
+RETENTION_LOCK_TIMEOUT = "5s"
+_NAME_RE = re.compile(rf"^{PARENT}_y(\d{{4}})m(\d{{2}})$")
+
+_task: Optional[asyncio.Task] = None
+
+
+def month_start(value: datetime.date) -> datetime.date:
+    return datetime.date(value.year, value.month, 1)
+
+
+def add_months(month: datetime.date, n: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + n
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime.date) -> str:
+    return f"{PARENT}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[datetime.date]:
+    match = _NAME_RE.match(name)
+    return datetime.date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def _today() -> datetime.date:
+    return datetime.datetime.now(datetime.timezone.utc).date()
+
+
+async def list_partitions(conn: AsyncConnection) -> list[str]:
+    result = await conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:parent AS regclass) ORDER BY c.relname"
+    ), {"parent": PARENT})
+    return result.scalars().all()
+
+
+def _bound(month: datetime.date) -> str:
+    # явный UTC: границы не должны зависеть от TimeZone сессии, создавшей партицию
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+def partition_bounds(month: datetime.date) -> str:
+    return f"FOR VALUES FROM ({_bound(month)}) TO ({_bound(add_months(month, 1))})"
+
+
+async def _default_months(conn: AsyncConnection) -> set[datetime.date]:
+    result = await conn.execute(text(
+        f"SELECT DISTINCT date_trunc('month', event_time AT TIME ZONE 'UTC') FROM \"{DEFAULT_PARTITION}\""
+    ))
+    return {month_start(value.date()) for value in result.scalars()}
+
+
+async def _create_partition(conn: AsyncConnection, month: datetime.date, from_default: bool) -> None:
+    name = partition_name(month)
+    create = text(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT} {partition_bounds(month)}')
+    if not from_default:
+        await conn.execute(create)
+        return
+    # месяц уже лежит в DEFAULT: с такими строками Postgres партицию не создаст.
+    # Отцепляем DEFAULT, создаём месяц, переносим строки и цепляем DEFAULT обратно — всё в одной транзакции
+    cond = f"event_time >= {_bound(month)} AND event_time < {_bound(add_months(month, 1))}"
+    await conn.execute(text(f'ALTER TABLE {PARENT} DETACH PARTITION "{DEFAULT_PARTITION}"'))
+    await conn.execute(create)
+    await conn.execute(text(f'INSERT INTO {PARENT} SELECT * FROM "{DEFAULT_PARTITION}" WHERE {cond}'))
+    await conn.execute(text(f'DELETE FROM "{DEFAULT_PARTITION}" WHERE {cond}'))
+    await conn.execute(text(f'ALTER TABLE {PARENT} ATTACH PARTITION "{DEFAULT_PARTITION}" DEFAULT'))
+
+
+async def ensure_partitions(
+        conn: AsyncConnection,
+        ahead: Optional[int] = None,
+        today: Optional[datetime.date] = None,
+) -> list[str]:
+    ahead = settings.HISTORY_PARTITIONS_AHEAD if ahead is None else ahead
+    current = month_start(today or _today())
+    existing = set(await list_partitions(conn))
+    has_default = DEFAULT_PARTITION in existing
+    # строки в DEFAULT (планировщик опоздал) выносим в их месяцы: иначе месяц не создать, а retention их не видит
+    spilled = await _default_months(conn) if has_default else set()
+    months = {add_months(current, offset) for offset in range(ahead + 1)} | spilled
+    created = []
+    for month in sorted(months):
+        name = partition_name(month)
+        if name in existing:
+            continue
+        await _create_partition(conn, month, month in spilled)
+        created.append(name)
+    # DEFAULT — страховка на случай, если месяц не создан заранее; создаётся после месяцев
+    if not has_default:
+        await conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{DEFAULT_PARTITION}" PARTITION OF {PARENT} DEFAULT'))
+        created.append(DEFAULT_PARTITION)
+    return created
+
+
+async def archive_partition(conn: AsyncConnection, name: str, archive_dir: Optional[str] = None) -> Path:
+    directory = Path(archive_dir or settings.HISTORY_ARCHIVE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"{name}.csv.gz"
+    tmp = target.with_suffix(".gz.tmp")
+    raw = await conn.get_raw_connection()
+    # сжатие и запись на диск — в потоке, чтобы выгрузка большой партиции не блокировала цикл событий
+    f = await asyncio.to_thread(gzip.open, tmp, "wb")
+    try:
+        async def write(chunk: bytes) -> None:
+            await asyncio.to_thread(f.write, chunk)
+
+        await raw.driver_connection.copy_from_table(name, output=write, format="csv", header=True)
+    finally:
+        await asyncio.to_thread(f.close)
+    await asyncio.to_thread(os.replace, tmp, target)
+    return target
+
+
+async def apply_retention(
+        retention_months: Optional[int] = None,
+        archive_dir: Optional[str] = None,
+        today: Optional[datetime.date] = None,
+) -> list[str]:
+    from app.database import async_engine
+
+    retention = settings.HISTORY_RETENTION_MONTHS if retention_months is None else retention_months
+    cutoff = add_months(month_start(today or _today()), -retention)
+    async with async_engine.connect() as conn:
+        expired = [n for n in await list_partitions(conn) if (m := partition_month(n)) and m < cutoff]
+
+    archived = []
+    for name in expired:
+        # выгрузка — из ещё подключённой партиции в отдельной читающей транзакции: DETACH берёт
+        # ACCESS EXCLUSIVE на appeal_history, и держать его на время COPY значит остановить запись обращений.
+        # Новых строк в партиции за пределами хранения не бывает, поэтому архив остаётся полным
+        async with async_engine.connect() as conn:
+            path = await archive_partition(conn, name, archive_dir)
+        # DETACH ... CONCURRENTLY недоступен при DEFAULT-партиции, поэтому короткая транзакция
+        # с lock_timeout: не дождались блокировки — партиция отключится при следующем запуске
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(text(f"SET LOCAL lock_timeout = '{RETENTION_LOCK_TIMEOUT}'"))
+                await conn.execute(text(f'ALTER TABLE {PARENT} DETACH PARTITION "{name}"'))
+                await conn.execute(text(f'DROP TABLE "{name}"'))
+        except DBAPIError as e:
+            logger.warning("appeal_history partition %s archived but not detached, retrying next run: %s", name, e)
+            continue
+        logger.info("appeal_history partition %s archived to %s", name, path)
+        archived.append(name)
+    return archived
+
+
+async def _maintenance_loop() -> None:
+    from app.database import async_engine
+
+    while True:
+        try:
+            async with async_engine.begin() as conn:
+                created = await ensure_partitions(conn)
+            if created:
+                logger.info("appeal_history partitions created: %s", ", ".join(created))
+        except Exception:
+            # несколько воркеров могут создавать одну партицию одновременно — повторим на следующем круге
+            logger.exception("appeal_history partition check failed")
+        await asyncio.sleep(settings.HISTORY_PARTITION_CHECK_INTERVAL)
+
+
+async def start() -> None:
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_maintenance_loop())
+
+
+async def stop() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
+
+
+async def _main(command: str) -> None:
+    from app.database import async_engine
+
+    if command == "ensure":
+        async with async_engine.begin() as conn:
+            print(await ensure_partitions(conn))
+    else:
+        print(await apply_retention())
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] not in (["ensure"], ["retention"]):
+        print("usage: python -m app.services.history_partitions ensure|retention")
+        sys.exit(2)
+    asyncio.run(_main(sys.argv[1]))
@@ -0,0 +1,156 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+from fastapi import Response
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import IdempotencyKeyInProgress, IdempotencyKeyReused
+from app.crud import idempotency as crud
+from app.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+REPLAY_HEADER = "Idempotent-Replayed"
+FAILED_AFTER_COMMIT = json.dumps(
+    {"detail": "Запрос выполнен, но ответ не удалось сформировать; повтор с тем же Idempotency-Key не выполнится"},
+    ensure_ascii=False,
+).encode()
+
+
+class StoredResponse(NamedTuple):
+    request_hash: str
+    status_code: int
+    body: bytes
+    expires_at: float
+
+
+def fingerprint(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+class ResponseCache:
+    # завершённые ответы; повтор в тот же воркер обходится без запроса в Postgres
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple[str, str], StoredResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, scope: str, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            entry = self._entries.get((scope, key))
+            if entry is None:
+                return None
+            if entry.expires_at < time.monotonic():
+                del self._entries[(scope, key)]
+                return None
+            self._entries.move_to_end((scope, key))
+            return entry
+
+    def put(self, scope: str, key: str, entry: StoredResponse) -> None:
+        with self._lock:
+            self._entries[(scope, key)] = entry
+            self._entries.move_to_end((scope, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+response_cache = ResponseCache(settings.IDEMPOTENCY_CACHE_SIZE)
+
+
+def _replay(entry: StoredResponse, request_hash: str) -> Response:
+    if entry.request_hash != request_hash:
+        raise IdempotencyKeyReused()
+    return Response(
+        content=entry.body,
+        status_code=entry.status_code,
+        media_type="application/json",
+        headers={REPLAY_HEADER: "true"},
+    )
+
+
+async def run_once(
+        db: AsyncSession,
+        scope: str,
+        key: str,
+        request_body: bytes,
+        handler: Callable[[], Awaitable[Response]],
+) -> Response:
+    request_hash = fingerprint(request_body)
+    cached = response_cache.get(scope, key)
+    if cached is not None:
+        return _replay(cached, request_hash)
+
+    if not await crud.claim_key(db, scope, key, request_hash, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+        row = await crud.get_key(db, scope, key)
+        if row is None or row.status_code is None:
+            if row is not None and row.request_hash != request_hash:
+                raise IdempotencyKeyReused()
+            raise IdempotencyKeyInProgress()
+        entry = StoredResponse(row.request_hash, row.status_code, row.response_body,
+                               time.monotonic() + settings.IDEMPOTENCY_TTL)
+        response_cache.put(scope, key, entry)
+        return _replay(entry, request_hash)
+
+    committed = []
+
+    def on_commit(session) -> None:
+        committed.append(True)
+
+    event.listen(db.sync_session, "after_commit", on_commit)
+    try:
+        response = await handler()
+    except BaseException:
+        await db.rollback()
+        if committed:
+            # запись уже зафиксирована, упало формирование ответа или запрос отменили после commit:
+            # повтор с этим ключом создал бы дубликат, поэтому ключ не освобождаем, а запоминаем ошибку
+            await crud.complete_key(db, scope, key, 500, FAILED_AFTER_COMMIT, settings.IDEMPOTENCY_TTL)
+        else:
+            # до commit ничего не записано: клиент должен иметь возможность повторить запрос
+            await crud.release_key(db, scope, key)
+        raise
+    finally:
+        event.remove(db.sync_session, "after_commit", on_commit)
+    await crud.complete_key(db, scope, key, response.status_code, response.body, settings.IDEMPOTENCY_TTL)
+    response_cache.put(scope, key, StoredResponse(
+        request_hash, response.status_code, response.body, time.monotonic() + settings.IDEMPOTENCY_TTL
+    ))
+    return response
+
+
+_task: Optional[asyncio.Task] = None
+
+
+async def _purge_loop() -> None:
+    from app.database import AsyncSessionLocal
+
+    while True:
+        await asyncio.sleep(settings.IDEMPOTENCY_PURGE_INTERVAL)
+        try:
+            async with AsyncSessionLocal() as db:
+                removed = await crud.purge_expired(db)
+            if removed:
+                logger.info("idempotency keys purged: %s", removed)
+        except Exception:
+            logger.exception("idempotency key purge failed")
+
+
+async def start() -> None:
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_purge_loop())
+
+
+async def stop() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
@@ -0,0 +1,178 @@
+import copy
+from typing import Any
+
+_OPS = {"add", "remove", "replace", "move", "copy", "test"}
+
+
+class JsonPatchError(ValueError):
+    pass
+
+
+class JsonPatchConflict(JsonPatchError):
+    pass
+
+
+def parse_pointer(pointer: str) -> list[str]:
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"invalid JSON pointer: {pointer!r}")
+    return [t.replace("~1", "/").replace("~0", "~") for t in pointer[1:].split("/")]
+
+
+def validate_ops(ops: Any) -> list[dict]:
+    if not isinstance(ops, list):
+        raise JsonPatchError("JSON Patch document must be an array")
+    for op in ops:
+        if not isinstance(op, dict) or op.get("op") not in _OPS or not isinstance(op.get("path"), str):
+            raise JsonPatchError(f"invalid operation: {op!r}")
+        parse_pointer(op["path"])
+        if op["op"] in ("add", "replace", "test") and "value" not in op:
+            raise JsonPatchError(f"'value' is required for {op['op']}")
+        if op["op"] in ("move", "copy"):
+            if not isinstance(op.get("from"), str):
+                raise JsonPatchError(f"'from' is required for {op['op']}")
+            parse_pointer(op["from"])
+    return ops
+
+
+def _array_index(container: list, token: str, allow_end: bool) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise JsonPatchError(f"invalid array index: {token!r}")
+    idx = int(token)
+    if idx > len(container) or (not allow_end and idx == len(container)):
+        raise JsonPatchError(f"array index out of range: {token}")
+    return idx
+
+
+def _resolve_parent(doc: Any, tokens: list[str]) -> Any:
+    node = doc
+    for token in tokens[:-1]:
+        if isinstance(node, dict) and token in node:
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_array_index(node, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"path not found: /{'/'.join(tokens)}")
+    return node
+
+
+def _get(doc: Any, tokens: list[str]) -> Any:
+    if not tokens:
+        return doc
+    parent = _resolve_parent(doc, tokens)
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        if last not in parent:
+            raise JsonPatchError(f"path not found: /{'/'.join(tokens)}")
+        return parent[last]
+    if isinstance(parent, list):
+        return parent[_array_index(parent, last, allow_end=False)]
+    raise JsonPatchError(f"path not found: /{'/'.join(tokens)}")
+
+
+def _add(doc: Any, tokens: list[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve_parent(doc, tokens)
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        parent[last] = value
+    elif isinstance(parent, list):
+        parent.insert(_array_index(parent, last, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"path not found: /{'/'.join(tokens)}")
+    return doc
+
+
+def _remove(doc: Any, tokens: list[str]) -> tuple[Any, Any]:
+    if not tokens:
+        raise JsonPatchError("cannot remove the document root")
+    parent = _resolve_parent(doc, tokens)
+    last = tokens[-1]
+    if isinstance(parent, dict):
+        if last not in parent:
+            raise JsonPatchError(f"path not found: /{'/'.join(tokens)}")
+        return doc, parent.pop(last)
+    if isinstance(parent, list):
+        return doc, parent.pop(_array_index(parent, last, allow_end=False))
+    raise JsonPatchError(f"path not found: /{'/'.join(tokens)}")
+
+
+def _replace(doc: Any, tokens: list[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve_parent(doc, tokens)
+    last = tokens[-1]
+    if isinstance(parent, dict) and last in parent:
+        parent[last] = value
+    elif isinstance(parent, list):
+        parent[_array_index(parent, last, allow_end=False)] = value
+    else:
+        raise JsonPatchError(f"path not found: /{'/'.join(tokens)}")
+    return doc
+
+
+def apply_patch(doc: Any, ops: list[dict]) -> Any:
+    doc = copy.deepcopy(doc)
+    for op in validate_ops(ops):
+        kind, tokens = op["op"], parse_pointer(op["path"])
+        if kind == "add":
+            doc = _add(doc, tokens, copy.deepcopy(op["value"]))
+        elif kind == "remove":
+            doc, _ = _remove(doc, tokens)
+        elif kind == "replace":
+            doc = _replace(doc, tokens, copy.deepcopy(op["value"]))
+        elif kind == "move":
+            src = parse_pointer(op["from"])
+            if tokens[:len(src)] == src and tokens != src:
+                raise JsonPatchError("cannot move a value into one of its children")
+            doc, value = _remove(doc, src)
+            doc = _add(doc, tokens, value)
+        elif kind == "copy":
+            doc = _add(doc, tokens, copy.deepcopy(_get(doc, parse_pointer(op["from"]))))
+        elif kind == "test":
+            if _get(doc, tokens) != op["value"]:
+                raise JsonPatchConflict(f"test failed at {op['path']}")
+    return doc
+
+
+def apply_merge_patch(doc: Any, patch: Any) -> Any:
+    # RFC 7396
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = copy.deepcopy(doc) if isinstance(doc, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = apply_merge_patch(result.get(key), value)
+    return result
+
+
+def _related(a: list[str], b: list[str]) -> bool:
+    return a[:len(b)] == b or b[:len(a)] == a
+
+
+def sql_compatible(ops: list[dict]) -> bool:
+    # jsonb_set / #- умеют только точечные правки существующих объектов;
+    # вставки в массивы, move/copy/test применяем в Python.
+    # Условия существования путей в SQL проверяются по исходному документу, поэтому операции
+    # должны быть независимы: путь, который уже тронула предыдущая операция (или его предок/потомок),
+    # и удаление из массива, сдвигающее соседние индексы, — тоже в Python
+    seen: list[list[str]] = []
+    shifted: list[list[str]] = []
+    for op in ops:
+        tokens = parse_pointer(op["path"])
+        if not tokens or op["op"] not in ("add", "replace", "remove"):
+            return False
+        if op["op"] == "add" and (tokens[-1] == "-" or tokens[-1].isdigit()):
+            return False
+        if any(_related(tokens, t) for t in seen) or any(tokens[:len(p)] == p for p in shifted):
+            return False
+        seen.append(tokens)
+        if op["op"] == "remove" and tokens[-1].isdigit():
+            shifted.append(tokens[:-1])
+    return True
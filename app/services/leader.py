@@ -0,0 +1,40 @@
+import fcntl
+import logging
+import os
+from typing import Optional
+
+from app.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+_fd: Optional[int] = None
+
+
+def acquire() -> bool:
+    # flock снимается ядром при смерти процесса: перезапущенный воркер заберёт роль сам
+    global _fd
+    if _fd is not None:
+        return True
+    fd = os.open(settings.LEADER_LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return False
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    _fd = fd
+    logger.info("worker %s runs background jobs", os.getpid())
+    return True
+
+
+def is_leader() -> bool:
+    return _fd is not None
+
+
+def release() -> None:
+    global _fd
+    if _fd is not None:
+        fcntl.flock(_fd, fcntl.LOCK_UN)
+        os.close(_fd)
+        _fd = None
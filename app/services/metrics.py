@@ -0,0 +1,226 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+from bisect import bisect_left
+from typing import Optional
+
+from app.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), value: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, labels: tuple = ()) -> None:
+        self.values[labels] = value
+
+    def dec(self, labels: tuple = (), value: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) - value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # по меткам: счётчики попаданий в каждый бакет (не накопительные), последний элемент — сумма
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> dict:
+        collect_runtime()
+        return {
+            m.name: {
+                "kind": m.kind,
+                "documentation": m.documentation,
+                "labelnames": list(m.labelnames),
+                "buckets": list(getattr(m, "buckets", ())),
+                "values": [[list(labels), value] for labels, value in m.values.items()],
+            }
+            for m in self.metrics
+        }
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")))
+HTTP_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")))
+HTTP_IN_PROGRESS = registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests being processed"))
+DB_POOL_SIZE = registry.register(Gauge("db_pool_size", "Connections kept in the DB pool"))
+DB_POOL_CHECKED_OUT = registry.register(Gauge("db_pool_checked_out", "DB connections in use"))
+DB_POOL_OVERFLOW = registry.register(Gauge("db_pool_overflow", "DB connections opened above pool_size"))
+WS_CONNECTIONS = registry.register(Gauge("ws_connections", "Open WebSocket connections"))
+WS_BROADCAST_DURATION = registry.register(Histogram(
+    "ws_broadcast_duration_seconds", "Time to fan a message out to all WebSocket clients"))
+WS_MESSAGES_SENT = registry.register(Counter("ws_messages_sent_total", "WebSocket messages delivered"))
+EXPORT_DURATION = registry.register(Histogram(
+    "export_duration_seconds", "Excel export duration", ("kind",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)))
+
+
+def collect_runtime() -> None:
+    # значения, которые дешевле прочитать при выдаче, чем обновлять на каждом событии
+    from app.database import async_engine
+    from app.ws_manager import manager
+
+    pool = async_engine.pool
+    if hasattr(pool, "checkedout"):
+        DB_POOL_SIZE.set(pool.size())
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+    WS_CONNECTIONS.set(len(manager.active_connections))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: Optional[tuple] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _merge(snapshots: list[tuple[dict, bool]]) -> dict:
+    # счётчики и гистограммы суммируются по всем воркерам, gauge — только по живым
+    merged: dict = {}
+    for snapshot, alive in snapshots:
+        for name, metric in snapshot.items():
+            if metric["kind"] == "gauge" and not alive:
+                continue
+            target = merged.setdefault(name, {**metric, "values": {}})
+            for labels, value in metric["values"]:
+                key = tuple(labels)
+                current = target["values"].get(key)
+                if current is None:
+                    target["values"][key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    target["values"][key] = [a + b for a, b in zip(current, value)]
+                else:
+                    target["values"][key] = current + value
+    return merged
+
+
+def _format(merged: dict) -> str:
+    lines = []
+    for name, metric in merged.items():
+        lines.append(f"# HELP {name} {metric['documentation']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        names = metric["labelnames"]
+        for labels, value in metric["values"].items():
+            if metric["kind"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*metric["buckets"], "+Inf"], value[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(names, labels, ('le', bound))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {value[-1]}")
+            lines.append(f"{name}_count{_labels(names, labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(settings.METRICS_DIR, f"{pid}.json")
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def write_snapshot() -> None:
+    path = _snapshot_path(os.getpid())
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp, path)
+
+
+def render() -> str:
+    if not settings.METRICS_DIR:
+        return _format(_merge([(registry.snapshot(), True)]))
+    write_snapshot()
+    snapshots = []
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, "*.json")):
+        try:
+            with open(path) as f:
+                snapshots.append((json.load(f), _alive(int(os.path.basename(path)[:-5]))))
+        except (OSError, ValueError):
+            continue
+    return _format(_merge(snapshots))
+
+
+_task: Optional[asyncio.Task] = None
+
+
+async def _flush_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.METRICS_FLUSH_INTERVAL)
+        try:
+            write_snapshot()
+        except Exception:
+            logger.exception("metrics snapshot failed")
+
+
+async def start() -> None:
+    # при нескольких воркерах каждый сбрасывает свои значения в METRICS_DIR, /metrics их складывает
+    global _task
+    if settings.METRICS_DIR and _task is None:
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        _task = asyncio.create_task(_flush_loop())
+
+
+async def stop() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
+        write_snapshot()
@@ -0,0 +1,46 @@
+import asyncio
+import time
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+
+from app.models.models import Permission, role_permissions
+from app.settings.config import settings
+
+
+class PermissionCache:
+    # role_id → коды прав; проверка доступа не грузит роли и права на каждый запрос
+    def __init__(self):
+        self._roles: dict[int, frozenset[str]] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def load(self) -> None:
+        from app.database import AsyncSessionLocal
+
+        roles: dict[int, set[str]] = {}
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(role_permissions.c.role_id, Permission.code)
+                .join(Permission, Permission.id == role_permissions.c.permission_id)
+            )
+            for role_id, code in result:
+                roles.setdefault(role_id, set()).add(code)
+        self._roles = {role_id: frozenset(codes) for role_id, codes in roles.items()}
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    async def permissions_for(self, role_ids: Iterable[int]) -> set[str]:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > settings.AUTH_CACHE_TTL:
+            async with self._lock:
+                if self._loaded_at is None or time.monotonic() - self._loaded_at > settings.AUTH_CACHE_TTL:
+                    await self.load()
+        codes: set[str] = set()
+        for role_id in role_ids:
+            codes |= self._roles.get(role_id, frozenset())
+        return codes
+
+
+permission_cache = PermissionCache()
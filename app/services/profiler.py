@@ -0,0 +1,53 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# верхние кадры простаивающего цикла событий: такие выборки не несут информации о нагрузке
+_IDLE_FUNCTIONS = {("selectors.py", "select"), ("threading.py", "wait"), ("queue.py", "get")}
+
+_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in _IDLE_FUNCTIONS
+
+
+def sample(seconds: float, interval: float, include_idle: bool = False) -> Counter:
+    # статистический профилировщик: снимки стеков всех потоков раз в interval секунд
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me or (not include_idle and _is_idle(frame)):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, str(thread_id)))
+                stacks[";".join(reversed(labels))] += 1
+            time.sleep(interval)
+        return stacks
+    finally:
+        _lock.release()
+
+
+def collapsed(stacks: Counter) -> str:
+    # формат flamegraph.pl / speedscope: "кадр;кадр;кадр число_выборок"
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
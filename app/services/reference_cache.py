@@ -0,0 +1,52 @@
+import asyncio
+import time
+from typing import Optional
+
+from sqlalchemy import select
+
+from app.models.models import AppealStatus, AppealType, SeverityLevel
+from app.settings.config import settings
+
+_MODELS = {"type": AppealType, "severity": SeverityLevel, "status": AppealStatus}
+
+
+class ReferenceCache:
+    # справочники маленькие и почти не меняются: держим id → name в памяти воркера
+    def __init__(self):
+        self._names: dict[str, dict[int, str]] = {kind: {} for kind in _MODELS}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def load(self) -> None:
+        from app.database import AsyncSessionLocal
+
+        names = {}
+        async with AsyncSessionLocal() as db:
+            for kind, model in _MODELS.items():
+                result = await db.execute(select(model.id, model.name))
+                names[kind] = dict(result.all())
+        self._names = names
+        self._loaded_at = time.monotonic()
+
+    def _stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > settings.REFERENCE_CACHE_TTL
+
+    async def name(self, kind: str, ref_id: Optional[int]) -> Optional[str]:
+        if ref_id is None:
+            return None
+        if self._stale() or ref_id not in self._names[kind]:
+            async with self._lock:
+                # неизвестный id — справочник пополнился: перечитываем, но не чаще одного раза на промах
+                if self._stale() or ref_id not in self._names[kind]:
+                    await self.load()
+        return self._names[kind].get(ref_id)
+
+    async def appeal_names(self, row) -> dict:
+        return {
+            "type_name": await self.name("type", row["type_id"]),
+            "severity_name": await self.name("severity", row["severity_id"]),
+            "status_name": await self.name("status", row["status_id"]),
+        }
+
+
+reference_cache = ReferenceCache()
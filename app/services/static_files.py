@@ -0,0 +1,61 @@
+import hashlib
+import os
+from functools import lru_cache
+from typing import Optional
+
+import anyio
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_HEX = frozenset("0123456789abcdef")
+
+
+class ImmutableFileResponse(FileResponse):
+    # Range и HEAD обрабатывает сам FileResponse; крупные блоки — меньше итераций на большой файл
+    chunk_size = 256 * 1024
+
+
+def _hash_from_name(path: str) -> Optional[str]:
+    # контентно-адресуемые файлы: <sha256><ext> и <sha256>_<variant>.<fmt>
+    stem = os.path.splitext(os.path.basename(path))[0]
+    sha256, _, variant = stem.partition("_")
+    if len(sha256) == 64 and set(sha256) <= _HEX:
+        return f"{sha256}-{variant}" if variant else sha256
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _hash_file(path: str, mtime_ns: int, size: int) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+async def content_etag(path: str, st: os.stat_result) -> str:
+    digest = _hash_from_name(path)
+    if digest is None:
+        digest = await anyio.to_thread.run_sync(_hash_file, path, st.st_mtime_ns, st.st_size)
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # для If-None-Match действует слабое сравнение
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in candidates
+
+
+async def serve_immutable(request: Request, path: str, media_type: Optional[str] = None) -> Response:
+    st = await anyio.to_thread.run_sync(os.stat, path)
+    etag = await content_etag(path, st)
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return ImmutableFileResponse(path, headers=headers, media_type=media_type, stat_result=st)
@@ -0,0 +1,126 @@
+import asyncio
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.services.blob_store import blob_path
+from app.settings.config import settings
+
+_PIL_FORMATS = {"webp": "WEBP", "jpeg": "JPEG", "png": "PNG", "avif": "AVIF"}
+_SAVE_OPTIONS = {
+    "webp": {"quality": 80, "method": 4},
+    "jpeg": {"quality": 82, "optimize": True, "progressive": True},
+    "png": {"optimize": True},
+    "avif": {"quality": 60},
+}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_in_flight: dict[str, asyncio.Future] = {}
+_background: set[asyncio.Task] = set()
+
+
+def derivative_name(sha256: str, variant: str, fmt: str) -> str:
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}_{variant}.{fmt}"
+
+
+def derivative_path(sha256: str, variant: str, fmt: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, *derivative_name(sha256, variant, fmt).split("/"))
+
+
+def derivative_urls(sha256: Optional[str]) -> dict[str, dict[str, str]]:
+    if not sha256:
+        return {}
+    return {
+        variant: {fmt: f"/images/derivatives/{sha256}/{variant}.{fmt}" for fmt in settings.THUMBNAIL_FORMATS}
+        for variant in settings.THUMBNAIL_SIZES
+    }
+
+
+def _render(src: str, targets: dict[str, tuple[int, dict[str, str]]]) -> int:
+    # выполняется в дочернем процессе пула, поэтому получает готовые пути
+    from PIL import Image as PILImage, ImageOps
+
+    written = 0
+    with PILImage.open(src) as im:
+        im.seek(0)
+        im = ImageOps.exif_transpose(im)
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "transparency" in im.info or im.mode in ("LA", "PA") else "RGB")
+        for size, outputs in targets.values():
+            frame = im.copy()
+            frame.thumbnail((size, size), PILImage.LANCZOS)
+            for fmt, dst in outputs.items():
+                if os.path.exists(dst):
+                    continue
+                out = frame.convert("RGB") if fmt == "jpeg" and frame.mode != "RGB" else frame
+                # загрузка и запрос по требованию могут рендерить одну производную одновременно
+                tmp = f"{dst}.{uuid.uuid4().hex}.tmp"
+                try:
+                    out.save(tmp, _PIL_FORMATS[fmt], **_SAVE_OPTIONS.get(fmt, {}))
+                    os.replace(tmp, dst)
+                except BaseException:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+                    raise
+                written += 1
+    return written
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS)
+    return _pool
+
+
+def has_derivatives(sha256: str) -> bool:
+    return all(
+        os.path.exists(derivative_path(sha256, variant, fmt))
+        for variant in settings.THUMBNAIL_SIZES
+        for fmt in settings.THUMBNAIL_FORMATS
+    )
+
+
+async def ensure_derivatives(sha256: str, ext: str) -> None:
+    if has_derivatives(sha256):
+        return
+    fut = _in_flight.get(sha256)
+    if fut is None:
+        loop = asyncio.get_running_loop()
+        fut = loop.run_in_executor(
+            _get_pool(),
+            _render,
+            blob_path(sha256, ext),
+            {
+                variant: (size, {fmt: derivative_path(sha256, variant, fmt) for fmt in settings.THUMBNAIL_FORMATS})
+                for variant, size in settings.THUMBNAIL_SIZES.items()
+            },
+        )
+        _in_flight[sha256] = fut
+        fut.add_done_callback(lambda _: _in_flight.pop(sha256, None))
+    await asyncio.shield(fut)
+
+
+def schedule_derivatives(sha256: str, ext: str) -> None:
+    task = asyncio.create_task(ensure_derivatives(sha256, ext))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+    # ошибка генерации не должна ронять загрузку — превью догенерируется лениво
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+
+async def drain(timeout: float) -> None:
+    # даём уже запущенным превью доделаться, остальное отменяет shutdown
+    if _background:
+        await asyncio.wait(list(_background), timeout=timeout)
+    shutdown()
+
+
+def shutdown() -> None:
+    global _pool
+    for task in list(_background):
+        task.cancel()
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
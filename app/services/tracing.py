@@ -0,0 +1,171 @@
+import logging
+import random
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from typing import Optional
+
+from app.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = "x-trace"
+TRACE_ID_HEADER = "X-Trace-Id"
+
+
+class Trace:
+    def __init__(self, method: str, path: str, reason: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status: Optional[int] = None
+        self.spans: list[tuple[str, float, float, Optional[str]]] = []
+
+    def add(self, name: str, started: float, finished: float, detail: Optional[str] = None) -> None:
+        self.spans.append((name, (started - self.started) * 1000, (finished - started) * 1000, detail))
+
+    def finish(self, status: int) -> None:
+        self.status = status
+        self.duration_ms = (time.perf_counter() - self.started) * 1000
+
+    def totals(self) -> dict[str, tuple[float, int]]:
+        totals: dict[str, tuple[float, int]] = {}
+        for name, _, duration, _ in self.spans:
+            total, count = totals.get(name, (0.0, 0))
+            totals[name] = (total + duration, count + 1)
+        return totals
+
+    def server_timing(self) -> str:
+        parts = [f'{name};dur={total:.2f};desc="{count}"' for name, (total, count) in self.totals().items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(parts)
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "reason": self.reason,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 2) if self.duration_ms is not None else None,
+            "totals": {name: {"ms": round(total, 2), "count": count} for name, (total, count) in self.totals().items()},
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            **self.summary(),
+            "spans": [
+                {"name": name, "offset_ms": round(offset, 3), "duration_ms": round(duration, 3), "detail": detail}
+                for name, offset, duration, detail in self.spans
+            ],
+        }
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+recent: deque = deque(maxlen=settings.TRACE_BUFFER_SIZE)
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("trace", "name", "detail", "started")
+
+    def __init__(self, trace: Trace, name: str, detail: Optional[str]):
+        self.trace = trace
+        self.name = name
+        self.detail = detail
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, self.started, time.perf_counter(), self.detail)
+        return False
+
+
+def span(name: str, detail: Optional[str] = None):
+    # вне трассируемого запроса — общий пустой контекст-менеджер без аллокаций
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return _Span(trace, name, detail)
+
+
+def should_trace(headers: list) -> Optional[str]:
+    for key, _ in headers:
+        if key == b"x-trace":
+            return "header"
+    if settings.TRACE_SAMPLE_RATE and random.random() < settings.TRACE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+def begin(method: str, path: str, reason: str) -> tuple[Trace, object]:
+    trace = Trace(method, path, reason)
+    return trace, _current.set(trace)
+
+
+def end(trace: Trace, token, status: int) -> None:
+    _current.reset(token)
+    trace.finish(status)
+    recent.append(trace)
+    if trace.duration_ms >= settings.TRACE_SLOW_MS:
+        logger.warning("slow request %s %s %.1f ms trace=%s %s", trace.method, trace.path,
+                       trace.duration_ms, trace.id, trace.server_timing())
+
+
+def get(trace_id: str) -> Optional[Trace]:
+    for trace in recent:
+        if trace.id == trace_id:
+            return trace
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._trace_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _current.get()
+    started = getattr(context, "_trace_started", None)
+    if trace is not None and started is not None:
+        trace.add("db", started, time.perf_counter(), statement[:300])
+
+
+def install() -> None:
+    # вызывается только при TRACING_ENABLED: без него нет ни слушателей, ни обёрток
+    import fastapi.routing
+    from sqlalchemy import event
+
+    from app.database import async_engine
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(async_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+    serialize_response = fastapi.routing.serialize_response
+    if getattr(serialize_response, "_traced", False):
+        return
+
+    async def traced_serialize_response(*args, **kwargs):
+        with span("serialize"):
+            return await serialize_response(*args, **kwargs)
+
+    traced_serialize_response._traced = True
+    fastapi.routing.serialize_response = traced_serialize_response
@@ -1,17 +1,118 @@
-from pydantic import Field
+from typing import Optional
+from urllib.parse import quote
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
+    # без значений по умолчанию: сервис не должен молча подключаться к чужой базе со стандартным паролем.
+    # Локальные значения для бенчмарков и тестов подставляют bench/__init__.py и tests/conftest.py
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     POSTGRES_HOST: str
     POSTGRES_PORT: int
 
-    DATABASE_URL: str = Field(..., env="DATABASE_URL")
-    KAFKA_BOOTSTRAP_SERVERS: str = Field(..., env="KAFKA_BOOTSTRAP_SERVERS")
-    KAFKA_APPEAL_TOPIC: str = Field(..., env="KAFKA_APPEAL_TOPIC")
+    # не задан — собирается из POSTGRES_*
+    DATABASE_URL: Optional[str] = None
+    # Kafka необязательна: без KAFKA_BOOTSTRAP_SERVERS сервис работает без неё
+    KAFKA_BOOTSTRAP_SERVERS: Optional[str] = None
+    KAFKA_APPEAL_TOPIC: str = "appeals"
+
+    # пул у каждого воркера свой: всего до SERVER_WORKERS * (DB_POOL_SIZE + DB_MAX_OVERFLOW) соединений
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    # логирование каждого SQL-запроса, только для отладки
+    DB_ECHO: bool = False
+    # сколько соединений открыть при старте, чтобы первый запрос не платил за handshake
+    DB_POOL_WARM: int = 5
+    STARTUP_WARM_TIMEOUT: float = 10.0
+    SHUTDOWN_DRAIN_TIMEOUT: float = 10.0
+
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    # 0 — по числу доступных процессору ядер с учётом квоты cgroup
+    SERVER_WORKERS: int = 0
+    SERVER_BACKLOG: int = 2048
+    # больше idle timeout балансировщика, иначе он получает RST на переиспользованном соединении
+    SERVER_KEEPALIVE_TIMEOUT: int = 75
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    SERVER_ACCESS_LOG: bool = False
+    WS_PING_INTERVAL: float = 20.0
+    WS_PING_TIMEOUT: float = 20.0
+    # воркер, захвативший эту блокировку, один выполняет фоновые задачи (проверки камер, партиции, очистку)
+    LEADER_LOCK_PATH: str = "/tmp/appeals-leader.lock"
+
+    UPLOAD_DIR: str = "uploads"
+    BLOB_GC_GRACE_SECONDS: int = 3600
+
+    THUMBNAIL_SIZES: dict[str, int] = {"thumb": 160, "preview": 640, "web": 1280}
+    THUMBNAIL_FORMATS: list[str] = ["webp", "jpeg"]
+    THUMBNAIL_WORKERS: int = 2
+
+    BUILDING_CONFIG_CACHE_SIZE: int = 256
+
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_ENCODINGS: list[str] = ["zstd", "br", "gzip"]
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+    WS_PER_MESSAGE_DEFLATE: bool = True
+
+    FAST_JSON_RESPONSES: bool = False
+
+    METRICS_ENABLED: bool = True
+    # общий каталог для снимков метрик воркеров; app.server задаёт его сам при нескольких воркерах
+    METRICS_DIR: Optional[str] = None
+    METRICS_FLUSH_INTERVAL: float = 5.0
+
+    # трассировка по заголовку X-Trace или случайной выборке; выключена — нет ни middleware, ни слушателей
+    TRACING_ENABLED: bool = False
+    TRACE_SAMPLE_RATE: float = 0.0
+    TRACE_SLOW_MS: float = 1000.0
+    TRACE_BUFFER_SIZE: int = 200
+    PROFILER_MAX_SECONDS: float = 60.0
+
+    CAMERA_HEALTH_ENABLED: bool = True
+    CAMERA_HEALTH_INTERVAL: float = 30.0
+    CAMERA_HEALTH_TIMEOUT: float = 5.0
+    CAMERA_HEALTH_CONCURRENCY: int = 200
+    CAMERA_HEALTH_MAX_BACKOFF: float = 600.0
+    CAMERA_HEALTH_REFRESH_INTERVAL: float = 10.0
+    CAMERA_HEALTH_FLUSH_INTERVAL: float = 5.0
+    CAMERA_HEALTH_SHARD_COUNT: int = 1
+    CAMERA_HEALTH_SHARD_INDEX: int = 0
+
+    CAMERA_DIRECTORY_RELOAD_INTERVAL: float = 60.0
+    CAMERA_BULK_BATCH_SIZE: int = 500
+
+    REFERENCE_CACHE_TTL: float = 300.0
+    # кэш прав у каждого воркера свой, invalidate() сбрасывает только текущий:
+    # остальные воркеры увидят изменение ролей не позже чем через AUTH_CACHE_TTL
+    AUTH_CACHE_TTL: float = 2.0
+
+    IDEMPOTENCY_TTL: int = 24 * 3600
+    IDEMPOTENCY_LOCK_TIMEOUT: int = 60
+    IDEMPOTENCY_CACHE_SIZE: int = 10_000
+    IDEMPOTENCY_PURGE_INTERVAL: float = 3600.0
+
+    # app — diff считает приложение, trigger — пишет триггер appeal_history_capture, off — не пишем
+    HISTORY_MODE: str = "app"
+    HISTORY_PARTITIONS_AHEAD: int = 3
+    HISTORY_RETENTION_MONTHS: int = 24
+    HISTORY_ARCHIVE_DIR: str = "archive/appeal_history"
+    HISTORY_PARTITION_CHECK_INTERVAL: float = 6 * 3600
+
+    @model_validator(mode="after")
+    def _database_url(self) -> "Settings":
+        if not self.DATABASE_URL:
+            self.DATABASE_URL = (
+                f"postgresql+asyncpg://{quote(self.POSTGRES_USER, safe='')}:{quote(self.POSTGRES_PASSWORD, safe='')}"
+                f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+            )
+        return self
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,45 @@
+-- Режим HISTORY_MODE=trigger: историю пишет Postgres, приложение только передаёт автора через app.user_id.
+-- Включать вместе с HISTORY_MODE=trigger, иначе строки истории задвоятся.
+
+CREATE OR REPLACE FUNCTION appeal_history_capture() RETURNS trigger AS $$
+DECLARE
+    actor uuid := NULLIF(current_setting('app.user_id', true), '')::uuid;
+    ts timestamptz := now();
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO appeal_history (id, appeal_id, event_time, event_type, changed_by_id)
+        VALUES (gen_random_uuid(), NEW.id, ts, 'create', actor);
+        RETURN NEW;
+    END IF;
+
+    INSERT INTO appeal_history (id, appeal_id, event_time, event_type, changed_by_id, field_name, old_value, new_value)
+    SELECT gen_random_uuid(), NEW.id, ts,
+           CASE WHEN c.field = 'is_deleted' AND c.new_value = 'true' THEN 'delete' ELSE 'update' END,
+           actor, c.field, c.old_value, c.new_value
+    FROM (VALUES
+        ('status_id', OLD.status_id::text, NEW.status_id::text),
+        ('assigned_to_id', OLD.assigned_to_id::text, NEW.assigned_to_id::text),
+        ('location', OLD.location, NEW.location),
+        ('description', OLD.description, NEW.description),
+        ('latitude', OLD.latitude::text, NEW.latitude::text),
+        ('longitude', OLD.longitude::text, NEW.longitude::text),
+        ('building_id', OLD.building_id::text, NEW.building_id::text),
+        ('floor', OLD.floor::text, NEW.floor::text),
+        ('is_deleted', OLD.is_deleted::text, NEW.is_deleted::text)
+    ) AS c(field, old_value, new_value)
+    WHERE c.old_value IS DISTINCT FROM c.new_value;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS appeals_history_insert ON appeals;
+CREATE TRIGGER appeals_history_insert
+    AFTER INSERT ON appeals
+    FOR EACH ROW EXECUTE FUNCTION appeal_history_capture();
+
+DROP TRIGGER IF EXISTS appeals_history_update ON appeals;
+CREATE TRIGGER appeals_history_update
+    AFTER UPDATE ON appeals
+    FOR EACH ROW
+    WHEN (OLD.* IS DISTINCT FROM NEW.*)
+    EXECUTE FUNCTION appeal_history_capture();
@@ -1,7 +1,12 @@
+import asyncio
+import time
 from typing import List
 from fastapi import WebSocket, WebSocketDisconnect
 import json
 
+from app.services import tracing
+from app.services.metrics import WS_BROADCAST_DURATION, WS_MESSAGES_SENT
+
 
 class ConnectionManager:
     def __init__(self):
@@ -18,12 +23,31 @@ class ConnectionManager:
             pass
 
     async def broadcast(self, message: dict):
-        text_data = json.dumps(message)
-        for connection in list(self.active_connections):
+        started = time.perf_counter()
+        sent = 0
+        with tracing.span("broadcast", f"{len(self.active_connections)} clients"):
+            text_data = json.dumps(message)
+            for connection in list(self.active_connections):
+                try:
+                    await connection.send_text(text_data)
+                    sent += 1
+                except Exception:
+                    self.disconnect(connection)
+        WS_BROADCAST_DURATION.observe(time.perf_counter() - started)
+        WS_MESSAGES_SENT.inc(value=sent)
+
+    async def close_all(self, code: int = 1001, timeout: float = 5.0):
+        # 1001 going away: клиенты переподключатся к другому воркеру
+        connections, self.active_connections = self.active_connections, []
+
+        async def close(connection: WebSocket):
             try:
-                await connection.send_text(text_data)
+                await connection.close(code=code)
             except Exception:
-                self.disconnect(connection)
+                pass
+
+        if connections:
+            await asyncio.wait([asyncio.create_task(close(c)) for c in connections], timeout=timeout)
 
 
 manager = ConnectionManager()
@@ -0,0 +1,20 @@
+"""Benchmarks and the local performance harness.
+
+Settings requires POSTGRES_*. Without a .env the bench modules fall back to
+a local Postgres so that they import. Variables that are already set, and a
+.env file if one exists, take precedence. The harness replaces DATABASE_URL
+with its throwaway database anyway.
+"""
+import os
+
+LOCAL_POSTGRES = {
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "postgres",
+    "POSTGRES_DB": "appeals",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+}
+
+if not os.path.exists(".env"):
+    for key, value in LOCAL_POSTGRES.items():
+        os.environ.setdefault(key, value)
@@ -0,0 +1,56 @@
+"""Helpers shared by the benchmark suite: percentiles and the JSON result file.
+
+Every result file has the same envelope, so bench.compare can diff any two of
+them: {"benchmark", "meta": {commit, timestamp, python, cpu_count}, "params",
+"results"}.
+"""
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def latency_summary(latencies_ms: list[float], elapsed_s: float, errors: int = 0) -> dict:
+    if not latencies_ms:
+        return {"requests": 0, "errors": errors, "rps": 0.0}
+    return {
+        "requests": len(latencies_ms),
+        "errors": errors,
+        "rps": round(len(latencies_ms) / elapsed_s, 1),
+        "mean_ms": round(statistics.fmean(latencies_ms), 3),
+        "p50_ms": round(percentile(latencies_ms, 0.50), 3),
+        "p95_ms": round(percentile(latencies_ms, 0.95), 3),
+        "p99_ms": round(percentile(latencies_ms, 0.99), 3),
+        "max_ms": round(max(latencies_ms), 3),
+    }
+
+
+def _commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def meta() -> dict:
+    return {
+        "commit": os.environ.get("BENCH_COMMIT") or _commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(path: str, benchmark: str, params: dict, results) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"benchmark": benchmark, "meta": meta(), "params": params, "results": results},
+                  f, ensure_ascii=False, indent=2)
@@ -0,0 +1,114 @@
+"""Compare two benchmark result files and flag regressions.
+
+Works on any bench.* JSON output: numeric leaves are paired by their path,
+and list items are matched by their identifying fields (name, endpoint, path,
+op, mode, encoding, level, rows). The metric name decides the direction:
+*_ms, *_s, bytes, errors and round trips must not grow; rps, *_per_s and
+speedup must not shrink. Everything else is only reported.
+
+    python -m bench.compare base/load.json head/load.json --threshold 10 --fail
+    python -m bench.compare base/ head/          # все одноимённые файлы двух каталогов
+"""
+import argparse
+import json
+import os
+import sys
+
+ID_KEYS = ("name", "endpoint", "path", "route", "op", "mode", "encoding", "level", "rows")
+SKIP_KEYS = {"meta", "params"}
+LOWER_IS_BETTER = ("_ms", "_s", "bytes", "errors", "round_trips_per_op", "us_per_row", "us_per_kb")
+HIGHER_IS_BETTER = ("rps", "_per_s", "speedup", "ratio")
+
+
+def _identity(item: dict, index: int) -> str:
+    parts = [str(item[k]) for k in ID_KEYS if k in item]
+    return "/".join(parts) if parts else str(index)
+
+
+def flatten(node, prefix: str = "") -> dict[str, float]:
+    flat: dict[str, float] = {}
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key in SKIP_KEYS and not prefix:
+                continue
+            flat.update(flatten(value, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(node, list):
+        for index, item in enumerate(node):
+            key = _identity(item, index) if isinstance(item, dict) else str(index)
+            flat.update(flatten(item, f"{prefix}[{key}]"))
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        flat[prefix] = float(node)
+    return flat
+
+
+def direction(path: str) -> int:
+    # +1 — рост хуже, -1 — падение хуже, 0 — не оцениваем
+    metric = path.rsplit(".", 1)[-1]
+    if metric.endswith(HIGHER_IS_BETTER):
+        return -1
+    if metric.endswith(LOWER_IS_BETTER):
+        return 1
+    return 0
+
+
+def compare(base: dict, head: dict, threshold: float) -> list[dict]:
+    base_flat, head_flat = flatten(base), flatten(head)
+    rows = []
+    for path in sorted(base_flat.keys() & head_flat.keys()):
+        before, after = base_flat[path], head_flat[path]
+        change = (after - before) / before * 100 if before else (0.0 if after == before else float("inf"))
+        sign = direction(path)
+        rows.append({
+            "metric": path,
+            "base": before,
+            "head": after,
+            "change_pct": round(change, 1),
+            "regression": sign != 0 and change * sign > threshold,
+            "improvement": sign != 0 and change * sign < -threshold,
+        })
+    return rows
+
+
+def _pairs(base: str, head: str) -> list[tuple[str, str, str]]:
+    if os.path.isdir(base):
+        names = sorted(n for n in os.listdir(base) if n.endswith(".json") and os.path.exists(os.path.join(head, n)))
+        return [(n, os.path.join(base, n), os.path.join(head, n)) for n in names]
+    return [(os.path.basename(head), base, head)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="допустимое ухудшение, %%")
+    parser.add_argument("--all", action="store_true", help="печатать и метрики без изменений")
+    parser.add_argument("--fail", action="store_true", help="код выхода 1 при регрессии")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    report, regressions = {}, 0
+    for name, base_path, head_path in _pairs(args.base, args.head):
+        with open(base_path) as f:
+            base = json.load(f)
+        with open(head_path) as f:
+            head = json.load(f)
+        rows = compare(base, head, args.threshold)
+        report[name] = rows
+        print(f"== {name}: {base.get('meta', {}).get('commit')} -> {head.get('meta', {}).get('commit')}")
+        for r in rows:
+            if not (args.all or r["regression"] or r["improvement"]):
+                continue
+            mark = "REGRESSION" if r["regression"] else "improved" if r["improvement"] else ""
+            print(f"  {r['metric']:<60} {r['base']:>12g} -> {r['head']:>12g}  {r['change_pct']:>+7.1f}%  {mark}")
+        regressions += sum(r["regression"] for r in rows)
+
+    print(f"{regressions} regression(s) above {args.threshold}%")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.fail and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
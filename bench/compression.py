@@ -0,0 +1,153 @@
+"""Bytes on the wire and CPU cost of response compression per endpoint.
+
+    python -m bench.compression                      # синтетические ответы
+    python -m bench.compression --url http://localhost:8000 --out compression.json
+"""
+import argparse
+import datetime
+import json
+import random
+import time
+import uuid
+
+from app.middleware.compression import available_encodings
+from bench.common import write_results
+
+LEVELS = {"gzip": [1, 6, 9], "br": [1, 4, 9], "zstd": [1, 3, 9]}
+ENDPOINTS = ["/appeals/?limit=1000", "/auth/users", "/building-configs/"]
+
+
+def _appeals(n: int = 1000) -> list[dict]:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "type_id": random.randint(1, 8),
+            "type_name": random.choice(["Пожар", "Задымление", "Посторонний", "Неисправность"]),
+            "severity_id": random.randint(1, 4),
+            "severity_name": random.choice(["Низкая", "Средняя", "Высокая"]),
+            "status_id": random.randint(1, 5),
+            "status_name": random.choice(["Новое", "В работе", "Закрыто"]),
+            "location": f"Корпус {random.randint(1, 9)}, этаж {random.randint(1, 20)}",
+            "description": "Сработал датчик, требуется проверка оператором" * random.randint(1, 3),
+            "source": random.choice(["camera", "mobile", "operator"]),
+            "reporter_id": random.randint(1, 500),
+            "assigned_to_id": random.randint(1, 500),
+            "payload": {"camera": str(uuid.uuid4()), "score": random.random()},
+            "is_deleted": False,
+            "ticket_number": i,
+            "created_at": (now - datetime.timedelta(minutes=i)).isoformat(),
+            "updated_at": now.isoformat(),
+        }
+        for i in range(n)
+    ]
+
+
+def _users(n: int = 200) -> list[dict]:
+    perms = [{"id": i, "code": f"perm_{i}", "description": f"Право {i}"} for i in range(40)]
+    roles = [
+        {"id": r, "name": f"role_{r}", "description": "Роль", "permissions": random.sample(perms, 20)}
+        for r in range(6)
+    ]
+    return [
+        {
+            "id": i,
+            "username": f"user{i}",
+            "full_name": f"Пользователь {i}",
+            "email": f"user{i}@example.com",
+            "tg_id": None,
+            "phone": "+70000000000",
+            "roles": random.sample(roles, 3),
+        }
+        for i in range(n)
+    ]
+
+
+def _building_config(cameras: int = 1500) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "id_build": 1,
+        "name_build": "Главный корпус",
+        "version": 1,
+        "config": {
+            "floors": [
+                {
+                    "floor": f,
+                    "cameras": [
+                        {"id": str(uuid.uuid4()), "x": random.random() * 1000, "y": random.random() * 1000,
+                         "angle": random.randint(0, 359), "label": f"CAM-{f}-{c}"}
+                        for c in range(cameras // 10)
+                    ],
+                }
+                for f in range(10)
+            ]
+        },
+    }
+
+
+def synthetic_payloads() -> dict[str, bytes]:
+    random.seed(42)
+    return {
+        ENDPOINTS[0]: json.dumps(_appeals(), ensure_ascii=False).encode(),
+        ENDPOINTS[1]: json.dumps(_users(), ensure_ascii=False).encode(),
+        ENDPOINTS[2]: json.dumps([_building_config()], ensure_ascii=False).encode(),
+    }
+
+
+def measure(payload: bytes, encoding: str, level: int, rounds: int) -> dict:
+    encoder = available_encodings()[encoding]
+    started = time.process_time()
+    for _ in range(rounds):
+        comp = encoder(level)
+        out = comp.compress(payload) + comp.finish()
+    cpu = (time.process_time() - started) / rounds
+    return {
+        "encoding": encoding,
+        "level": level,
+        "bytes": len(out),
+        "ratio": round(len(payload) / len(out), 2),
+        "cpu_ms": round(cpu * 1000, 3),
+        "cpu_us_per_kb": round(cpu * 1e6 / (len(payload) / 1024), 2),
+    }
+
+
+def fetch_payloads(base_url: str) -> dict[str, bytes]:
+    import httpx
+
+    payloads = {}
+    with httpx.Client(base_url=base_url, headers={"Accept-Encoding": "identity"}) as client:
+        for path in ENDPOINTS:
+            resp = client.get(path)
+            resp.raise_for_status()
+            payloads[path] = resp.content
+    return payloads
+
+
+def run(payloads: dict[str, bytes], rounds: int) -> list[dict]:
+    results = []
+    for endpoint, payload in payloads.items():
+        for encoding in available_encodings():
+            for level in LEVELS[encoding]:
+                results.append({"endpoint": endpoint, "identity_bytes": len(payload),
+                                **measure(payload, encoding, level, rounds)})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="снять реальные ответы с запущенного сервиса")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--out", help="сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    payloads = fetch_payloads(args.url) if args.url else synthetic_payloads()
+    results = run(payloads, args.rounds)
+    for r in results:
+        print(f"{r['endpoint']:<24} {r['encoding']:<5} L{r['level']:<2} "
+              f"{r['identity_bytes']:>9} -> {r['bytes']:>8} B  x{r['ratio']:<6} {r['cpu_ms']:>8} ms")
+    if args.out:
+        write_results(args.out, "compression", {"url": args.url, "rounds": args.rounds}, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Micro-benchmark of the Excel export functions.
+
+Feeds get_all_appeals_as_excel / get_all_history_as_excel with synthetic rows
+through an in-memory session, so the numbers cover row conversion, DataFrame
+building and openpyxl writing without Postgres. With --db the real session
+from DATABASE_URL is used instead, query time included.
+
+    python -m bench.export --rows 10000,50000 --rounds 3 --out export.json
+"""
+import argparse
+import asyncio
+import datetime
+import random
+import time
+import types
+import uuid
+
+from app.services.excel_export import get_all_appeals_as_excel, get_all_history_as_excel
+from bench.common import write_results
+
+
+class _Result:
+    def __init__(self, rows: list):
+        self._rows = rows
+
+    def fetchall(self) -> list:
+        return self._rows
+
+
+class RowsSession:
+    # достаточно для excel_export: один execute, fetchall
+    def __init__(self, rows: list):
+        self._rows = rows
+
+    async def execute(self, stmt):
+        return _Result(self._rows)
+
+
+def appeal_rows(n: int) -> list:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        types.SimpleNamespace(
+            appeal_id=uuid.uuid4(), created_at=now - datetime.timedelta(minutes=i), updated_at=now,
+            type_id=random.randint(1, 8), type_name="Пожар", severity_id=random.randint(1, 4),
+            severity_name="Высокая", status_id=random.randint(1, 5), status_name="В работе",
+            location=f"Корпус {random.randint(1, 9)}, этаж {random.randint(1, 20)}",
+            description="Сработал датчик, требуется проверка оператором", source="camera",
+            reporter_id=random.randint(1, 500), assigned_to_id=random.randint(1, 500),
+            payload={"camera": str(uuid.uuid4()), "score": random.random()}, is_deleted=False,
+        )
+        for i in range(n)
+    ]
+
+
+def history_rows(n: int) -> list:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        types.SimpleNamespace(
+            history_id=uuid.uuid4(), appeal_id=uuid.uuid4(), event_time=now - datetime.timedelta(minutes=i),
+            event_type="update", changed_by_id=None, field_name="status_id", old_value="1", new_value="2",
+            comment=None, payload=None, type_id=1, type_name="Пожар",
+        )
+        for i in range(n)
+    ]
+
+
+async def timed(fn, db, rounds: int) -> tuple[float, int]:
+    best, size = float("inf"), 0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        buffer = await fn(db)
+        best = min(best, time.perf_counter() - started)
+        size = len(buffer.getbuffer())
+    return best, size
+
+
+async def run(sizes: list[int], rounds: int, use_db: bool) -> list[dict]:
+    results = []
+    cases = [("appeals", get_all_appeals_as_excel, appeal_rows), ("history", get_all_history_as_excel, history_rows)]
+    if use_db:
+        from app.database import AsyncSessionLocal, async_engine
+
+        async_engine.echo = False
+        async with AsyncSessionLocal() as db:
+            for name, fn, _ in cases:
+                best, size = await timed(fn, db, rounds)
+                results.append({"name": f"{name} (db)", "rows": None, "best_ms": round(best * 1000, 1),
+                                "bytes": size})
+        await async_engine.dispose()
+        return results
+    # первая выгрузка импортирует pandas/openpyxl — в замеры это не входит
+    await get_all_history_as_excel(RowsSession(history_rows(10)))
+    for rows in sizes:
+        for name, fn, make_rows in cases:
+            best, size = await timed(fn, RowsSession(make_rows(rows)), rounds)
+            results.append({
+                "name": f"{name} x{rows}",
+                "rows": rows,
+                "best_ms": round(best * 1000, 1),
+                "us_per_row": round(best * 1e6 / rows, 2),
+                "bytes": size,
+            })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="10000", help="размеры выгрузки через запятую")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--db", action="store_true", help="выгружать из базы DATABASE_URL")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    random.seed(42)
+    results = asyncio.run(run([int(n) for n in args.rows.split(",")], args.rounds, args.db))
+    for r in results:
+        print(f"{r['name']:<20} {r['best_ms']:>9} ms  {r['bytes']:>10} bytes")
+    if args.out:
+        write_results(args.out, "export", {"rows": args.rows, "rounds": args.rounds, "db": args.db}, results)
+
+
+if __name__ == "__main__":
+    main()
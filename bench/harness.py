@@ -0,0 +1,629 @@
+"""Local harness for performance checks: throwaway Postgres, fake Kafka, WebSocket swarm.
+
+Starts a disposable Postgres, either from local initdb/pg_ctl binaries or as
+a temporary database on HARNESS_POSTGRES_URL. It creates the schema with the
+alembic migrations (upgrade head), fills the reference tables and serves
+app.main with uvicorn in a background thread. On top of that it offers:
+
+- QueryCounter: SQL statements per request, counted on the engine.
+- budgets: query count and p95 latency limits per endpoint, checked with
+  check_budgets().
+- FakeKafka: an in-memory broker with the aiokafka producer/consumer API.
+  install() substitutes it for aiokafka.
+- WSSwarm: N clients on /ws/appeals. Measures the time from a write to its
+  delivery to every subscriber.
+
+The harness must set DATABASE_URL before app.database is imported, so create
+Harness before importing the application. With pytest it also works as a
+plugin that provides the harness, api, ws_swarm and query_counter fixtures:
+pytest -p bench.harness.
+
+    python -m bench.harness --requests 50 --ws-clients 20 --out harness.json
+    HARNESS_POSTGRES_URL=postgresql://postgres@localhost/postgres python -m bench.harness
+"""
+import argparse
+import asyncio
+import collections
+import glob
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, NamedTuple, Optional
+
+import httpx
+
+from bench.common import latency_summary, write_results
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _run(coro):
+    # синхронная обёртка: работает и когда вызывающий код уже внутри цикла событий (pytest-asyncio)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    result: dict = {}
+    thread = threading.Thread(target=lambda: result.update(value=asyncio.run(coro)))
+    thread.start()
+    thread.join()
+    return result.get("value")
+
+
+# --- Postgres ---------------------------------------------------------------
+
+def _pg_bindir() -> str:
+    found = shutil.which("pg_ctl")
+    if found:
+        return os.path.dirname(found)
+    try:
+        out = subprocess.run(["pg_config", "--bindir"], capture_output=True, text=True, check=True).stdout.strip()
+        if os.path.exists(os.path.join(out, "pg_ctl")):
+            return out
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    candidates = sorted(glob.glob("/usr/lib/postgresql/*/bin/pg_ctl"))
+    if candidates:
+        return os.path.dirname(candidates[-1])
+    raise RuntimeError("pg_ctl not found: install PostgreSQL server binaries or set HARNESS_POSTGRES_URL")
+
+
+class EphemeralPostgres:
+    def __init__(self, admin_url: Optional[str] = None):
+        # admin_url — существующий сервер: создаём на нём временную базу вместо своего кластера
+        self.admin_url = admin_url or os.environ.get("HARNESS_POSTGRES_URL")
+        self.database = f"harness_{uuid.uuid4().hex[:8]}"
+        self._tmp: Optional[str] = None
+        self._bindir: Optional[str] = None
+        self.url: Optional[str] = None
+
+    async def _create_database(self, dsn: str) -> None:
+        import asyncpg
+
+        conn = await asyncpg.connect(dsn)
+        try:
+            await conn.execute(f'CREATE DATABASE "{self.database}"')
+        finally:
+            await conn.close()
+
+    async def _drop_database(self, dsn: str) -> None:
+        import asyncpg
+
+        conn = await asyncpg.connect(dsn)
+        try:
+            await conn.execute(f'DROP DATABASE IF EXISTS "{self.database}" WITH (FORCE)')
+        finally:
+            await conn.close()
+
+    def start(self) -> str:
+        from sqlalchemy.engine import make_url
+
+        if self.admin_url:
+            admin = make_url(self.admin_url).set(drivername="postgresql")
+        else:
+            self._bindir = _pg_bindir()
+            self._tmp = tempfile.mkdtemp(prefix="appeals-pg-")
+            data = os.path.join(self._tmp, "data")
+            port = free_port()
+            subprocess.run([os.path.join(self._bindir, "initdb"), "-D", data, "-U", "postgres", "-A", "trust",
+                            "-E", "UTF8", "--no-sync"], check=True, stdout=subprocess.DEVNULL)
+            # надёжность не нужна: база живёт один прогон
+            options = (f"-p {port} -k {self._tmp} -c listen_addresses=127.0.0.1 -c fsync=off "
+                       "-c synchronous_commit=off -c full_page_writes=off -c max_connections=200")
+            subprocess.run([os.path.join(self._bindir, "pg_ctl"), "-D", data, "-o", options, "-w",
+                            "-l", os.path.join(self._tmp, "postgres.log"), "start"],
+                           check=True, stdout=subprocess.DEVNULL)
+            admin = make_url(f"postgresql://postgres@127.0.0.1:{port}/postgres")
+        self._admin_dsn = admin.render_as_string(hide_password=False)
+        _run(self._create_database(self._admin_dsn))
+        self.url = admin.set(drivername="postgresql+asyncpg", database=self.database).render_as_string(
+            hide_password=False)
+        return self.url
+
+    def stop(self) -> None:
+        if self._tmp is None:
+            if self.url is not None:
+                _run(self._drop_database(self._admin_dsn))
+            return
+        subprocess.run([os.path.join(self._bindir, "pg_ctl"), "-D", os.path.join(self._tmp, "data"),
+                        "-m", "immediate", "stop"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        shutil.rmtree(self._tmp, ignore_errors=True)
+        self._tmp = None
+
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+REFERENCE_DATA = {
+    "appeal_types": [
+        {"code": "fire", "name": "Пожар", "sort_order": 1},
+        {"code": "smoke", "name": "Задымление", "sort_order": 2},
+        {"code": "intrusion", "name": "Посторонний", "sort_order": 3},
+        {"code": "fault", "name": "Неисправность", "sort_order": 4},
+    ],
+    "severity_levels": [
+        {"code": "low", "name": "Низкая", "priority": 1},
+        {"code": "medium", "name": "Средняя", "priority": 2},
+        {"code": "high", "name": "Высокая", "priority": 3},
+    ],
+    "appeal_statuses": [
+        {"code": "new", "name": "Новое", "sort_order": 1},
+        {"code": "in_progress", "name": "В работе", "sort_order": 2},
+        {"code": "closed", "name": "Закрыто", "sort_order": 3},
+    ],
+}
+
+
+async def apply_schema(url: str) -> None:
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app.models.models import Base
+
+    # схема — теми же миграциями, что и в проде: индексы и партиции совпадают с боевыми.
+    # env.py сам запускает asyncio.run, поэтому alembic — в отдельном потоке без цикла событий
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    await asyncio.to_thread(command.upgrade, config, "head")
+
+    engine = create_async_engine(url, poolclass=NullPool)
+    try:
+        async with engine.begin() as conn:
+            for table, rows in REFERENCE_DATA.items():
+                await conn.execute(Base.metadata.tables[table].insert(), rows)
+    finally:
+        await engine.dispose()
+
+
+# --- счётчик запросов -------------------------------------------------------
+
+class QueryCounter:
+    def __init__(self):
+        self.statements: list[str] = []
+        self._engine = None
+
+    def attach(self, engine) -> "QueryCounter":
+        from sqlalchemy import event
+
+        self._engine = engine.sync_engine
+        event.listen(self._engine, "before_cursor_execute", self._record)
+        return self
+
+    def detach(self) -> None:
+        from sqlalchemy import event
+
+        if self._engine is not None:
+            event.remove(self._engine, "before_cursor_execute", self._record)
+            self._engine = None
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    @contextmanager
+    def capture(self):
+        start = len(self.statements)
+        captured: list[str] = []
+        try:
+            yield captured
+        finally:
+            captured.extend(self.statements[start:])
+
+    @contextmanager
+    def assert_max(self, limit: int):
+        with self.capture() as captured:
+            yield captured
+        if len(captured) > limit:
+            listing = "\n".join(f"  {s[:200]}" for s in captured)
+            raise AssertionError(f"{len(captured)} queries, budget {limit}:\n{listing}")
+
+
+# --- Kafka в памяти ---------------------------------------------------------
+
+class FakeRecord(NamedTuple):
+    topic: str
+    partition: int
+    offset: int
+    key: Any
+    value: Any
+    timestamp: int
+    headers: list
+
+
+class RecordMetadata(NamedTuple):
+    topic: str
+    partition: int
+    offset: int
+    timestamp: int
+
+
+class FakeKafka:
+    # одна партиция на топик; хранит сообщения и смещения групп, пока жив объект
+    def __init__(self):
+        self.topics: dict[str, list[FakeRecord]] = collections.defaultdict(list)
+        self.group_offsets: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self._originals: Optional[tuple] = None
+
+    def append(self, topic: str, key, value, headers=None) -> RecordMetadata:
+        with self._lock:
+            log = self.topics[topic]
+            record = FakeRecord(topic, 0, len(log), key, value, int(time.time() * 1000), list(headers or []))
+            log.append(record)
+        return RecordMetadata(topic, 0, record.offset, record.timestamp)
+
+    def messages(self, topic: str) -> list[FakeRecord]:
+        with self._lock:
+            return list(self.topics[topic])
+
+    def producer(self, **kwargs) -> "FakeProducer":
+        return FakeProducer(self, **kwargs)
+
+    def consumer(self, *topics: str, **kwargs) -> "FakeConsumer":
+        return FakeConsumer(self, *topics, **kwargs)
+
+    def install(self) -> None:
+        # код, создающий aiokafka.AIOKafkaProducer/Consumer, получит объекты этого брокера
+        import aiokafka
+
+        if self._originals is None:
+            self._originals = (aiokafka.AIOKafkaProducer, aiokafka.AIOKafkaConsumer)
+        aiokafka.AIOKafkaProducer = lambda *args, **kwargs: self.producer(**kwargs)
+        aiokafka.AIOKafkaConsumer = lambda *topics, **kwargs: self.consumer(*topics, **kwargs)
+
+    def uninstall(self) -> None:
+        import aiokafka
+
+        if self._originals is not None:
+            aiokafka.AIOKafkaProducer, aiokafka.AIOKafkaConsumer = self._originals
+            self._originals = None
+
+
+class FakeProducer:
+    def __init__(self, broker: FakeKafka, value_serializer: Optional[Callable] = None,
+                 key_serializer: Optional[Callable] = None, **kwargs):
+        self.broker = broker
+        self.value_serializer = value_serializer
+        self.key_serializer = key_serializer
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def flush(self) -> None:
+        pass
+
+    async def send_and_wait(self, topic: str, value=None, key=None, headers=None, **kwargs) -> RecordMetadata:
+        if self.value_serializer is not None and value is not None:
+            value = self.value_serializer(value)
+        if self.key_serializer is not None and key is not None:
+            key = self.key_serializer(key)
+        return self.broker.append(topic, key, value, headers)
+
+    async def send(self, topic: str, value=None, key=None, headers=None, **kwargs) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(await self.send_and_wait(topic, value, key, headers))
+        return future
+
+
+class FakeConsumer:
+    def __init__(self, broker: FakeKafka, *topics: str, group_id: Optional[str] = None,
+                 value_deserializer: Optional[Callable] = None, key_deserializer: Optional[Callable] = None,
+                 auto_offset_reset: str = "latest", **kwargs):
+        self.broker = broker
+        self.topics = topics
+        self.group_id = group_id or f"anonymous-{uuid.uuid4().hex[:6]}"
+        self.value_deserializer = value_deserializer
+        self.key_deserializer = key_deserializer
+        self.auto_offset_reset = auto_offset_reset
+
+    async def start(self) -> None:
+        for topic in self.topics:
+            start = 0 if self.auto_offset_reset == "earliest" else len(self.broker.messages(topic))
+            self.broker.group_offsets.setdefault((self.group_id, topic), start)
+
+    async def stop(self) -> None:
+        pass
+
+    def _next(self) -> Optional[FakeRecord]:
+        for topic in self.topics:
+            offset = self.broker.group_offsets[(self.group_id, topic)]
+            log = self.broker.messages(topic)
+            if offset < len(log):
+                self.broker.group_offsets[(self.group_id, topic)] = offset + 1
+                record = log[offset]
+                return record._replace(
+                    key=self.key_deserializer(record.key) if self.key_deserializer and record.key is not None
+                    else record.key,
+                    value=self.value_deserializer(record.value) if self.value_deserializer and record.value is not None
+                    else record.value,
+                )
+        return None
+
+    async def getone(self) -> FakeRecord:
+        while True:
+            record = self._next()
+            if record is not None:
+                return record
+            await asyncio.sleep(0.001)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> FakeRecord:
+        return await self.getone()
+
+
+# --- WebSocket-клиенты ------------------------------------------------------
+
+class WSSwarm:
+    def __init__(self, url: str, clients: int):
+        self.url = url
+        self.clients = clients
+        self.received: list[list[tuple[float, dict]]] = [[] for _ in range(clients)]
+        self._sockets: list = []
+        self._tasks: list[asyncio.Task] = []
+
+    async def _reader(self, index: int, ws) -> None:
+        import orjson
+        import websockets
+
+        try:
+            async for raw in ws:
+                self.received[index].append((time.perf_counter(), orjson.loads(raw)))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def __aenter__(self) -> "WSSwarm":
+        import websockets
+
+        self._sockets = await asyncio.gather(*(
+            websockets.connect(self.url, max_size=None, compression=None) for _ in range(self.clients)
+        ))
+        self._tasks = [asyncio.create_task(self._reader(i, ws)) for i, ws in enumerate(self._sockets)]
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await asyncio.gather(*(ws.close() for ws in self._sockets), return_exceptions=True)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def wait_for(self, predicate: Callable[[dict], bool], timeout: float = 5.0) -> list[float]:
+        # момент получения подходящего сообщения каждым клиентом
+        deadline = time.perf_counter() + timeout
+        while True:
+            moments = [next((t for t, m in messages if predicate(m)), None) for messages in self.received]
+            if all(m is not None for m in moments):
+                return moments
+            if time.perf_counter() > deadline:
+                missing = sum(m is None for m in moments)
+                raise AssertionError(f"{missing} of {self.clients} clients did not receive the message")
+            await asyncio.sleep(0.002)
+
+    async def delivery_ms(self, trigger: Callable, predicate: Callable[[dict], bool], timeout: float = 5.0) -> list[float]:
+        sent = time.perf_counter()
+        await trigger()
+        return [(moment - sent) * 1000 for moment in await self.wait_for(predicate, timeout)]
+
+
+# --- приложение -------------------------------------------------------------
+
+@dataclass
+class Budget:
+    method: str
+    path: str
+    max_queries: int
+    p95_ms: float
+    json: Optional[dict] = None
+
+
+# ожидаемые значения для харнесса на локальной базе; справочники отдаются из кэша без запросов
+BUDGETS = [
+    Budget("GET", "/appeals/?limit=50", 1, 50.0),
+    Budget("GET", "/appeals/?lat=55.75&lon=37.62&radius=5000&limit=50", 1, 50.0),
+    Budget("GET", "/appeals/{appeal_id}", 1, 20.0),
+    Budget("GET", "/appeals/{appeal_id}/history", 1, 20.0),
+    Budget("GET", "/reference/appeal_types/", 0, 10.0),
+    Budget("GET", "/stats/current", 1, 30.0),
+    Budget("GET", "/cameras/?limit=100", 1, 30.0),
+    Budget("PATCH", "/appeals/{appeal_id}", 1, 40.0, {"description": "harness"}),
+]
+
+
+class Harness:
+    def __init__(self, postgres_url: Optional[str] = None):
+        self.postgres = EphemeralPostgres(postgres_url)
+        self.kafka = FakeKafka()
+        self.queries = QueryCounter()
+        self.url: Optional[str] = None
+        self.appeal_ids: list[str] = []
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "Harness":
+        if "app.database" in sys.modules:
+            raise RuntimeError("app.database is already imported; create Harness before importing the app")
+        url = self.postgres.start()
+        try:
+            from app.settings.config import settings
+
+            settings.DATABASE_URL = url
+            settings.CAMERA_HEALTH_ENABLED = False
+            settings.METRICS_DIR = None
+            settings.LEADER_LOCK_PATH = os.path.join(tempfile.gettempdir(), f"appeals-harness-{os.getpid()}.lock")
+            _run(apply_schema(url))
+            self.kafka.install()
+            self._serve()
+        except BaseException:
+            self.postgres.stop()
+            raise
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(30)
+        self.queries.detach()
+        self.kafka.uninstall()
+        self.postgres.stop()
+
+    def _serve(self) -> None:
+        import uvicorn
+
+        from app.database import async_engine
+        from app.main import app
+
+        async_engine.echo = False
+        port = free_port()
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning",
+                                                     lifespan="on"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 30
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("uvicorn did not start")
+            time.sleep(0.01)
+        self.url = f"http://127.0.0.1:{port}"
+        self.queries.attach(async_engine)
+
+    @property
+    def ws_url(self) -> str:
+        return self.url.replace("http", "ws", 1) + "/ws/appeals"
+
+    def client(self) -> httpx.Client:
+        return httpx.Client(base_url=self.url, timeout=30)
+
+    def seed_appeals(self, n: int) -> list[str]:
+        with self.client() as client:
+            for i in range(n):
+                resp = client.post("/appeals/", json={
+                    "type_id": 1 + i % len(REFERENCE_DATA["appeal_types"]),
+                    "severity_id": 1 + i % len(REFERENCE_DATA["severity_levels"]),
+                    "status_id": 1,
+                    "source": "harness",
+                    "description": f"harness {i}",
+                    "latitude": 55.75 + (i % 20) * 0.001,
+                    "longitude": 37.62 + (i % 20) * 0.001,
+                })
+                resp.raise_for_status()
+                self.appeal_ids.append(resp.json()["id"])
+        return self.appeal_ids
+
+    def check_budget(self, budget: Budget, requests: int = 50) -> dict:
+        path = budget.path.format(appeal_id=self.appeal_ids[0] if self.appeal_ids else "")
+        latencies, errors = [], 0
+        with self.client() as client:
+            # прогрев: кэши, подготовленные выражения asyncpg
+            client.request(budget.method, path, json=budget.json)
+            with self.queries.capture() as captured:
+                client.request(budget.method, path, json=budget.json)
+            for _ in range(requests):
+                started = time.perf_counter()
+                resp = client.request(budget.method, path, json=budget.json)
+                if resp.status_code >= 400:
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+        summary = latency_summary(latencies, sum(latencies) / 1000, errors)
+        return {
+            "name": f"{budget.method} {budget.path}",
+            "queries": len(captured),
+            "max_queries": budget.max_queries,
+            "p95_budget_ms": budget.p95_ms,
+            **summary,
+            "ok": errors == 0 and len(captured) <= budget.max_queries and summary["p95_ms"] <= budget.p95_ms,
+        }
+
+    def check_budgets(self, budgets: list[Budget] = BUDGETS, requests: int = 50) -> list[dict]:
+        return [self.check_budget(b, requests) for b in budgets]
+
+    async def ws_fanout(self, clients: int, rounds: int = 10) -> dict:
+        deliveries: list[float] = []
+        async with WSSwarm(self.ws_url, clients) as swarm, httpx.AsyncClient(base_url=self.url) as client:
+            for n in range(rounds):
+                marker = f"harness-ws-{n}-{uuid.uuid4().hex[:6]}"
+
+                async def trigger():
+                    resp = await client.patch(f"/appeals/{self.appeal_ids[0]}", json={"description": marker})
+                    resp.raise_for_status()
+
+                deliveries += await swarm.delivery_ms(
+                    trigger, lambda m: (m.get("appeal") or {}).get("description") == marker)
+        return {"name": "ws fan-out", "clients": clients, **{
+            k: v for k, v in latency_summary(deliveries, 1.0).items() if k.endswith("_ms")
+        }}
+
+
+# --- pytest -----------------------------------------------------------------
+
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+if pytest is not None:
+    @pytest.fixture(scope="session")
+    def harness():
+        with Harness() as h:
+            h.seed_appeals(50)
+            yield h
+
+    @pytest.fixture
+    def api(harness):
+        with harness.client() as client:
+            yield client
+
+    @pytest.fixture
+    def query_counter(harness):
+        return harness.queries
+
+    @pytest.fixture
+    def ws_swarm(harness):
+        return lambda clients: WSSwarm(harness.ws_url, clients)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--postgres-url", help="существующий сервер вместо локального initdb")
+    parser.add_argument("--appeals", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--ws-clients", type=int, default=20)
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    with Harness(args.postgres_url) as h:
+        h.seed_appeals(args.appeals)
+        results = h.check_budgets(requests=args.requests)
+        if args.ws_clients:
+            results.append(asyncio.run(h.ws_fanout(args.ws_clients)))
+
+    failed = 0
+    for r in results:
+        if "queries" in r:
+            mark = "ok" if r["ok"] else "OVER BUDGET"
+            failed += not r["ok"]
+            print(f"{r['name']:<58} {r['queries']}/{r['max_queries']} queries  "
+                  f"p95 {r['p95_ms']:>7}/{r['p95_budget_ms']} ms  {mark}")
+        else:
+            print(f"{r['name']:<58} {r['clients']} clients  p50 {r.get('p50_ms')} ms  p99 {r.get('p99_ms')} ms")
+    if args.out:
+        write_results(args.out, "harness", {k: v for k, v in vars(args).items() if k not in ("out", "postgres_url")},
+                      results)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
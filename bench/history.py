@@ -0,0 +1,125 @@
+"""Per-update overhead of appeal_history capture at high write rates.
+
+Runs the same stream of PATCH-like updates through crud.update_appeal with
+HISTORY_MODE=off, app (diff computed inside the UPDATE statement as a CTE)
+and trigger (appeal_history_capture). Needs a scratch database from
+DATABASE_URL with reference tables filled; created appeals and their history
+are removed.
+
+    python -m bench.history --appeals 200 --updates 5000 --concurrency 50 --out history.json
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, func, insert, select
+
+from app.crud.appeal import update_appeal
+from app.database import AsyncSessionLocal, async_engine
+from app.models.models import Appeal, AppealHistory, AppealStatus, AppealType, SeverityLevel
+from app.schemas.appeal import AppealUpdate
+from app.services import appeal_history
+from app.settings.config import settings
+from bench.common import percentile, write_results
+
+
+async def seed(n: int) -> tuple[list[uuid.UUID], list[int]]:
+    async with AsyncSessionLocal() as db:
+        type_id = await db.scalar(select(func.min(AppealType.id)))
+        severity_id = await db.scalar(select(func.min(SeverityLevel.id)))
+        status_ids = (await db.execute(select(AppealStatus.id))).scalars().all()
+        ids = [uuid.uuid4() for _ in range(n)]
+        await db.execute(insert(Appeal.__table__).values([
+            {"id": i, "type_id": type_id, "severity_id": severity_id, "status_id": status_ids[0],
+             "source": "bench", "description": "bench", "is_deleted": False}
+            for i in ids
+        ]))
+        await db.commit()
+    return ids, status_ids
+
+
+async def cleanup(ids: list[uuid.UUID]) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(AppealHistory).where(AppealHistory.appeal_id.in_(ids)))
+        await db.execute(delete(Appeal).where(Appeal.id.in_(ids)))
+        await db.commit()
+
+
+async def run_mode(mode: str, ids, status_ids, updates: int, concurrency: int) -> dict:
+    settings.HISTORY_MODE = mode
+    async with async_engine.begin() as conn:
+        await (appeal_history.install_trigger if mode == "trigger" else appeal_history.drop_trigger)(conn)
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(AppealHistory).where(AppealHistory.appeal_id.in_(ids)))
+        await db.commit()
+
+    latencies: list[float] = []
+    queue = list(range(updates))
+
+    async def worker():
+        async with AsyncSessionLocal() as db:
+            while queue:
+                n = queue.pop()
+                patch = AppealUpdate(status_id=random.choice(status_ids), description=f"bench {n}")
+                started = time.perf_counter()
+                await update_appeal(db, random.choice(ids), patch, None)
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    async with AsyncSessionLocal() as db:
+        rows = await db.scalar(select(func.count()).where(AppealHistory.appeal_id.in_(ids)))
+    return {
+        "mode": mode,
+        "updates": updates,
+        "history_rows": rows,
+        "updates_per_s": round(updates / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+
+
+async def run(appeals: int, updates: int, concurrency: int, modes: list[str]) -> list[dict]:
+    async_engine.echo = False
+    ids, status_ids = await seed(appeals)
+    try:
+        results = [await run_mode(m, ids, status_ids, updates, concurrency) for m in modes]
+    finally:
+        async with async_engine.begin() as conn:
+            await appeal_history.drop_trigger(conn)
+        await cleanup(ids)
+        await async_engine.dispose()
+    baseline = next((r for r in results if r["mode"] == "off"), None)
+    for r in results:
+        if baseline:
+            r["overhead_ms"] = round(r["mean_ms"] - baseline["mean_ms"], 3)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--appeals", type=int, default=200)
+    parser.add_argument("--updates", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--modes", default="off,app,trigger")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    random.seed(42)
+    results = asyncio.run(run(args.appeals, args.updates, args.concurrency, args.modes.split(",")))
+    for r in results:
+        print(f"{r['mode']:<8} {r['updates_per_s']:>8} upd/s  mean {r['mean_ms']} ms  p99 {r['p99_ms']} ms  "
+              f"overhead {r.get('overhead_ms', '-')} ms  rows {r['history_rows']}")
+    if args.out:
+        write_results(args.out, "history", {k: v for k, v in vars(args).items() if k != "out"}, results)
+
+
+if __name__ == "__main__":
+    main()
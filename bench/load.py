@@ -0,0 +1,203 @@
+"""HTTP and WebSocket load against a running service.
+
+Keeps --concurrency requests in flight for --duration seconds, choosing each
+request from a weighted mix of the main routes (appeal list with and without
+geo filters, single appeal, history, reference data, stats, cameras and
+PATCH /appeals/{id}). Meanwhile --ws-clients connections to /ws/appeals
+measure how long a PATCH takes to reach every subscriber. Run against data
+from bench.seed; PATCHes only touch seeded appeals (source = "bench").
+
+The load generator is a single asyncio process. When it saturates a core,
+run several copies or use bench.workers for raw throughput.
+
+    python -m bench.load --url http://127.0.0.1:8000 --duration 60 --concurrency 64 --ws-clients 200 --out load.json
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+import httpx
+import orjson
+import websockets
+
+from bench.common import latency_summary, write_results
+from bench.seed import SOURCE
+
+# вес сценария — доля запросов этого вида в смеси
+MIX = {
+    "list_appeals": 20,
+    "list_appeals_geo": 5,
+    "get_appeal": 25,
+    "appeal_history": 10,
+    "reference": 15,
+    "stats_current": 5,
+    "list_cameras": 10,
+    "patch_appeal": 10,
+}
+TOKEN_PREFIX = "bench-load "
+
+
+class Fixture:
+    def __init__(self, appeal_ids: list[str], writable_ids: list[str], status_ids: list[int]):
+        self.appeal_ids = appeal_ids
+        self.writable_ids = writable_ids
+        self.status_ids = status_ids
+
+
+async def discover(client: httpx.AsyncClient) -> Fixture:
+    appeals = (await client.get("/appeals/", params={"limit": 1000})).json()
+    statuses = (await client.get("/reference/appeal_statuses/")).json()
+    ids = [a["id"] for a in appeals]
+    writable = [a["id"] for a in appeals if a.get("source") == SOURCE]
+    if not ids:
+        raise SystemExit("no appeals found; run python -m bench.seed first")
+    return Fixture(ids, writable, [s["id"] for s in statuses])
+
+
+def build_request(name: str, fx: Fixture, sent_tokens: dict) -> tuple[str, str, dict]:
+    if name == "list_appeals":
+        return "GET", "/appeals/", {"params": {"limit": 50, "skip": random.randint(0, 500)}}
+    if name == "list_appeals_geo":
+        return "GET", "/appeals/", {"params": {"lat": 55.75, "lon": 37.62, "radius": 2000, "limit": 50}}
+    if name == "get_appeal":
+        return "GET", f"/appeals/{random.choice(fx.appeal_ids)}", {}
+    if name == "appeal_history":
+        return "GET", f"/appeals/{random.choice(fx.appeal_ids)}/history", {}
+    if name == "reference":
+        return "GET", "/reference/appeal_types/", {}
+    if name == "stats_current":
+        return "GET", "/stats/current", {}
+    if name == "list_cameras":
+        return "GET", "/cameras/", {"params": {"limit": 100}}
+    token = TOKEN_PREFIX + uuid.uuid4().hex
+    sent_tokens[token] = time.perf_counter()
+    return "PATCH", f"/appeals/{random.choice(fx.writable_ids)}", {
+        "json": {"description": token, "status_id": random.choice(fx.status_ids)},
+    }
+
+
+async def ws_client(url: str, sent_tokens: dict, deliveries: list[float], ready: asyncio.Event,
+                    stop: asyncio.Event, counters: dict) -> None:
+    try:
+        async with websockets.connect(url, max_size=None, compression=None) as ws:
+            counters["connected"] += 1
+            if counters["connected"] >= counters["expected"]:
+                ready.set()
+            while not stop.is_set():
+                try:
+                    raw = await asyncio.wait_for(ws.recv(), 0.5)
+                except asyncio.TimeoutError:
+                    continue
+                received = time.perf_counter()
+                counters["messages"] += 1
+                description = (orjson.loads(raw).get("appeal") or {}).get("description") or ""
+                sent = sent_tokens.get(description)
+                if sent is not None:
+                    deliveries.append((received - sent) * 1000)
+    except (OSError, websockets.WebSocketException):
+        counters["failed"] += 1
+        ready.set()
+
+
+async def run(url: str, duration: float, warmup: float, concurrency: int, ws_clients: int, mix: dict) -> dict:
+    names, weights = zip(*mix.items())
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    errors: dict[str, int] = {name: 0 for name in names}
+    sent_tokens: dict[str, float] = {}
+    deliveries: list[float] = []
+    counters = {"expected": ws_clients, "connected": 0, "failed": 0, "messages": 0}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        fx = await discover(client)
+        if not fx.writable_ids:
+            names, weights = zip(*((n, w) for n, w in zip(names, weights) if n != "patch_appeal"))
+
+        stop_ws = asyncio.Event()
+        ready = asyncio.Event()
+        ws_url = url.replace("http", "ws", 1) + "/ws/appeals"
+        ws_tasks = [asyncio.create_task(ws_client(ws_url, sent_tokens, deliveries, ready, stop_ws, counters))
+                    for _ in range(ws_clients)]
+        if ws_clients:
+            await asyncio.wait_for(ready.wait(), 60)
+
+        recording = False
+        deadline = time.perf_counter() + warmup + duration
+
+        async def user():
+            while time.perf_counter() < deadline:
+                name = random.choices(names, weights)[0]
+                method, path, kwargs = build_request(name, fx, sent_tokens)
+                started = time.perf_counter()
+                try:
+                    resp = await client.request(method, path, **kwargs)
+                    failed = resp.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                if not recording:
+                    continue
+                if failed:
+                    errors[name] += 1
+                else:
+                    latencies[name].append((time.perf_counter() - started) * 1000)
+
+        users = [asyncio.create_task(user()) for _ in range(concurrency)]
+        await asyncio.sleep(warmup)
+        recording = True
+        deliveries.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*users)
+        elapsed = time.perf_counter() - started
+        # даём последним рассылкам дойти до клиентов
+        await asyncio.sleep(1.0)
+        stop_ws.set()
+        await asyncio.gather(*ws_tasks, return_exceptions=True)
+
+    http = {name: latency_summary(latencies[name], elapsed, errors[name]) for name in names}
+    total = latency_summary([v for name in names for v in latencies[name]], elapsed, sum(errors.values()))
+    ws = {
+        "clients": ws_clients,
+        "connected": counters["connected"],
+        "failed": counters["failed"],
+        "messages": counters["messages"],
+        **({"delivery_" + k: v for k, v in latency_summary(deliveries, elapsed).items() if k.endswith("_ms")}),
+    }
+    return {"http": http, "total": total, "ws": ws}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--ws-clients", type=int, default=50)
+    parser.add_argument("--mix", help="веса сценариев, например get_appeal=50,list_appeals=50")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    mix = dict(MIX)
+    if args.mix:
+        mix = {name: int(weight) for name, weight in (item.split("=") for item in args.mix.split(","))}
+        unknown = set(mix) - set(MIX)
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    results = asyncio.run(run(args.url, args.duration, args.warmup, args.concurrency, args.ws_clients, mix))
+
+    for name, r in [*results["http"].items(), ("total", results["total"])]:
+        if r["requests"]:
+            print(f"{name:<18} {r['rps']:>8} rps  p50 {r['p50_ms']:>8} ms  p95 {r['p95_ms']:>8} ms  "
+                  f"p99 {r['p99_ms']:>8} ms  errors {r['errors']}")
+    ws = results["ws"]
+    print(f"ws: {ws['connected']}/{ws['clients']} connected, {ws['messages']} messages, "
+          f"delivery p50 {ws.get('delivery_p50_ms')} ms p99 {ws.get('delivery_p99_ms')} ms")
+    if args.out:
+        write_results(args.out, "load", {k: v for k, v in vars(args).items() if k != "out"} | {"mix": mix}, results)
+
+
+if __name__ == "__main__":
+    main()
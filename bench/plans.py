@@ -0,0 +1,162 @@
+"""Query-plan regression check for the hot read paths.
+
+Runs the real app.crud read functions, captures every SQL statement they send
+and EXPLAINs it with enable_seqscan = off. When a suitable index exists,
+Postgres always prefers it in that mode, so a Seq Scan left in the plan means
+the query has no usable index. Such a plan fails the check; the exceptions
+are the small reference tables, which are read whole anyway. Partitions are
+reported under their parent table.
+
+By default the check runs against DATABASE_URL (after alembic upgrade head).
+With --harness it uses a throwaway Postgres from bench.harness with the
+migrations applied. Plans on empty tables are enough for this: the check
+tests whether an index can be used, not what it costs.
+
+    python -m bench.plans --harness --out plans.json
+    python -m bench.plans --show
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import sys
+import uuid
+
+from bench.common import write_results
+
+# справочники: несколько строк, Seq Scan по ним дешевле любого индекса
+REFERENCE_TABLES = {"appeal_types", "severity_levels", "appeal_statuses"}
+
+SAMPLE_ID = uuid.UUID("00000000-0000-4000-8000-000000000001")
+SAMPLE_TIME = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def hot_queries() -> list[tuple]:
+    # импорт внутри: при --harness DATABASE_URL подменяется до импорта app.database
+    from app.crud import appeal, auth, camera_hardware, images, stats
+
+    day = datetime.timedelta(days=1)
+    return [
+        ("appeals.list", lambda db: appeal.get_appeals_rows(db, limit=50)),
+        ("appeals.list_page", lambda db: appeal.get_appeals_rows(db, skip=500, limit=50)),
+        ("appeals.bbox", lambda db: appeal.get_appeals_rows(db, bbox=(37.60, 55.74, 37.64, 55.77))),
+        ("appeals.near", lambda db: appeal.get_appeals_rows(db, near=(55.75, 37.62, 500.0))),
+        ("appeals.building", lambda db: appeal.get_appeals_rows(db, building_id=1, floor=2)),
+        ("appeals.get", lambda db: appeal.get_appeal(db, SAMPLE_ID)),
+        ("appeals.version", lambda db: appeal.get_appeal_version(db, SAMPLE_ID)),
+        ("appeals.history", lambda db: appeal.get_appeal_history_rows(db, SAMPLE_ID)),
+        ("appeals.history_marker", lambda db: appeal.get_appeal_history_marker(db, SAMPLE_ID)),
+        ("images.list", lambda db: images.list_images(db, limit=50)),
+        ("images.after", lambda db: images.list_images(db, after=(SAMPLE_TIME, SAMPLE_ID))),
+        ("images.camera", lambda db: images.list_images(db, camera_id=SAMPLE_ID)),
+        ("images.appeal", lambda db: images.list_images(db, appeal_id=SAMPLE_ID)),
+        ("cameras.list", lambda db: camera_hardware.get_cameras(db)),
+        ("cameras.after", lambda db: camera_hardware.get_cameras(db, after=(SAMPLE_TIME, SAMPLE_ID))),
+        ("stats.hourly", lambda db: stats.get_hourly_stats(db, SAMPLE_TIME, SAMPLE_TIME + day, ["type"])),
+        ("auth.user_by_username", lambda db: auth.get_user_by_username(db, "admin")),
+        ("auth.user_role_ids", lambda db: auth.get_user_role_ids(db, 1)),
+    ]
+
+
+def seq_scans(plan: dict) -> list[str]:
+    from app.services.history_partitions import DEFAULT_PARTITION, PARENT, partition_month
+
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        table = plan["Relation Name"]
+        if table == DEFAULT_PARTITION or partition_month(table) is not None:
+            table = PARENT
+        if table not in REFERENCE_TABLES:
+            found.append(table)
+    for child in plan.get("Plans", ()):
+        found.extend(seq_scans(child))
+    return found
+
+
+async def _capture(engine, query) -> list[tuple]:
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        async with AsyncSession(engine) as db:
+            await query(db)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    return statements
+
+
+async def _explain(engine, statement: str, parameters) -> dict:
+    async with engine.connect() as conn, conn.begin():
+        # SET LOCAL живёт до конца транзакции: остальной пул настройку не видит
+        await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, tuple(parameters or ()))
+        plan = result.scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return plan[0]["Plan"]
+
+
+async def check(show: bool = False) -> list[dict]:
+    from app.database import async_engine
+
+    results = []
+    try:
+        for name, query in hot_queries():
+            for i, (statement, parameters) in enumerate(await _capture(async_engine, query)):
+                plan = await _explain(async_engine, statement, parameters)
+                scans = seq_scans(plan)
+                results.append({
+                    "name": name if i == 0 else f"{name}#{i}",
+                    "ok": not scans,
+                    "seq_scans": scans,
+                    "cost": plan["Total Cost"],
+                    **({"statement": statement, "plan": plan} if show or scans else {}),
+                })
+    finally:
+        await async_engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--harness", action="store_true", help="временный Postgres с миграциями вместо DATABASE_URL")
+    parser.add_argument("--postgres-url", help="сервер для --harness вместо локального initdb")
+    parser.add_argument("--show", action="store_true", help="печатать SQL и план каждого запроса")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    postgres = None
+    if args.harness:
+        from bench.harness import EphemeralPostgres, _run, apply_schema
+
+        postgres = EphemeralPostgres(args.postgres_url)
+        url = postgres.start()
+        from app.settings.config import settings
+
+        settings.DATABASE_URL = url
+        _run(apply_schema(url))
+    try:
+        results = asyncio.run(check(args.show))
+    finally:
+        if postgres is not None:
+            postgres.stop()
+
+    for r in results:
+        mark = "ok" if r["ok"] else "SEQ SCAN " + ", ".join(r["seq_scans"])
+        print(f"{r['name']:<28} cost {r['cost']:>10}  {mark}")
+        if not r["ok"] or args.show:
+            print(f"    {r['statement']}")
+            if args.show:
+                print(json.dumps(r["plan"], indent=2))
+    if args.out:
+        write_results(args.out, "plans", {"harness": args.harness}, results)
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
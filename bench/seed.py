@@ -0,0 +1,184 @@
+"""Seed Postgres with a reproducible data set for the load benchmarks.
+
+Volumes are configurable; everything is generated from --seed and loaded with
+COPY. Seeded rows are tagged (appeals.source = "bench", users and roles named
+bench_*, cameras on rtsp://bench.invalid) so --clean removes exactly them.
+Needs a scratch database from DATABASE_URL with reference tables filled.
+All seeded users get the password "bench".
+
+    python -m bench.seed --appeals 100000 --history-per-appeal 5 --users 500 --cameras 2000
+    python -m bench.seed --clean
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import uuid
+
+from sqlalchemy import delete, select, text
+
+from app.core.security import get_password_hash
+from app.database import AsyncSessionLocal, async_engine
+from app.models.models import (
+    Appeal, AppealHistory, AppealStatus, AppealType, CameraHardware, Permission, Role, SeverityLevel, User,
+)
+from app.services import appeal_stats, history_partitions
+
+SOURCE = "bench"
+PREFIX = "bench_"
+CAMERA_HOST = "rtsp://bench.invalid"
+PASSWORD = "bench"
+
+EVENT_FIELDS = ["status_id", "assigned_to_id", "location", "description"]
+
+
+async def _copy(conn, table: str, columns: list[str], records: list[tuple], chunk: int = 50_000) -> None:
+    raw = (await conn.get_raw_connection()).driver_connection
+    for start in range(0, len(records), chunk):
+        await raw.copy_records_to_table(table, records=records[start:start + chunk], columns=columns)
+
+
+async def _references() -> dict:
+    async with AsyncSessionLocal() as db:
+        return {
+            "type_ids": (await db.execute(select(AppealType.id))).scalars().all(),
+            "severity_ids": (await db.execute(select(SeverityLevel.id))).scalars().all(),
+            "status_ids": (await db.execute(select(AppealStatus.id))).scalars().all(),
+            "permission_ids": (await db.execute(select(Permission.id))).scalars().all(),
+        }
+
+
+async def seed(appeals: int, history_per_appeal: int, users: int, roles: int, cameras: int, days: int) -> dict:
+    refs = await _references()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    password_hash = get_password_hash(PASSWORD)
+    counts = {}
+
+    async with async_engine.begin() as conn:
+        await history_partitions.ensure_partitions(conn)
+
+        role_rows = (await conn.execute(
+            Role.__table__.insert()
+            .values([{"name": f"{PREFIX}role_{i}", "description": "bench"} for i in range(roles)])
+            .returning(Role.__table__.c.id)
+        )).scalars().all() if roles else []
+        if role_rows and refs["permission_ids"]:
+            await _copy(conn, "role_permissions", ["role_id", "permission_id"], [
+                (role_id, perm_id)
+                for role_id in role_rows
+                for perm_id in random.sample(refs["permission_ids"], max(1, len(refs["permission_ids"]) // 2))
+            ])
+        counts["roles"] = len(role_rows)
+
+        user_ids = (await conn.execute(
+            User.__table__.insert()
+            .values([
+                {"username": f"{PREFIX}{i}", "full_name": f"Пользователь {i}", "email": f"{PREFIX}{i}@bench.invalid",
+                 "phone": "+70000000000", "password_hash": password_hash}
+                for i in range(users)
+            ])
+            .returning(User.__table__.c.id)
+        )).scalars().all() if users else []
+        if user_ids and role_rows:
+            await _copy(conn, "user_roles", ["user_id", "role_id"], [
+                (user_id, role_id) for user_id in user_ids for role_id in random.sample(role_rows, min(2, len(role_rows)))
+            ])
+        counts["users"] = len(user_ids)
+
+        appeal_records, history_records = [], []
+        for n in range(appeals):
+            appeal_id = uuid.uuid4()
+            created = now - datetime.timedelta(seconds=random.uniform(0, days * 86400))
+            has_geo = random.random() < 0.7
+            appeal_records.append((
+                appeal_id, created, created,
+                random.choice(refs["type_ids"]), random.choice(refs["severity_ids"]), random.choice(refs["status_ids"]),
+                f"Корпус {random.randint(1, 9)}, этаж {random.randint(1, 20)}",
+                "Сработал датчик, требуется проверка оператором",
+                random.choice(user_ids) if user_ids else None, SOURCE,
+                random.choice(user_ids) if user_ids and random.random() < 0.6 else None,
+                json.dumps({"camera": str(uuid.uuid4()), "score": round(random.random(), 3)}),
+                random.random() < 0.02, 1 + history_per_appeal,
+                55.75 + random.uniform(-0.2, 0.2) if has_geo else None,
+                37.62 + random.uniform(-0.3, 0.3) if has_geo else None,
+                random.randint(1, 50), random.randint(1, 20),
+            ))
+            history_records.append((uuid.uuid4(), appeal_id, created, "create", None, None, None, None))
+            moment = created
+            for _ in range(history_per_appeal):
+                moment += datetime.timedelta(minutes=random.uniform(1, 600))
+                field = random.choice(EVENT_FIELDS)
+                history_records.append((
+                    uuid.uuid4(), appeal_id, min(moment, now), "update", field,
+                    str(random.randint(1, 5)), str(random.randint(1, 5)), None,
+                ))
+        await _copy(conn, "appeals", [
+            "id", "created_at", "updated_at", "type_id", "severity_id", "status_id", "location", "description",
+            "reporter_id", "source", "assigned_to_id", "metadata", "is_deleted", "version",
+            "latitude", "longitude", "building_id", "floor",
+        ], appeal_records)
+        await _copy(conn, "appeal_history", [
+            "id", "appeal_id", "event_time", "event_type", "field_name", "old_value", "new_value", "comment",
+        ], history_records)
+        counts["appeals"] = len(appeal_records)
+        counts["history"] = len(history_records)
+
+        await _copy(conn, "camera_hardware", ["id", "name", "stream_url", "ptz_enabled", "created_at", "status"], [
+            (uuid.uuid4(), f"Камера {i}", f"{CAMERA_HOST}/{i}", random.random() < 0.3,
+             now - datetime.timedelta(seconds=i), random.choice(["online", "offline", None]))
+            for i in range(cameras)
+        ])
+        counts["cameras"] = cameras
+
+        for table in ("appeals", "appeal_history", "camera_hardware", "users"):
+            await conn.execute(text(f"ANALYZE {table}"))
+
+    # счётчики appeal_stats_hourly COPY не обновляет — пересчитываем целиком
+    async with AsyncSessionLocal() as db:
+        counts["stats_rows"] = await appeal_stats.rebuild(db)
+    return counts
+
+
+async def clean() -> None:
+    async with AsyncSessionLocal() as db:
+        ids = select(Appeal.id).where(Appeal.source == SOURCE)
+        await db.execute(delete(AppealHistory).where(AppealHistory.appeal_id.in_(ids)))
+        await db.execute(delete(Appeal).where(Appeal.source == SOURCE))
+        await db.execute(delete(CameraHardware).where(CameraHardware.stream_url.like(f"{CAMERA_HOST}/%")))
+        await db.execute(delete(User).where(User.username.like(f"{PREFIX}%")))
+        await db.execute(delete(Role).where(Role.name.like(f"{PREFIX}%")))
+        await db.commit()
+        await appeal_stats.rebuild(db)
+
+
+async def _main(args) -> None:
+    async_engine.echo = False
+    try:
+        if args.clean:
+            await clean()
+            print("bench data removed")
+        else:
+            random.seed(args.seed)
+            counts = await seed(args.appeals, args.history_per_appeal, args.users, args.roles,
+                                args.cameras, args.days)
+            print(", ".join(f"{k} {v}" for k, v in counts.items()))
+    finally:
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--appeals", type=int, default=50_000)
+    parser.add_argument("--history-per-appeal", type=int, default=4)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--roles", type=int, default=10)
+    parser.add_argument("--cameras", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=90, help="разброс created_at в прошлое")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--clean", action="store_true")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Serialization cost of GET /appeals/ and /appeals/{id}/history per 10k rows.
+
+Compares FastAPI's default path (AppealRead validation from ORM attributes +
+JSONResponse) with the FAST_JSON_RESPONSES path (plain row dicts + orjson).
+
+    python -m bench.serialization --rows 10000 --out serialization.json
+"""
+import argparse
+import datetime
+import json
+import random
+import time
+import types
+import uuid
+
+from pydantic import TypeAdapter
+
+from app.core.serialization import dumps
+from app.schemas.appeal import AppealHistoryRead, AppealRead
+from bench.common import write_results
+
+
+def appeal_rows(n: int) -> list[dict]:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        {
+            "id": uuid.uuid4(),
+            "type_id": random.randint(1, 8),
+            "severity_id": random.randint(1, 4),
+            "status_id": random.randint(1, 5),
+            "location": f"Корпус {random.randint(1, 9)}",
+            "description": "Сработал датчик дыма",
+            "reporter_id": random.randint(1, 500),
+            "source": "camera",
+            "assigned_to_id": None,
+            "payload": {"score": random.random()},
+            "created_at": now - datetime.timedelta(seconds=i),
+            "updated_at": now,
+            "ticket_number": i,
+            "is_deleted": False,
+            "version": 1,
+            "latitude": 55.75 + random.uniform(-0.1, 0.1),
+            "longitude": 37.62 + random.uniform(-0.1, 0.1),
+            "building_id": random.randint(1, 50),
+            "floor": random.randint(1, 20),
+            "type_name": "Пожар",
+            "severity_name": "Высокая",
+            "status_name": "Новое",
+        }
+        for i in range(n)
+    ]
+
+
+def history_rows(n: int) -> list[dict]:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        {
+            "id": uuid.uuid4(),
+            "event_time": now - datetime.timedelta(seconds=i),
+            "event_type": "update",
+            "changed_by_id": None,
+            "payload": None,
+            "field_name": "status_id",
+            "old_value": "1",
+            "new_value": "2",
+            "comment": None,
+        }
+        for i in range(n)
+    ]
+
+
+def default_path(adapter: TypeAdapter, objects: list) -> bytes:
+    # то, что делает FastAPI при response_model: валидация + dump(mode="json") + json.dumps
+    validated = adapter.validate_python(objects, from_attributes=True)
+    content = adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def timed(fn, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run(rows: int, rounds: int) -> list[dict]:
+    results = []
+    cases = [
+        ("/appeals/", AppealRead, appeal_rows(rows)),
+        ("/appeals/{id}/history", AppealHistoryRead, history_rows(rows)),
+    ]
+    for endpoint, schema, data in cases:
+        adapter = TypeAdapter(list[schema])
+        objects = [types.SimpleNamespace(**row) for row in data]
+        assert json.loads(default_path(adapter, objects)) == json.loads(dumps(data))
+        before = timed(lambda: default_path(adapter, objects), rounds)
+        after = timed(lambda: dumps(data), rounds)
+        results.append({
+            "endpoint": endpoint,
+            "rows": rows,
+            "default_ms": round(before * 1000, 2),
+            "fast_ms": round(after * 1000, 2),
+            "speedup": round(before / after, 1),
+        })
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    random.seed(42)
+    results = run(args.rows, args.rounds)
+    for r in results:
+        print(f"{r['endpoint']:<24} {r['rows']} rows: default {r['default_ms']} ms, "
+              f"fast {r['fast_ms']} ms (x{r['speedup']})")
+    if args.out:
+        write_results(args.out, "serialization", {"rows": args.rows, "rounds": args.rounds}, results)
+
+
+if __name__ == "__main__":
+    main()
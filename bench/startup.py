@@ -0,0 +1,111 @@
+"""Cold-start time and first-request latency of the service.
+
+Spawns `uvicorn app.main:app` in a fresh process, measures the time until the
+lifespan handler has finished and the first request is answered, then the
+latency of the first and subsequent requests to each path. Import time of
+app.main is measured separately in its own interpreter.
+
+    python -m bench.startup --runs 5 --out startup.json
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from bench.common import write_results
+
+PATHS = ["/reference/appeal_types/", "/appeals/?limit=50", "/stats/current"]
+
+
+def import_time() -> float:
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(client: httpx.Client, path: str, deadline: float) -> float:
+    while time.perf_counter() < deadline:
+        try:
+            client.get(path)
+            return time.perf_counter()
+        except httpx.TransportError:
+            time.sleep(0.01)
+    raise TimeoutError("service did not start")
+
+
+def timed_get(client: httpx.Client, path: str) -> float:
+    started = time.perf_counter()
+    client.get(path).raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+def one_run(paths: list[str], warm_requests: int) -> dict:
+    port = free_port()
+    env = {**os.environ, "CAMERA_HEALTH_ENABLED": "false"}
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        # отдельные клиенты: первый запрос к каждому пути идёт по новому соединению, как у реального клиента
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as probe:
+            ready = wait_ready(probe, "/docs", started + 60)
+        result = {"ready_s": round(ready - started, 3), "paths": {}}
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            for path in paths:
+                first = timed_get(client, path)
+                warm = [timed_get(client, path) for _ in range(warm_requests)]
+                result["paths"][path] = {
+                    "first_ms": round(first, 2),
+                    "warm_p50_ms": round(statistics.median(warm), 2),
+                }
+        return result
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warm-requests", type=int, default=20)
+    parser.add_argument("--paths", default=",".join(PATHS))
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    paths = args.paths.split(",")
+    imports = [import_time() for _ in range(args.runs)]
+    runs = [one_run(paths, args.warm_requests) for _ in range(args.runs)]
+    summary = {
+        "import_s": round(statistics.median(imports), 3),
+        "ready_s": round(statistics.median(r["ready_s"] for r in runs), 3),
+        "paths": {
+            p: {
+                "first_ms": round(statistics.median(r["paths"][p]["first_ms"] for r in runs), 2),
+                "warm_p50_ms": round(statistics.median(r["paths"][p]["warm_p50_ms"] for r in runs), 2),
+            }
+            for p in paths
+        },
+    }
+    print(f"import {summary['import_s']} s, ready {summary['ready_s']} s")
+    for path, r in summary["paths"].items():
+        print(f"{path:<28} first {r['first_ms']:>8} ms  warm p50 {r['warm_p50_ms']:>8} ms")
+    if args.out:
+        write_results(args.out, "startup", {"runs": args.runs, "warm_requests": args.warm_requests},
+                      {"summary": summary, "runs": runs})
+
+
+if __name__ == "__main__":
+    main()
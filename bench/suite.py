@@ -0,0 +1,67 @@
+"""Run the benchmark suite and put every result into one directory.
+
+Micro-benchmarks (serialization, compression, export) need nothing but the
+code. With --db the DB-backed ones run too (writes, history, plans). With --url the
+load test runs against that service, after seeding it with --seed. Each
+benchmark runs in its own interpreter, and its JSON lands in --out-dir. Two
+such directories, e.g. from two commits in CI, are diffed with bench.compare.
+
+    python -m bench.suite --out-dir bench-results/$(git rev-parse --short HEAD)
+    python -m bench.suite --db --url http://127.0.0.1:8000 --seed --out-dir bench-results/head
+    python -m bench.compare bench-results/base bench-results/head --fail
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+MICRO = {
+    "serialization": ["--rows", "10000", "--rounds", "5"],
+    "compression": ["--rounds", "20"],
+    "export": ["--rows", "10000", "--rounds", "3"],
+}
+DB = {
+    "writes": ["--ops", "2000", "--concurrency", "20"],
+    "history": ["--appeals", "200", "--updates", "2000", "--concurrency", "20"],
+    "plans": [],
+}
+
+
+def run(module: str, args: list[str], out_dir: str) -> bool:
+    out = os.path.join(out_dir, f"{module}.json")
+    print(f"--> bench.{module}", flush=True)
+    result = subprocess.run([sys.executable, "-m", f"bench.{module}", *args, "--out", out])
+    if result.returncode != 0:
+        print(f"bench.{module} failed with exit code {result.returncode}", file=sys.stderr)
+    return result.returncode == 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out-dir", default="bench-results/latest")
+    parser.add_argument("--only", help="запустить только перечисленные бенчмарки")
+    parser.add_argument("--db", action="store_true", help="бенчмарки, которым нужна база DATABASE_URL")
+    parser.add_argument("--url", help="адрес запущенного сервиса для bench.load")
+    parser.add_argument("--seed", action="store_true", help="перед нагрузкой заполнить базу через bench.seed")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--ws-clients", type=int, default=50)
+    args = parser.parse_args()
+
+    plan = dict(MICRO)
+    if args.db:
+        plan.update(DB)
+    if args.url:
+        plan["load"] = ["--url", args.url, "--duration", str(args.duration), "--ws-clients", str(args.ws_clients)]
+    if args.only:
+        plan = {name: plan[name] for name in args.only.split(",") if name in plan}
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    if args.seed and "load" in plan:
+        subprocess.run([sys.executable, "-m", "bench.seed"], check=True)
+    failed = [name for name, bench_args in plan.items() if not run(name, bench_args, args.out_dir)]
+    if failed:
+        sys.exit(f"failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Throughput and latency of one uvicorn worker vs N workers (python -m app.server).
+
+Профиль нагрузки: для каждого числа воркеров запускается app.server на свободном
+порту, после прогрева --loaders процессов держат по --concurrency запросов в
+полёте в течение --duration секунд, перебирая --paths по кругу. Генератор
+нагрузки сам съедает CPU, поэтому на одной машине честное сравнение получается,
+когда воркеров не больше половины ядер; иначе запускайте его с другого хоста
+через --url.
+
+    python -m bench.workers --workers 1,auto --out workers.json
+    docker compose --profile loadtest run --rm loadtest
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+
+from app.server import cpu_count
+from bench.common import percentile, write_results
+
+PATHS = ["/reference/appeal_types/", "/appeals/?limit=50", "/stats/current"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _load(url: str, paths: list[str], concurrency: int, duration: float) -> tuple[list[float], int]:
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        async def user(offset: int):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    resp = await client.get(paths[i % len(paths)])
+                    if resp.status_code >= 500:
+                        errors += 1
+                    else:
+                        latencies.append((time.perf_counter() - started) * 1000)
+                except httpx.HTTPError:
+                    errors += 1
+                i += 1
+
+        await asyncio.gather(*(user(n) for n in range(concurrency)))
+    return latencies, errors
+
+
+def _loader(url: str, paths: list[str], concurrency: int, duration: float) -> tuple[list[float], int]:
+    return asyncio.run(_load(url, paths, concurrency, duration))
+
+
+def measure(url: str, paths: list[str], loaders: int, concurrency: int, duration: float) -> dict:
+    with ProcessPoolExecutor(loaders) as pool:
+        parts = list(pool.map(_loader, *zip(*[(url, paths, concurrency, duration)] * loaders)))
+    latencies = [lat for part, _ in parts for lat in part]
+    errors = sum(e for _, e in parts)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99), 2) if latencies else None,
+    }
+
+
+def start_server(workers: int, port: int, lock_path: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "SERVER_WORKERS": str(workers),
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "LEADER_LOCK_PATH": lock_path,
+    }
+    return subprocess.Popen([sys.executable, "-m", "app.server"], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(url: str, timeout: float = 60) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            httpx.get(url + "/docs", timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.1)
+    raise TimeoutError("service did not start")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,auto", help="список через запятую; auto — по числу ядер")
+    parser.add_argument("--url", help="нагружать уже запущенный сервис вместо запуска app.server")
+    parser.add_argument("--paths", default=",".join(PATHS))
+    parser.add_argument("--loaders", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    paths = args.paths.split(",")
+    results = {}
+    if args.url:
+        measure(args.url, paths, args.loaders, args.concurrency, args.warmup)
+        results[args.url] = measure(args.url, paths, args.loaders, args.concurrency, args.duration)
+    else:
+        for item in args.workers.split(","):
+            workers = cpu_count() if item == "auto" else int(item)
+            port = free_port()
+            url = f"http://127.0.0.1:{port}"
+            lock_path = os.path.join(tempfile.gettempdir(), f"appeals-bench-{port}.lock")
+            proc = start_server(workers, port, lock_path)
+            try:
+                wait_ready(url)
+                measure(url, paths, args.loaders, args.concurrency, args.warmup)
+                results[f"workers={workers}"] = measure(url, paths, args.loaders, args.concurrency, args.duration)
+            finally:
+                proc.terminate()
+                proc.wait(timeout=60)
+                if os.path.exists(lock_path):
+                    os.remove(lock_path)
+
+    for name, r in results.items():
+        print(f"{name:<24} {r['rps']:>9} rps  p50 {r['p50_ms']} ms  p95 {r['p95_ms']} ms  "
+              f"p99 {r['p99_ms']} ms  errors {r['errors']}")
+    if args.out:
+        write_results(args.out, "workers", {
+            "cpu_count": cpu_count(),
+            "loaders": args.loaders,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "paths": paths,
+        }, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Round-trips and latency of the appeal write path.
+
+"orm" replays the previous flow (SELECT, flush, commit, refresh, lazy reference
+loads); "single" is crud.create_appeal/update_appeal/soft_delete_appeal, which
+send one statement per write. Round-trips are counted on the engine: every
+statement plus BEGIN and COMMIT. Needs a scratch database from DATABASE_URL
+with reference tables filled.
+
+    python -m bench.writes --ops 2000 --concurrency 20 --out writes.json
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, event, func, select
+
+from app.crud.appeal import create_appeal, soft_delete_appeal, update_appeal
+from app.database import AsyncSessionLocal, async_engine
+from app.models.models import Appeal, AppealHistory, AppealStatsHourly, AppealStatus, AppealType, SeverityLevel
+from app.schemas.appeal import AppealCreate, AppealUpdate
+from bench.common import percentile, write_results
+
+SOURCE = "bench-writes"
+
+
+class RoundTrips:
+    def __init__(self):
+        self.count = 0
+
+    def attach(self) -> None:
+        engine = async_engine.sync_engine
+        event.listen(engine, "before_cursor_execute", self._hit)
+        event.listen(engine, "begin", self._hit)
+        event.listen(engine, "commit", self._hit)
+
+    def _hit(self, *args, **kwargs) -> None:
+        self.count += 1
+
+
+async def orm_create(db, appeal_in: AppealCreate):
+    obj = Appeal(**appeal_in.model_dump(exclude={"payload"}), payload=appeal_in.payload or {})
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    return obj
+
+
+async def orm_update(db, appeal_id, appeal_in: AppealUpdate):
+    obj = (await db.execute(select(Appeal).where(Appeal.id == appeal_id))).scalar_one_or_none()
+    obj.status_id = appeal_in.status_id
+    obj.description = appeal_in.description
+    await db.commit()
+    await db.refresh(obj)
+    return obj.type_name, obj.severity_name, obj.status_name
+
+
+async def orm_delete(db, appeal_id):
+    obj = (await db.execute(select(Appeal).where(Appeal.id == appeal_id))).scalar_one_or_none()
+    obj.is_deleted = True
+    await db.commit()
+    await db.refresh(obj)
+    return obj
+
+
+async def single_create(db, appeal_in: AppealCreate):
+    return await create_appeal(db, appeal_in, None)
+
+
+async def single_update(db, appeal_id, appeal_in: AppealUpdate):
+    return await update_appeal(db, appeal_id, appeal_in, None)
+
+
+async def single_delete(db, appeal_id):
+    return await soft_delete_appeal(db, appeal_id, None)
+
+
+PATHS = {
+    "orm": (orm_create, orm_update, orm_delete),
+    "single": (single_create, single_update, single_delete),
+}
+
+
+async def run_path(name: str, ops: int, concurrency: int, refs: dict, counter: RoundTrips) -> list[dict]:
+    create, update, remove = PATHS[name]
+    results = []
+    created: list[uuid.UUID] = []
+
+    async def phase(op: str, make_call) -> None:
+        latencies: list[float] = []
+        queue = list(range(ops))
+
+        async def worker():
+            async with AsyncSessionLocal() as db:
+                while queue:
+                    n = queue.pop()
+                    started = time.perf_counter()
+                    await make_call(db, n)
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+        before = counter.count
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        results.append({
+            "path": name,
+            "op": op,
+            "ops": ops,
+            "round_trips_per_op": round((counter.count - before) / ops, 2),
+            "ops_per_s": round(ops / elapsed, 1),
+            "mean_ms": round(statistics.fmean(latencies), 3),
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+        })
+
+    async def do_create(db, n):
+        obj = await create(db, AppealCreate(
+            type_id=refs["type_id"], severity_id=refs["severity_id"], status_id=refs["status_ids"][0],
+            source=SOURCE, description=f"bench {n}",
+        ))
+        created.append(obj["id"] if isinstance(obj, dict) else obj.id)
+
+    async def do_update(db, n):
+        await update(db, random.choice(created), AppealUpdate(
+            status_id=random.choice(refs["status_ids"]), description=f"bench update {n}",
+        ))
+
+    async def do_delete(db, n):
+        await remove(db, created[n])
+
+    await phase("create", do_create)
+    await phase("update", do_update)
+    await phase("delete", do_delete)
+    return results
+
+
+async def cleanup() -> None:
+    async with AsyncSessionLocal() as db:
+        ids = select(Appeal.id).where(Appeal.source == SOURCE)
+        await db.execute(delete(AppealHistory).where(AppealHistory.appeal_id.in_(ids)))
+        await db.execute(delete(Appeal).where(Appeal.source == SOURCE))
+        await db.execute(delete(AppealStatsHourly).where(AppealStatsHourly.source == SOURCE))
+        await db.commit()
+
+
+async def run(ops: int, concurrency: int, paths: list[str]) -> list[dict]:
+    async_engine.echo = False
+    async with AsyncSessionLocal() as db:
+        refs = {
+            "type_id": await db.scalar(select(func.min(AppealType.id))),
+            "severity_id": await db.scalar(select(func.min(SeverityLevel.id))),
+            "status_ids": (await db.execute(select(AppealStatus.id))).scalars().all(),
+        }
+    counter = RoundTrips()
+    counter.attach()
+    results = []
+    try:
+        for name in paths:
+            results += await run_path(name, ops, concurrency, refs, counter)
+    finally:
+        await cleanup()
+        await async_engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--paths", default="orm,single")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    random.seed(42)
+    results = asyncio.run(run(args.ops, args.concurrency, args.paths.split(",")))
+    for r in results:
+        print(f"{r['path']:<7} {r['op']:<7} {r['round_trips_per_op']:>5} rt/op  {r['ops_per_s']:>8} op/s  "
+              f"mean {r['mean_ms']} ms  p99 {r['p99_ms']} ms")
+    if args.out:
+        write_results(args.out, "writes", {k: v for k, v in vars(args).items() if k != "out"}, results)
+
+
+if __name__ == "__main__":
+    main()
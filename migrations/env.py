@@ -0,0 +1,67 @@
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.models.models import Base
+from app.services.history_partitions import DEFAULT_PARTITION, partition_month
+from app.settings.config import settings
+
+# логирование из alembic.ini только для CLI: при вызове из кода (bench.harness) не трогаем чужие логгеры
+if context.config.config_file_name and context.config.cmd_opts is not None:
+    fileConfig(context.config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # помесячные партиции appeal_history живут вне моделей: их ведёт app.services.history_partitions
+    if type_ == "table" and (name == DEFAULT_PARTITION or partition_month(name) is not None):
+        return False
+    return True
+
+
+def _url() -> str:
+    # sqlalchemy.url в alembic.ini не задан: по умолчанию та же база, что у приложения
+    return context.config.get_main_option("sqlalchemy.url") or settings.DATABASE_URL
+
+
+def _configure(**kwargs) -> None:
+    context.configure(
+        target_metadata=target_metadata,
+        include_object=include_object,
+        compare_type=True,
+        # CREATE INDEX CONCURRENTLY не работает внутри транзакции: каждая миграция — своя транзакция,
+        # а индексные выходят из неё через autocommit_block()
+        transaction_per_migration=True,
+        **kwargs,
+    )
+
+
+def run_migrations_offline() -> None:
+    _configure(url=_url(), literal_binds=True, dialect_opts={"paramstyle": "named"})
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def _run_sync(connection) -> None:
+    _configure(connection=connection)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    engine = create_async_engine(_url(), poolclass=NullPool)
+    try:
+        async with engine.connect() as connection:
+            await connection.run_sync(_run_sync)
+    finally:
+        await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
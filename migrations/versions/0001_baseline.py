@@ -0,0 +1,192 @@
+"""baseline
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Схема в том виде, в каком её создавал create_all до появления миграций.
+# Существующую базу переводят под alembic командой `alembic stamp 0001`, а не upgrade.
+
+
+def _timestamps():
+    return (
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'appeal_types',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('code', sa.String(), nullable=False, unique=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.String()),
+        sa.Column('sort_order', sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        'severity_levels',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('code', sa.String(), nullable=False, unique=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        'appeal_statuses',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('code', sa.String(), nullable=False, unique=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('sort_order', sa.Integer(), nullable=False),
+    )
+    for table in ('appeal_types', 'severity_levels', 'appeal_statuses'):
+        op.create_index(f'ix_{table}_id', table, ['id'])
+
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('username', sa.String(50), nullable=False),
+        sa.Column('full_name', sa.String(100)),
+        sa.Column('email', sa.String(100), nullable=False),
+        sa.Column('phone', sa.String(20)),
+        sa.Column('password_hash', sa.String(255), nullable=False),
+        sa.Column('tg_id', sa.String(100)),
+        *_timestamps(),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    op.create_table(
+        'roles',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(50), nullable=False),
+        sa.Column('description', sa.Text()),
+        *_timestamps(),
+    )
+    op.create_index('ix_roles_id', 'roles', ['id'])
+    op.create_index('ix_roles_name', 'roles', ['name'], unique=True)
+
+    op.create_table(
+        'permissions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('code', sa.String(100), nullable=False),
+        sa.Column('description', sa.Text()),
+        *_timestamps(),
+    )
+    op.create_index('ix_permissions_id', 'permissions', ['id'])
+    op.create_index('ix_permissions_code', 'permissions', ['code'], unique=True)
+
+    op.create_table(
+        'role_permissions',
+        sa.Column('role_id', sa.Integer(), sa.ForeignKey('roles.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('permission_id', sa.Integer(), sa.ForeignKey('permissions.id', ondelete='CASCADE'),
+                  primary_key=True),
+    )
+    op.create_table(
+        'user_roles',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('role_id', sa.Integer(), sa.ForeignKey('roles.id', ondelete='CASCADE'), primary_key=True),
+    )
+
+    op.execute('CREATE SEQUENCE IF NOT EXISTS appeals_ticket_number_seq')
+    op.create_table(
+        'appeals',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('type_id', sa.Integer(), sa.ForeignKey('appeal_types.id'), nullable=False),
+        sa.Column('severity_id', sa.Integer(), sa.ForeignKey('severity_levels.id'), nullable=False),
+        sa.Column('status_id', sa.Integer(), sa.ForeignKey('appeal_statuses.id'), nullable=False),
+        sa.Column('location', sa.String(255)),
+        sa.Column('description', sa.Text()),
+        sa.Column('reporter_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='SET NULL')),
+        sa.Column('source', sa.String(50), nullable=False),
+        sa.Column('assigned_to_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='SET NULL')),
+        sa.Column('metadata', sa.JSON()),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False),
+        sa.Column('ticket_number', sa.Integer(), nullable=False,
+                  server_default=sa.text("nextval('appeals_ticket_number_seq'::regclass)")),
+    )
+
+    # changed_by_id / uploaded_by_id — uuid, а users.id — integer: такой внешний ключ Postgres не создаст,
+    # поэтому колонки без FK (триггер истории и capture_cte пишут туда uuid)
+    op.create_table(
+        'appeal_history',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('appeal_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('appeals.id', ondelete='NO ACTION')),
+        sa.Column('event_time', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('event_type', sa.String(50), nullable=False),
+        sa.Column('changed_by_id', postgresql.UUID(as_uuid=True)),
+        sa.Column('field_name', sa.String(100)),
+        sa.Column('old_value', sa.Text()),
+        sa.Column('new_value', sa.Text()),
+        sa.Column('comment', sa.Text()),
+        sa.Column('metadata', sa.JSON()),
+    )
+    op.create_table(
+        'attachments',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('appeal_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('appeals.id', ondelete='CASCADE'),
+                  nullable=False),
+        sa.Column('uploaded_by_id', postgresql.UUID(as_uuid=True)),
+        sa.Column('file_path', sa.String(1024), nullable=False),
+        sa.Column('file_name', sa.String(255)),
+        sa.Column('file_size', sa.Integer()),
+        sa.Column('content_type', sa.String(100)),
+        sa.Column('uploaded_at', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('metadata', sa.JSON()),
+    )
+
+    op.create_table(
+        'camera_hardware',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('stream_url', sa.String(), nullable=False),
+        sa.Column('ptz_enabled', sa.Boolean()),
+        sa.Column('ptz_protocol', sa.String()),
+        sa.Column('username', sa.String()),
+        sa.Column('password', sa.String()),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True)),
+    )
+    op.create_index('ix_camera_hardware_id', 'camera_hardware', ['id'])
+
+    op.create_table(
+        'images',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('filepath', sa.String(), nullable=False),
+        sa.Column('uploaded_at', sa.TIMESTAMP(timezone=True)),
+    )
+    op.create_table(
+        'building_config',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('id_build', sa.Integer(), nullable=False),
+        sa.Column('name_build', sa.Text(), nullable=False),
+        sa.Column('config', postgresql.JSONB(), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(timezone=True)),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in (
+            'building_config', 'images', 'camera_hardware', 'attachments', 'appeal_history', 'appeals',
+            'user_roles', 'role_permissions', 'permissions', 'roles', 'users',
+            'appeal_statuses', 'severity_levels', 'appeal_types',
+    ):
+        op.drop_table(table)
+    op.execute('DROP SEQUENCE IF EXISTS appeals_ticket_number_seq')
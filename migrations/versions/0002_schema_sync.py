@@ -0,0 +1,176 @@
+"""schema sync: new tables and columns, partitioned appeal_history
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 10:10:00
+
+"""
+import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.services.history_partitions import (
+    DEFAULT_PARTITION, PARENT, _today, add_months, month_start, partition_bounds, partition_name,
+)
+from app.settings.config import settings
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LEGACY = f'{PARENT}_legacy'
+HISTORY_COLUMNS = (
+    'id, appeal_id, event_time, event_type, changed_by_id, field_name, old_value, new_value, comment, metadata'
+)
+
+
+def _history_columns():
+    return [
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('appeal_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('appeals.id', ondelete='NO ACTION')),
+        sa.Column('event_time', sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column('event_type', sa.String(50), nullable=False),
+        sa.Column('changed_by_id', postgresql.UUID(as_uuid=True)),
+        sa.Column('field_name', sa.String(100)),
+        sa.Column('old_value', sa.Text()),
+        sa.Column('new_value', sa.Text()),
+        sa.Column('comment', sa.Text()),
+        sa.Column('metadata', sa.JSON()),
+    ]
+
+
+def _first_history_month():
+    # offline (--sql) данных не видно: партиции только от текущего месяца, старые строки уйдут в DEFAULT
+    current = month_start(_today())
+    if op.get_context().as_sql:
+        return current
+    first = op.get_bind().execute(sa.text(f'SELECT min(event_time) FROM {LEGACY}')).scalar()
+    return min(month_start(first.astimezone(datetime.timezone.utc).date()), current) if first else current
+
+
+def _partition_history() -> None:
+    # RENAME не трогает данные; PK переименовываем, чтобы имя освободилось для новой таблицы
+    op.rename_table(PARENT, LEGACY)
+    op.execute(f'ALTER TABLE {LEGACY} RENAME CONSTRAINT {PARENT}_pkey TO {LEGACY}_pkey')
+    op.create_table(
+        PARENT,
+        *_history_columns(),
+        sa.PrimaryKeyConstraint('id', 'event_time', name=f'{PARENT}_pkey'),
+        postgresql_partition_by='RANGE (event_time)',
+    )
+    month = _first_history_month()
+    last = add_months(month_start(_today()), settings.HISTORY_PARTITIONS_AHEAD)
+    while month <= last:
+        op.execute(f'CREATE TABLE "{partition_name(month)}" PARTITION OF {PARENT} {partition_bounds(month)}')
+        month = add_months(month, 1)
+    op.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF {PARENT} DEFAULT')
+    op.execute(f'INSERT INTO {PARENT} ({HISTORY_COLUMNS}) SELECT {HISTORY_COLUMNS} FROM {LEGACY}')
+    # индекс строим после копирования: один проход сортировки вместо вставки в индекс построчно
+    op.create_index('ix_appeal_history_appeal_event_time', PARENT, ['appeal_id', 'event_time'])
+    op.drop_table(LEGACY)
+
+
+def _unpartition_history() -> None:
+    op.rename_table(PARENT, LEGACY)
+    op.execute(f'ALTER TABLE {LEGACY} RENAME CONSTRAINT {PARENT}_pkey TO {LEGACY}_pkey')
+    op.execute('ALTER INDEX ix_appeal_history_appeal_event_time RENAME TO ix_appeal_history_legacy_appeal_event_time')
+    op.create_table(PARENT, *_history_columns(), sa.PrimaryKeyConstraint('id', name=f'{PARENT}_pkey'))
+    op.execute(f'INSERT INTO {PARENT} ({HISTORY_COLUMNS}) SELECT {HISTORY_COLUMNS} FROM {LEGACY}')
+    # партиции удаляются вместе с родителем
+    op.drop_table(LEGACY)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'image_blobs',
+        sa.Column('sha256', sa.String(64), primary_key=True),
+        sa.Column('ext', sa.String(10), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    )
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('scope', sa.String(100), primary_key=True),
+        sa.Column('key', sa.String(255), primary_key=True),
+        sa.Column('request_hash', sa.String(64), nullable=False),
+        sa.Column('status_code', sa.Integer()),
+        sa.Column('response_body', sa.LargeBinary()),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('expires_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    )
+    op.create_index('ix_idempotency_keys_expires_at', 'idempotency_keys', ['expires_at'])
+    op.create_table(
+        'appeal_stats_hourly',
+        sa.Column('bucket', sa.TIMESTAMP(timezone=True), primary_key=True),
+        sa.Column('type_id', sa.Integer(), primary_key=True),
+        sa.Column('severity_id', sa.Integer(), primary_key=True),
+        sa.Column('status_id', sa.Integer(), primary_key=True),
+        sa.Column('source', sa.String(50), primary_key=True),
+        sa.Column('created', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('delta', sa.Integer(), server_default='0', nullable=False),
+    )
+
+    # ADD COLUMN с константным DEFAULT в Postgres 11+ не переписывает таблицу
+    op.add_column('appeals', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('appeals', sa.Column('latitude', sa.Float()))
+    op.add_column('appeals', sa.Column('longitude', sa.Float()))
+    op.add_column('appeals', sa.Column('building_id', sa.Integer()))
+    op.add_column('appeals', sa.Column('floor', sa.Integer()))
+    op.add_column('building_config', sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False))
+
+    op.add_column('camera_hardware', sa.Column('status', sa.String(20)))
+    op.add_column('camera_hardware', sa.Column('latency_ms', sa.Float()))
+    op.add_column('camera_hardware', sa.Column('last_seen_at', sa.TIMESTAMP(timezone=True)))
+    op.add_column('camera_hardware', sa.Column('last_checked_at', sa.TIMESTAMP(timezone=True)))
+    # курсорная пагинация камер идёт по (created_at, id): NULL в created_at ломает сравнение кортежей
+    op.execute('UPDATE camera_hardware SET created_at = now() WHERE created_at IS NULL')
+    op.alter_column('camera_hardware', 'created_at', nullable=False, server_default=sa.text('now()'))
+
+    # keyset-лента изображений идёт по (uploaded_at, id): старые строки без даты получают время миграции
+    op.execute('UPDATE images SET uploaded_at = now() WHERE uploaded_at IS NULL')
+    op.alter_column('images', 'uploaded_at', nullable=False, server_default=sa.text('now()'))
+    op.add_column('images', sa.Column('blob_sha256', sa.String(64)))
+    op.add_column('images', sa.Column('camera_id', postgresql.UUID(as_uuid=True)))
+    op.add_column('images', sa.Column('appeal_id', postgresql.UUID(as_uuid=True)))
+    op.create_foreign_key('images_blob_sha256_fkey', 'images', 'image_blobs', ['blob_sha256'], ['sha256'],
+                          ondelete='RESTRICT')
+    op.create_foreign_key('images_camera_id_fkey', 'images', 'camera_hardware', ['camera_id'], ['id'],
+                          ondelete='SET NULL')
+    op.create_foreign_key('images_appeal_id_fkey', 'images', 'appeals', ['appeal_id'], ['id'],
+                          ondelete='SET NULL')
+
+    _partition_history()
+
+    # та же выборка, что и app.services.appeal_stats.rebuild
+    op.execute(
+        'INSERT INTO appeal_stats_hourly (bucket, type_id, severity_id, status_id, source, created, delta) '
+        "SELECT date_trunc('hour', created_at), type_id, severity_id, status_id, source, "
+        'count(*), count(*) FILTER (WHERE NOT is_deleted) '
+        'FROM appeals GROUP BY 1, 2, 3, 4, 5'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _unpartition_history()
+    for name in ('images_appeal_id_fkey', 'images_camera_id_fkey', 'images_blob_sha256_fkey'):
+        op.drop_constraint(name, 'images', type_='foreignkey')
+    for column in ('appeal_id', 'camera_id', 'blob_sha256'):
+        op.drop_column('images', column)
+    op.alter_column('images', 'uploaded_at', nullable=True, server_default=None)
+    op.alter_column('camera_hardware', 'created_at', nullable=True, server_default=None)
+    for column in ('last_checked_at', 'last_seen_at', 'latency_ms', 'status'):
+        op.drop_column('camera_hardware', column)
+    op.drop_column('building_config', 'version')
+    for column in ('floor', 'building_id', 'longitude', 'latitude', 'version'):
+        op.drop_column('appeals', column)
+    op.drop_table('appeal_stats_hourly')
+    op.drop_table('idempotency_keys')
+    op.drop_table('image_blobs')
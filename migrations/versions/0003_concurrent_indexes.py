@@ -0,0 +1,109 @@
+"""performance indexes built concurrently
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 10:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Индексы под запросы из app/crud. CONCURRENTLY не блокирует запись в таблицу на время построения,
+# но не работает в транзакции — поэтому всё внутри autocommit_block().
+INDEXES = (
+    # список обращений: WHERE is_deleted = false ORDER BY created_at DESC LIMIT n
+    ('ix_appeals_live_created_at', 'appeals', [sa.text('created_at DESC')],
+     {'postgresql_where': sa.text('NOT is_deleted')}),
+    # near/bbox: point(longitude, latitude) <@ box
+    ('ix_appeals_geo', 'appeals', [sa.text('point(longitude, latitude)')],
+     {'postgresql_using': 'gist',
+      'postgresql_where': sa.text('latitude IS NOT NULL AND longitude IS NOT NULL AND NOT is_deleted')}),
+    ('ix_appeals_building_floor', 'appeals', ['building_id', 'floor'], {}),
+    # ON DELETE SET NULL при удалении пользователя иначе сканирует все обращения
+    ('ix_appeals_reporter_id', 'appeals', ['reporter_id'], {'postgresql_where': sa.text('reporter_id IS NOT NULL')}),
+    ('ix_appeals_assigned_to_id', 'appeals', ['assigned_to_id'],
+     {'postgresql_where': sa.text('assigned_to_id IS NOT NULL')}),
+    # вложения обращения и ON DELETE CASCADE
+    ('ix_attachments_appeal_id', 'attachments', ['appeal_id'], {}),
+    # лента изображений: keyset по (uploaded_at, id), с фильтром по камере или обращению
+    ('ix_images_uploaded_at_id', 'images', ['uploaded_at', 'id'], {}),
+    ('ix_images_camera_uploaded_at_id', 'images', ['camera_id', 'uploaded_at', 'id'], {}),
+    ('ix_images_appeal_uploaded_at_id', 'images', ['appeal_id', 'uploaded_at', 'id'], {}),
+    ('ix_images_blob_sha256', 'images', ['blob_sha256'], {}),
+    # курсорная пагинация камер
+    ('ix_camera_hardware_created_at_id', 'camera_hardware', ['created_at', 'id'], {}),
+    # PK этих таблиц начинается с другой колонки: обратный поиск и каскадное удаление без индекса — seq scan
+    ('ix_role_permissions_permission_id', 'role_permissions', ['permission_id'], {}),
+    ('ix_user_roles_role_id', 'user_roles', ['role_id'], {}),
+)
+
+STREAM_URL_KEY = 'camera_hardware_stream_url_key'
+
+
+def _drop_invalid(name: str) -> None:
+    # прерванный CREATE INDEX CONCURRENTLY оставляет INVALID-индекс, и IF NOT EXISTS его бы пропустил
+    if op.get_context().as_sql:
+        return
+    invalid = op.get_bind().execute(sa.text(
+        'SELECT NOT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid '
+        'WHERE c.relname = :name'
+    ), {'name': name}).scalar()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+def _check_stream_url_duplicates() -> None:
+    # дубликаты не удаляем: у камер свои имена, учётные данные и PTZ, выбрать, какую оставить, должен оператор
+    if op.get_context().as_sql:
+        op.execute(
+            "DO $$ BEGIN IF EXISTS (SELECT 1 FROM camera_hardware GROUP BY stream_url HAVING count(*) > 1) THEN "
+            "RAISE EXCEPTION 'camera_hardware.stream_url не уникален: удалите или исправьте лишние камеры'; "
+            "END IF; END $$"
+        )
+        return
+    rows = op.get_bind().execute(sa.text(
+        'SELECT stream_url, array_agg(id::text ORDER BY created_at, id) FROM camera_hardware '
+        'GROUP BY stream_url HAVING count(*) > 1 ORDER BY stream_url'
+    )).all()
+    if rows:
+        listing = '\n'.join(f'  {stream_url}: {", ".join(ids)}' for stream_url, ids in rows)
+        raise RuntimeError(
+            f"camera_hardware.stream_url не уникален, уникальный индекс не построить. "
+            f"Удалите или исправьте лишние камеры и повторите миграцию:\n{listing}"
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _check_stream_url_duplicates()
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            _drop_invalid(name)
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+        has_key = not op.get_context().as_sql and op.get_bind().execute(sa.text(
+            'SELECT 1 FROM pg_constraint WHERE conname = :name'
+        ), {'name': STREAM_URL_KEY}).scalar()
+        if not has_key:
+            # уникальный индекс строится без блокировки, ограничение поверх него — мгновенно
+            _drop_invalid(STREAM_URL_KEY)
+            op.create_index(STREAM_URL_KEY, 'camera_hardware', ['stream_url'], unique=True,
+                            postgresql_concurrently=True, if_not_exists=True)
+            op.execute(
+                f'ALTER TABLE camera_hardware ADD CONSTRAINT {STREAM_URL_KEY} UNIQUE USING INDEX {STREAM_URL_KEY}'
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(STREAM_URL_KEY, 'camera_hardware', type_='unique')
+    with op.get_context().autocommit_block():
+        for name, _table, _columns, _kwargs in reversed(INDEXES):
+            op.drop_index(name, postgresql_concurrently=True, if_exists=True)
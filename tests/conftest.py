@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+# Settings требует POSTGRES_*; тесты к базе не подключаются, значения нужны только для импорта app
+for key, value in {
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_DB": "test",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+}.items():
+    os.environ.setdefault(key, value)
+
+
+@pytest.fixture
+def api():
+    # приложение без lifespan и без базы: get_db отдаёт None, crud подменяется в тестах через monkeypatch
+    from fastapi.testclient import TestClient
+
+    from app.database import get_db
+    from app.main import app
+
+    async def no_db():
+        yield None
+
+    app.dependency_overrides[get_db] = no_db
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.pop(get_db, None)
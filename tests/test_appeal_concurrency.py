@@ -0,0 +1,72 @@
+import datetime
+import uuid
+
+import pytest
+
+from app.core.exceptions import PreconditionFailed
+from app.routes import appeal as routes
+from app.services.config_cache import make_etag, parse_etag_version
+
+APPEAL_ID = uuid.UUID("6f1c2d3e-0000-4000-8000-000000000001")
+
+
+def appeal_row(version: int) -> dict:
+    now = datetime.datetime(2026, 10, 19, tzinfo=datetime.timezone.utc)
+    return {
+        "id": APPEAL_ID, "type_id": 1, "severity_id": 1, "status_id": 2, "source": "web",
+        "created_at": now, "updated_at": now, "ticket_number": 7, "is_deleted": False, "version": version,
+        "type_name": "Пожар", "severity_name": "Низкая", "status_name": "В работе",
+    }
+
+
+@pytest.mark.parametrize("header, expected", [
+    (f'"{APPEAL_ID}-3"', 3),
+    (f'W/"{APPEAL_ID}-12"', 12),
+    (f' W/"{APPEAL_ID}-1" ', 1),
+    ('"no-version-here"', None),
+    ('"abc-"', None),
+])
+def test_parse_etag_version(header, expected):
+    assert parse_etag_version(header) == expected
+
+
+@pytest.fixture
+def updates(monkeypatch):
+    calls = []
+
+    async def update_appeal(db, appeal_id, appeal_in, current_user_id, expected_version):
+        calls.append(expected_version)
+        if expected_version is not None and expected_version != 4:
+            raise PreconditionFailed(4)
+        return appeal_row(5)
+
+    monkeypatch.setattr(routes, "update_appeal", update_appeal)
+    return calls
+
+
+def test_if_match_passes_expected_version(api, updates):
+    resp = api.patch(f"/appeals/{APPEAL_ID}", json={"status_id": 2},
+                     headers={"If-Match": routes.appeal_etag(APPEAL_ID, 4)})
+    assert resp.status_code == 200
+    assert updates == [4]
+    assert resp.headers["etag"] == f'W/"{APPEAL_ID}-5"'
+
+
+def test_stale_if_match_returns_412_with_current_etag(api, updates):
+    resp = api.patch(f"/appeals/{APPEAL_ID}", json={"status_id": 2},
+                     headers={"If-Match": make_etag(APPEAL_ID, 2)})
+    assert resp.status_code == 412
+    assert resp.headers["etag"] == routes.appeal_etag(APPEAL_ID, 4)
+
+
+@pytest.mark.parametrize("headers", [{}, {"If-Match": "*"}])
+def test_without_precondition(api, updates, headers):
+    resp = api.patch(f"/appeals/{APPEAL_ID}", json={"status_id": 2}, headers=headers)
+    assert resp.status_code == 200
+    assert updates == [None]
+
+
+def test_malformed_if_match(api, updates):
+    resp = api.patch(f"/appeals/{APPEAL_ID}", json={"status_id": 2}, headers={"If-Match": "garbage"})
+    assert resp.status_code == 400
+    assert updates == []
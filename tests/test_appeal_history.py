@@ -0,0 +1,14 @@
+import re
+
+from app.services import appeal_history
+
+
+def test_trigger_tracks_same_fields():
+    sql = appeal_history.TRIGGER_SQL.read_text()
+    fields = re.findall(r"\('(\w+)', OLD\.", sql)
+    assert tuple(fields) == appeal_history.TRACKED_FIELDS
+
+
+def test_coordinates_and_building_tracked():
+    for name in ("latitude", "longitude", "building_id", "floor"):
+        assert name in appeal_history.TRACKED_FIELDS
@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _postgres_available() -> bool:
+    from bench.harness import _pg_bindir
+
+    if os.environ.get("HARNESS_POSTGRES_URL"):
+        return True
+    try:
+        _pg_bindir()
+    except RuntimeError:
+        return False
+    return True
+
+
+@pytest.mark.skipif(not _postgres_available(), reason="нужны бинарники PostgreSQL или HARNESS_POSTGRES_URL")
+def test_endpoint_budgets(tmp_path):
+    # харнесс должен подменить DATABASE_URL до импорта app.database, а в этом процессе app уже импортирован,
+    # поэтому бюджеты проверяются отдельным процессом
+    out = tmp_path / "harness.json"
+    proc = subprocess.run(
+        [sys.executable, "-m", "bench.harness", "--appeals", "50", "--requests", "20", "--ws-clients", "5",
+         "--out", str(out)],
+        cwd=ROOT, capture_output=True, text=True, timeout=600,
+    )
+    assert out.exists(), proc.stderr
+    over = [r for r in json.loads(out.read_text())["results"] if "queries" in r and not r["ok"]]
+    assert not over, "\n".join(
+        f"{r['name']}: {r['queries']}/{r['max_queries']} queries, p95 {r['p95_ms']}/{r['p95_budget_ms']} ms, "
+        f"errors {r['errors']}" for r in over
+    )
+    assert proc.returncode == 0, proc.stdout + proc.stderr
@@ -0,0 +1,66 @@
+import datetime
+import uuid
+
+import pytest
+
+import app.crud.building_config as crud
+from app.core.exceptions import PreconditionFailed
+from app.services.config_cache import make_etag
+from app.services.json_patch import apply_patch
+
+CONFIG_ID = uuid.UUID("6f1c2d3e-0000-4000-8000-000000000003")
+DOC = {"floors": {"1": {"cameras": 2}}, "name": "A"}
+
+
+@pytest.fixture
+def patches(monkeypatch):
+    calls = []
+
+    async def patch_config(db, config_id, ops=None, merge=None, expected_version=None):
+        calls.append({"ops": ops, "merge": merge, "expected_version": expected_version})
+        if expected_version is not None and expected_version != 7:
+            raise PreconditionFailed(7)
+        if ops is not None:
+            apply_patch(DOC, ops)
+        return {"id": config_id, "version": 8, "updated_at": datetime.datetime(2026, 10, 19)}
+
+    monkeypatch.setattr(crud, "patch_config", patch_config)
+    return calls
+
+
+def _patch(api, body, headers=None, content_type="application/json-patch+json"):
+    return api.patch(f"/building-configs/{CONFIG_ID}", json=body,
+                     headers={"Content-Type": content_type, **(headers or {})})
+
+
+def test_json_patch_with_if_match(api, patches):
+    resp = _patch(api, [{"op": "replace", "path": "/name", "value": "B"}], {"If-Match": make_etag(CONFIG_ID, 7)})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] == make_etag(CONFIG_ID, 8)
+    assert patches[0]["expected_version"] == 7
+
+
+def test_stale_if_match_returns_412(api, patches):
+    resp = _patch(api, [{"op": "replace", "path": "/name", "value": "B"}], {"If-Match": make_etag(CONFIG_ID, 6)})
+    assert resp.status_code == 412
+    assert resp.headers["etag"] == make_etag(CONFIG_ID, 7)
+
+
+def test_merge_patch_content_type(api, patches):
+    resp = _patch(api, {"name": None}, content_type="application/merge-patch+json")
+    assert resp.status_code == 200
+    assert patches[0]["merge"] == {"name": None} and patches[0]["ops"] is None
+
+
+@pytest.mark.parametrize("ops, status", [
+    ([{"op": "test", "path": "/name", "value": "Z"}], 409),
+    ([{"op": "remove", "path": "/name"}, {"op": "replace", "path": "/name", "value": "B"}], 422),
+    ([{"op": "remove", "path": "/floors/1"}, {"op": "add", "path": "/floors/1/cameras", "value": 1}], 422),
+])
+def test_patch_errors(api, patches, ops, status):
+    assert _patch(api, ops).status_code == status
+
+
+def test_malformed_if_match(api, patches):
+    assert _patch(api, [], {"If-Match": "junk"}).status_code == 400
+    assert patches == []
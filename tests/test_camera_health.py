@@ -0,0 +1,181 @@
+import asyncio
+import contextlib
+import uuid
+
+import pytest
+
+from app.services import camera_health
+from app.services.camera_health import OFFLINE, ONLINE, CameraHealthScheduler, CameraState, probe
+
+
+@contextlib.asynccontextmanager
+async def stub_server(response: bytes):
+    # отвечает на первую строку запроса заранее заданным ответом и закрывает соединение
+    async def handle(reader, writer):
+        await reader.readline()
+        writer.write(response)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    try:
+        yield server.sockets[0].getsockname()[1]
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def _free_port() -> int:
+    import socket
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_rtsp_online_and_unauthorized():
+    async def run():
+        async with stub_server(b"RTSP/1.0 200 OK\r\nCSeq: 1\r\n\r\n") as port:
+            ok = await probe(f"rtsp://127.0.0.1:{port}/stream", 1.0)
+        async with stub_server(b"RTSP/1.0 401 Unauthorized\r\nCSeq: 1\r\n\r\n") as port:
+            auth = await probe(f"rtsp://127.0.0.1:{port}/stream", 1.0)
+        async with stub_server(b"garbage\r\n") as port:
+            bad = await probe(f"rtsp://127.0.0.1:{port}/stream", 1.0)
+        return ok, auth, bad
+
+    ok, auth, bad = asyncio.run(run())
+    assert ok.ok and ok.latency_ms is not None
+    assert auth.ok
+    assert not bad.ok and bad.error == "bad response"
+
+
+def test_http_status():
+    async def run():
+        body = b"HTTP/1.1 %d X\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+        async with stub_server(body % 200) as port:
+            ok = await probe(f"http://127.0.0.1:{port}/mjpeg", 1.0)
+        async with stub_server(body % 503) as port:
+            down = await probe(f"http://127.0.0.1:{port}/mjpeg", 1.0)
+        return ok, down
+
+    ok, down = asyncio.run(run())
+    assert ok.ok
+    assert not down.ok
+
+
+def test_refused_connection():
+    result = asyncio.run(probe(f"rtsp://127.0.0.1:{_free_port()}/stream", 1.0))
+    assert not result.ok and result.error
+
+
+@pytest.mark.parametrize("url", [
+    "rtsp://camera:99999/stream",
+    "rtsp://camera:port/stream",
+    "http://[::1/stream",
+    "http://exa mple.com:80/x",
+    "not a url",
+])
+def test_malformed_url_does_not_raise(url):
+    result = asyncio.run(probe(url, 0.5))
+    assert not result.ok and result.error
+
+
+def test_probe_crash_reschedules_camera(monkeypatch):
+    async def boom(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(camera_health, "probe", boom)
+
+    async def run():
+        scheduler = CameraHealthScheduler(interval=10, max_backoff=100)
+        state = CameraState(uuid.uuid4(), "rtsp://camera/stream", status=ONLINE)
+        scheduler.states[state.camera_id] = state
+        await scheduler._run_probe(state)
+        return scheduler, state
+
+    scheduler, state = asyncio.run(run())
+    assert state.status == OFFLINE
+    assert state.failures == 1
+    assert scheduler._heap == [(state.next_due, state.camera_id)]
+    assert state.camera_id in scheduler._dirty
+
+
+def test_status_change_is_published_with_flush(monkeypatch):
+    import app.crud.camera_hardware
+    import app.database
+
+    saved = []
+
+    class Session:
+        async def __aenter__(self):
+            return None
+
+        async def __aexit__(self, *exc):
+            return False
+
+    async def save(db, rows, events=()):
+        saved.append((rows, list(events)))
+
+    async def ok(*args, **kwargs):
+        return camera_health.ProbeResult(True, latency_ms=1.0)
+
+    monkeypatch.setattr(camera_health, "probe", ok)
+    monkeypatch.setattr(app.crud.camera_hardware, "save_camera_statuses", save)
+    monkeypatch.setattr(app.database, "AsyncSessionLocal", Session)
+
+    async def run():
+        scheduler = CameraHealthScheduler(interval=10)
+        state = CameraState(uuid.uuid4(), "rtsp://camera/stream", status=OFFLINE)
+        scheduler.states[state.camera_id] = state
+        await scheduler._run_probe(state)
+        # смена статуса будит цикл сохранения, не дожидаясь flush_interval
+        assert scheduler._flush_now.is_set()
+        await scheduler.flush()
+        # без смены статуса событие не публикуется
+        await scheduler._run_probe(state)
+        await scheduler.flush()
+        return state
+
+    state = asyncio.run(run())
+    (rows, events), (rows2, events2) = saved
+    assert [r["status"] for r in rows] == [ONLINE]
+    assert len(events) == 1 and events[0]["event_type"] == "camera_status"
+    camera = events[0]["camera"]
+    assert camera["last_seen_at"]
+    assert {k: v for k, v in camera.items() if k != "last_seen_at"} == {
+        "id": str(state.camera_id), "name": None, "status": ONLINE, "previous_status": OFFLINE,
+        "latency_ms": 1.0, "error": None,
+    }
+    assert rows2 and events2 == []
+
+
+def test_notifications_are_broadcast_locally(monkeypatch):
+    import json
+
+    from app.services import camera_events
+    from app.ws_manager import manager
+
+    received = []
+
+    async def broadcast(message):
+        received.append(message)
+
+    async def idle():
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(manager, "broadcast", broadcast)
+    monkeypatch.setattr(camera_events, "_listen_loop", idle)
+
+    async def run():
+        await camera_events.start()
+        try:
+            camera_events._on_notify(None, 1, camera_events.CHANNEL, json.dumps({"event_type": "camera_status"}))
+            for _ in range(100):
+                if received:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await camera_events.stop()
+
+    asyncio.run(run())
+    assert received == [{"event_type": "camera_status"}]
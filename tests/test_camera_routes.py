@@ -0,0 +1,59 @@
+import datetime
+import types
+import uuid
+
+import pytest
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.routes import camera_hardware
+
+
+def _camera(i):
+    return types.SimpleNamespace(
+        id=uuid.UUID(int=i), name=f"cam {i}", stream_url=f"rtsp://cam/{i}", ptz_enabled=False,
+        ptz_protocol=None, username=None, password=None,
+        created_at=datetime.datetime(2026, 10, 1, tzinfo=datetime.timezone.utc) + datetime.timedelta(minutes=i),
+        status=None, latency_ms=None, last_seen_at=None, last_checked_at=None,
+    )
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    recorded = []
+
+    async def get_cameras(db, limit=100, after=None, skip=0):
+        recorded.append({"limit": limit, "after": after, "skip": skip})
+        return [_camera(skip + i) for i in range(limit)]
+
+    monkeypatch.setattr(camera_hardware, "get_cameras", get_cameras)
+    return recorded
+
+
+def test_skip_still_supported(api, calls):
+    resp = api.get("/cameras/", params={"skip": 20, "limit": 2})
+    assert resp.status_code == 200
+    assert calls == [{"limit": 2, "after": None, "skip": 20}]
+    assert [c["name"] for c in resp.json()] == ["cam 20", "cam 21"]
+    # курсор отдаётся и на OFFSET-странице, чтобы клиент мог перейти на него
+    last = _camera(21)
+    assert decode_cursor(resp.headers["X-Next-Cursor"]) == (last.created_at, last.id)
+
+
+def test_cursor_page(api, calls):
+    first = _camera(5)
+    cursor = encode_cursor(first.created_at, first.id)
+    resp = api.get("/cameras/", params={"cursor": cursor, "limit": 3})
+    assert resp.status_code == 200
+    assert calls == [{"limit": 3, "after": (first.created_at, first.id), "skip": 0}]
+
+
+def test_cursor_and_skip_together_rejected(api, calls):
+    first = _camera(5)
+    resp = api.get("/cameras/", params={"cursor": encode_cursor(first.created_at, first.id), "skip": 10})
+    assert resp.status_code == 400
+    assert calls == []
+
+
+def test_skip_is_marked_deprecated(api):
+    params = {p["name"]: p for p in api.get("/openapi.json").json()["paths"]["/cameras/"]["get"]["parameters"]}
+    assert params["skip"].get("deprecated") is True
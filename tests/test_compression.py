@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from app.middleware.compression import CompressionMiddleware, choose_encoding, decompress
+
+BODY = b'{"items": "' + b"x" * 4096 + b'"}'
+
+
+@pytest.mark.parametrize("header, preferred, expected", [
+    ("gzip, br", ["br", "gzip"], "br"),
+    ("gzip, br", ["gzip", "br"], "gzip"),
+    ("br;q=0.5, gzip", ["br", "gzip"], "gzip"),
+    ("br;q=0, gzip;q=0", ["br", "gzip"], None),
+    ("identity", ["br", "gzip"], None),
+    ("*", ["br", "gzip"], "br"),
+    ("*;q=0.1, gzip;q=0.5", ["br", "gzip"], "gzip"),
+    ("GZIP", ["gzip"], "gzip"),
+    ("gzip;q=abc, br", ["gzip", "br"], "br"),
+    ("", ["gzip"], None),
+])
+def test_choose_encoding(header, preferred, expected):
+    assert choose_encoding(header, preferred) == expected
+
+
+def _app(body: bytes, content_type: str = "application/json", status: int = 200, headers=None):
+    async def app(scope, receive, send):
+        raw = [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())]
+        raw += [(k.encode(), v.encode()) for k, v in (headers or {}).items()]
+        await send({"type": "http.response.start", "status": status, "headers": raw})
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+
+def _call(app, accept_encoding: str = "gzip", method: str = "GET") -> tuple[dict, bytes]:
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(CompressionMiddleware(app, encodings=["gzip"])(scope, receive, send))
+    headers = {k.decode(): v.decode() for k, v in messages[0]["headers"]}
+    return headers, b"".join(m.get("body", b"") for m in messages[1:])
+
+
+def test_compresses_large_json():
+    headers, body = _call(_app(BODY))
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(body)
+    assert decompress(body, "gzip") == BODY
+
+
+def test_small_body_and_no_accept_encoding_pass_through():
+    headers, body = _call(_app(b"{}"))
+    assert "content-encoding" not in headers and body == b"{}"
+    headers, body = _call(_app(BODY), accept_encoding="identity")
+    assert "content-encoding" not in headers and body == BODY
+
+
+@pytest.mark.parametrize("content_type", ["image/jpeg", "application/zip", "text/event-stream"])
+def test_skip_list(content_type):
+    headers, body = _call(_app(BODY, content_type=content_type))
+    assert "content-encoding" not in headers and body == BODY
+
+
+def test_skips_not_modified_and_encoded():
+    headers, _ = _call(_app(b"", status=304))
+    assert "content-encoding" not in headers
+    headers, body = _call(_app(BODY, headers={"content-encoding": "br"}))
+    assert headers["content-encoding"] == "br" and body == BODY
+
+
+def test_compressed_body_gets_weak_etag():
+    headers, _ = _call(_app(BODY, headers={"etag": '"abc-3"'}))
+    assert headers["etag"] == 'W/"abc-3"'
+    headers, _ = _call(_app(BODY, headers={"etag": 'W/"abc-3"'}))
+    assert headers["etag"] == 'W/"abc-3"'
+    headers, _ = _call(_app(b"{}", headers={"etag": '"abc-3"'}))
+    assert headers["etag"] == '"abc-3"'
+
+
+@pytest.mark.parametrize("extension", [
+    {"type": "http.response.pathsend", "path": "/tmp/file.json"},
+    {"type": "http.response.zerocopysend", "file": None, "more_body": False},
+])
+def test_extension_message_gets_start_first(extension):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", b"5000")]})
+        await send(extension)
+
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app, encodings=["gzip"])(scope, receive, send))
+    assert [m["type"] for m in messages] == ["http.response.start", extension["type"]]
+    # тело уходит мимо компрессора — заголовки остаются от несжатого ответа
+    headers = dict(messages[0]["headers"])
+    assert b"content-encoding" not in headers and headers[b"content-length"] == b"5000"
@@ -0,0 +1,76 @@
+import datetime
+import uuid
+
+import pytest
+
+from app.routes import appeal as routes
+from app.services.static_files import etag_matches
+
+APPEAL_ID = uuid.UUID("6f1c2d3e-0000-4000-8000-000000000002")
+
+
+@pytest.mark.parametrize("header, etag, expected", [
+    (None, '"a"', False),
+    ("", '"a"', False),
+    ("*", '"a"', True),
+    ('"a"', '"a"', True),
+    ('W/"a"', '"a"', True),
+    ('"a"', 'W/"a"', True),
+    ('"x", W/"a"', 'W/"a"', True),
+    ('"b"', '"a"', False),
+    ('"a-1"', '"a-10"', False),
+])
+def test_etag_matches(header, etag, expected):
+    assert etag_matches(header, etag) is expected
+
+
+def test_history_etag_changes_with_count_and_time():
+    t = datetime.datetime(2026, 10, 19, 12, tzinfo=datetime.timezone.utc)
+    base = routes.history_etag(APPEAL_ID, 3, t)
+    assert base.startswith('W/"')
+    assert routes.history_etag(APPEAL_ID, 4, t) != base
+    assert routes.history_etag(APPEAL_ID, 3, t + datetime.timedelta(microseconds=1)) != base
+    assert routes.history_etag(APPEAL_ID, 0, None) == f'W/"{APPEAL_ID}-h0-0"'
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    calls = []
+
+    async def get_appeal_version(db, appeal_id):
+        calls.append("version")
+        return 3
+
+    async def get_appeal(db, appeal_id):
+        calls.append("full")
+        return None
+
+    async def get_appeal_history_marker(db, appeal_id):
+        calls.append("marker")
+        return 2, datetime.datetime(2026, 10, 19, tzinfo=datetime.timezone.utc)
+
+    for fn in (get_appeal_version, get_appeal, get_appeal_history_marker):
+        monkeypatch.setattr(routes, fn.__name__, fn)
+    return calls
+
+
+def test_appeal_304_skips_full_load(api, reads):
+    resp = api.get(f"/appeals/{APPEAL_ID}", headers={"If-None-Match": routes.appeal_etag(APPEAL_ID, 3)})
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == routes.appeal_etag(APPEAL_ID, 3)
+    assert reads == ["version"]
+
+
+def test_appeal_stale_etag_loads_object(api, reads):
+    resp = api.get(f"/appeals/{APPEAL_ID}", headers={"If-None-Match": routes.appeal_etag(APPEAL_ID, 2)})
+    # заглушка get_appeal возвращает None — важно лишь, что дошли до полной загрузки
+    assert resp.status_code == 404
+    assert reads == ["version", "full"]
+
+
+def test_history_304(api, reads):
+    etag = routes.history_etag(APPEAL_ID, 2, datetime.datetime(2026, 10, 19, tzinfo=datetime.timezone.utc))
+    resp = api.get(f"/appeals/{APPEAL_ID}/history", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == etag
+    assert reads == ["marker"]
@@ -0,0 +1,123 @@
+import asyncio
+import datetime
+
+from app.services import history_partitions as hp
+
+
+class _Result:
+    def __init__(self, values):
+        self._values = values
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return list(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+
+class FakeConn:
+    def __init__(self, partitions, default_months=()):
+        self.partitions = partitions
+        self.default_months = default_months
+        self.statements: list[str] = []
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt)
+        if "pg_inherits" in sql:
+            return _Result(self.partitions)
+        if "date_trunc" in sql:
+            return _Result(self.default_months)
+        self.statements.append(sql)
+        return _Result([])
+
+
+def _ensure(conn, today=datetime.date(2026, 10, 19)):
+    return asyncio.run(hp.ensure_partitions(conn, ahead=1, today=today))
+
+
+def test_partition_bounds_are_utc():
+    assert hp.partition_bounds(datetime.date(2026, 12, 1)) == (
+        "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')"
+    )
+
+
+def test_months_are_created_before_default():
+    conn = FakeConn([])
+    created = _ensure(conn)
+    assert created == ["appeal_history_y2026m10", "appeal_history_y2026m11", hp.DEFAULT_PARTITION]
+    assert "DEFAULT" in conn.statements[-1]
+    assert all("DETACH" not in s for s in conn.statements)
+
+
+def test_existing_partitions_are_skipped():
+    conn = FakeConn(["appeal_history_y2026m10", "appeal_history_y2026m11", hp.DEFAULT_PARTITION])
+    assert _ensure(conn) == []
+    assert conn.statements == []
+
+
+def test_default_rows_are_moved_into_their_month():
+    conn = FakeConn(
+        ["appeal_history_y2026m10", hp.DEFAULT_PARTITION],
+        default_months=[datetime.datetime(2026, 11, 1), datetime.datetime(2025, 3, 1)],
+    )
+    created = _ensure(conn)
+    # старый месяц из DEFAULT тоже получает партицию, чтобы его увидел retention
+    assert created == ["appeal_history_y2025m03", "appeal_history_y2026m11"]
+    kinds = [s.split()[0] + " " + s.split()[1] for s in conn.statements]
+    assert kinds == ["ALTER TABLE", "CREATE TABLE", "INSERT INTO", "DELETE FROM", "ALTER TABLE"] * 2
+    assert "DETACH PARTITION" in conn.statements[0] and "ATTACH PARTITION" in conn.statements[4]
+    assert "'2025-03-01 00:00:00+00'" in conn.statements[3]
+
+
+class FakeEngine:
+    def __init__(self, log, partitions):
+        self.log = log
+        self.partitions = partitions
+
+    def _cm(self, kind):
+        engine = self
+
+        class _Ctx:
+            async def __aenter__(self):
+                conn = FakeConn(engine.partitions)
+                conn.kind = kind
+                engine.log.append(("open", kind, conn))
+                return conn
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Ctx()
+
+    def connect(self):
+        return self._cm("connect")
+
+    def begin(self):
+        return self._cm("begin")
+
+
+def test_retention_archives_before_detach(monkeypatch, tmp_path):
+    import app.database
+
+    log = []
+    engine = FakeEngine(log, ["appeal_history_y2025m01", "appeal_history_y2026m10"])
+    monkeypatch.setattr(app.database, "async_engine", engine)
+
+    async def archive(conn, name, archive_dir=None):
+        log.append(("archive", conn.kind, list(conn.statements)))
+        return tmp_path / f"{name}.csv.gz"
+
+    monkeypatch.setattr(hp, "archive_partition", archive)
+    archived = asyncio.run(hp.apply_retention(retention_months=6, today=datetime.date(2026, 10, 19)))
+
+    assert archived == ["appeal_history_y2025m01"]
+    archive_at = next(i for i, e in enumerate(log) if e[0] == "archive")
+    # COPY идёт без транзакции с DETACH: блокировка на appeal_history держится только на время DETACH и DROP
+    assert log[archive_at][1] == "connect" and log[archive_at][2] == []
+    detach_conn = log[archive_at + 1][2]
+    assert log[archive_at + 1][1] == "begin"
+    assert [s.split()[0] for s in detach_conn.statements] == ["SET", "ALTER", "DROP"]
+    assert "lock_timeout" in detach_conn.statements[0]
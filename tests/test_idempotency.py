@@ -0,0 +1,164 @@
+import asyncio
+import types
+
+import pytest
+from fastapi import Response
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import IdempotencyKeyInProgress, IdempotencyKeyReused
+from app.services import idempotency
+from app.services.idempotency import REPLAY_HEADER, ResponseCache, fingerprint, run_once
+
+
+class FakeDB:
+    def __init__(self):
+        self.rollbacks = 0
+        self.sync_session = Session()
+
+    async def commit(self):
+        self.sync_session.commit()
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeStore:
+    # таблица idempotency_keys в памяти с тем же контрактом, что у app.crud.idempotency
+    def __init__(self):
+        self.rows: dict[tuple[str, str], types.SimpleNamespace] = {}
+        self.released: list[tuple[str, str]] = []
+
+    async def claim_key(self, db, scope, key, request_hash, lock_timeout):
+        if (scope, key) in self.rows:
+            return False
+        self.rows[(scope, key)] = types.SimpleNamespace(request_hash=request_hash, status_code=None, response_body=None)
+        return True
+
+    async def get_key(self, db, scope, key):
+        return self.rows.get((scope, key))
+
+    async def complete_key(self, db, scope, key, status_code, body, ttl):
+        row = self.rows[(scope, key)]
+        row.status_code, row.response_body = status_code, body
+
+    async def release_key(self, db, scope, key):
+        self.released.append((scope, key))
+        self.rows.pop((scope, key), None)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeStore()
+    for name in ("claim_key", "get_key", "complete_key", "release_key"):
+        monkeypatch.setattr(idempotency.crud, name, getattr(store, name))
+    monkeypatch.setattr(idempotency, "response_cache", ResponseCache(100))
+    return store
+
+
+def _handler(calls: list, status_code: int = 201):
+    async def handler():
+        calls.append(1)
+        return Response(content=b'{"id": %d}' % len(calls), status_code=status_code, media_type="application/json")
+    return handler
+
+
+def _run(db, key, body, handler):
+    return asyncio.run(run_once(db, "POST /appeals/", key, body, handler))
+
+
+def test_first_call_runs_handler_and_replays(store):
+    calls = []
+    first = _run(FakeDB(), "k1", b'{"a": 1}', _handler(calls))
+    again = _run(FakeDB(), "k1", b'{"a": 1}', _handler(calls))
+    assert calls == [1]
+    assert first.status_code == again.status_code == 201
+    assert again.body == first.body
+    assert again.headers[REPLAY_HEADER] == "true"
+    assert REPLAY_HEADER not in first.headers
+
+
+def test_replay_from_store_when_cache_is_cold(store, monkeypatch):
+    calls = []
+    _run(FakeDB(), "k1", b"{}", _handler(calls))
+    # другой воркер: кэш пуст, ответ берётся из таблицы
+    monkeypatch.setattr(idempotency, "response_cache", ResponseCache(100))
+    replay = _run(FakeDB(), "k1", b"{}", _handler(calls))
+    assert calls == [1]
+    assert replay.headers[REPLAY_HEADER] == "true"
+    assert replay.body == b'{"id": 1}'
+
+
+def test_key_reused_with_other_body(store, monkeypatch):
+    _run(FakeDB(), "k1", b'{"a": 1}', _handler([]))
+    with pytest.raises(IdempotencyKeyReused):
+        _run(FakeDB(), "k1", b'{"a": 2}', _handler([]))
+    monkeypatch.setattr(idempotency, "response_cache", ResponseCache(100))
+    with pytest.raises(IdempotencyKeyReused):
+        _run(FakeDB(), "k1", b'{"a": 2}', _handler([]))
+
+
+def test_in_progress_conflict(store):
+    store.rows[("POST /appeals/", "k1")] = types.SimpleNamespace(
+        request_hash=fingerprint(b"{}"), status_code=None, response_body=None
+    )
+    with pytest.raises(IdempotencyKeyInProgress):
+        _run(FakeDB(), "k1", b"{}", _handler([]))
+    with pytest.raises(IdempotencyKeyReused):
+        _run(FakeDB(), "k1", b'{"other": 1}', _handler([]))
+
+
+def test_failed_handler_releases_key(store):
+    async def failing():
+        raise RuntimeError("db down")
+
+    db = FakeDB()
+    with pytest.raises(RuntimeError):
+        _run(db, "k1", b"{}", failing)
+    assert db.rollbacks == 1
+    assert store.released == [("POST /appeals/", "k1")]
+    calls = []
+    retried = _run(FakeDB(), "k1", b"{}", _handler(calls))
+    assert calls == [1] and REPLAY_HEADER not in retried.headers
+
+
+def test_failure_after_commit_keeps_key(store):
+    calls = []
+
+    async def commit_then_fail():
+        calls.append(1)
+        await db.commit()
+        raise RuntimeError("serialization failed")
+
+    db = FakeDB()
+    with pytest.raises(RuntimeError):
+        _run(db, "k1", b"{}", commit_then_fail)
+    # обращение уже создано: ключ не освобождается, повтор получает ошибку, а не второе обращение
+    assert store.released == []
+    retried = _run(FakeDB(), "k1", b"{}", _handler(calls))
+    assert calls == [1]
+    assert retried.status_code == 500 and retried.headers[REPLAY_HEADER] == "true"
+
+
+def test_commit_listener_is_removed(store):
+    db = FakeDB()
+    _run(db, "k1", b"{}", _handler([]))
+    assert not db.sync_session.dispatch.after_commit
+    with pytest.raises(RuntimeError):
+        _run(db, "k2", b"{}", _failing)
+    assert not db.sync_session.dispatch.after_commit
+
+
+async def _failing():
+    raise RuntimeError("db down")
+
+
+def test_response_cache_eviction_and_expiry(monkeypatch):
+    cache = ResponseCache(2)
+    now = [100.0]
+    monkeypatch.setattr(idempotency.time, "monotonic", lambda: now[0])
+    for key in ("a", "b", "c"):
+        cache.put("s", key, idempotency.StoredResponse("h", 201, b"", 110.0))
+    assert cache.get("s", "a") is None
+    assert cache.get("s", "c") is not None
+    now[0] = 111.0
+    assert cache.get("s", "c") is None
@@ -0,0 +1,98 @@
+import pytest
+
+from app.services.json_patch import (
+    JsonPatchConflict,
+    JsonPatchError,
+    apply_merge_patch,
+    apply_patch,
+    sql_compatible,
+    validate_ops,
+)
+
+
+def test_add_replace_remove():
+    doc = {"a": 1, "b": {"c": [1, 2]}}
+    result = apply_patch(doc, [
+        {"op": "add", "path": "/d", "value": {"e": 1}},
+        {"op": "replace", "path": "/a", "value": 2},
+        {"op": "remove", "path": "/b/c/0"},
+        {"op": "add", "path": "/b/c/-", "value": 3},
+    ])
+    assert result == {"a": 2, "b": {"c": [2, 3]}, "d": {"e": 1}}
+    assert doc == {"a": 1, "b": {"c": [1, 2]}}
+
+
+def test_move_copy_test():
+    doc = {"a": {"x": 1}, "b": []}
+    result = apply_patch(doc, [
+        {"op": "copy", "from": "/a/x", "path": "/b/0"},
+        {"op": "move", "from": "/a", "path": "/c"},
+        {"op": "test", "path": "/c/x", "value": 1},
+    ])
+    assert result == {"b": [1], "c": {"x": 1}}
+    with pytest.raises(JsonPatchConflict):
+        apply_patch(doc, [{"op": "test", "path": "/a/x", "value": 2}])
+    with pytest.raises(JsonPatchError):
+        apply_patch(doc, [{"op": "move", "from": "/a", "path": "/a/y"}])
+
+
+def test_escaped_pointer():
+    assert apply_patch({"a/b": 1, "m~n": 2}, [
+        {"op": "replace", "path": "/a~1b", "value": 3},
+        {"op": "remove", "path": "/m~0n"},
+    ]) == {"a/b": 3}
+
+
+@pytest.mark.parametrize("ops", [
+    [{"op": "remove", "path": "/x"}, {"op": "replace", "path": "/x", "value": 1}],
+    [{"op": "remove", "path": "/a"}, {"op": "add", "path": "/a/b", "value": 1}],
+    [{"op": "remove", "path": "/x"}, {"op": "remove", "path": "/x"}],
+    [{"op": "replace", "path": "/missing/deep", "value": 1}],
+    [{"op": "remove", "path": "/arr/5"}],
+])
+def test_invalid_sequences_raise(ops):
+    with pytest.raises(JsonPatchError):
+        apply_patch({"a": 1, "x": 1, "arr": [1]}, ops)
+
+
+def test_validate_ops():
+    with pytest.raises(JsonPatchError):
+        validate_ops({"op": "add"})
+    with pytest.raises(JsonPatchError):
+        validate_ops([{"op": "add", "path": "/a"}])
+    with pytest.raises(JsonPatchError):
+        validate_ops([{"op": "move", "path": "/a"}])
+    with pytest.raises(JsonPatchError):
+        validate_ops([{"op": "add", "path": "a", "value": 1}])
+
+
+def test_merge_patch():
+    doc = {"a": {"b": 1, "c": 2}, "d": 3}
+    assert apply_merge_patch(doc, {"a": {"b": None, "e": 4}, "d": [1]}) == {"a": {"c": 2, "e": 4}, "d": [1]}
+    assert apply_merge_patch(doc, "x") == "x"
+
+
+@pytest.mark.parametrize("ops", [
+    [{"op": "add", "path": "/a", "value": 1}, {"op": "replace", "path": "/b/c", "value": 2}],
+    [{"op": "remove", "path": "/a"}, {"op": "remove", "path": "/b"}],
+    [{"op": "replace", "path": "/arr/0", "value": 1}, {"op": "replace", "path": "/arr/1", "value": 2}],
+])
+def test_sql_compatible_independent_ops(ops):
+    assert sql_compatible(ops)
+
+
+@pytest.mark.parametrize("ops", [
+    # SQL проверял бы существование /x по исходному документу и молча пропустил бы replace
+    [{"op": "remove", "path": "/x"}, {"op": "replace", "path": "/x", "value": 1}],
+    # add в удалённый объект в SQL терялся бы без ошибки
+    [{"op": "remove", "path": "/a"}, {"op": "add", "path": "/a/b", "value": 1}],
+    [{"op": "add", "path": "/a", "value": {}}, {"op": "add", "path": "/a/b", "value": 1}],
+    [{"op": "replace", "path": "/a/b", "value": 1}, {"op": "remove", "path": "/a"}],
+    # удаление из массива сдвигает индексы соседей
+    [{"op": "remove", "path": "/arr/0"}, {"op": "replace", "path": "/arr/1", "value": 1}],
+    [{"op": "add", "path": "/arr/-", "value": 1}],
+    [{"op": "move", "from": "/a", "path": "/b"}],
+    [{"op": "replace", "path": "", "value": {}}],
+])
+def test_sql_compatible_falls_back_to_python(ops):
+    assert not sql_compatible(ops)
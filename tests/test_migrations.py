@@ -0,0 +1,53 @@
+import importlib.util
+import os
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load(name):
+    path = os.path.join(ROOT, "migrations", "versions", name)
+    spec = importlib.util.spec_from_file_location(name[:-3], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeOp:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def get_context(self):
+        return types.SimpleNamespace(as_sql=False)
+
+    def get_bind(self):
+        rows = self.rows
+
+        class Bind:
+            def execute(self, stmt, params=None):
+                return types.SimpleNamespace(all=lambda: rows)
+
+        return Bind()
+
+    def execute(self, sql):
+        self.executed.append(sql)
+
+
+def test_stream_url_duplicates_stop_migration(monkeypatch):
+    m = _load("0003_concurrent_indexes.py")
+    fake = FakeOp([("rtsp://cam/1", ["a", "b"]), ("rtsp://cam/2", ["c", "d", "e"])])
+    monkeypatch.setattr(m, "op", fake)
+    with pytest.raises(RuntimeError) as e:
+        m._check_stream_url_duplicates()
+    # оператору нужны и адреса, и id всех камер — удаления в миграции нет
+    assert "rtsp://cam/1: a, b" in str(e.value) and "rtsp://cam/2: c, d, e" in str(e.value)
+    assert not any("DELETE" in s for s in fake.executed)
+
+
+def test_no_duplicates_passes(monkeypatch):
+    m = _load("0003_concurrent_indexes.py")
+    monkeypatch.setattr(m, "op", FakeOp([]))
+    m._check_stream_url_duplicates()
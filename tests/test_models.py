@@ -0,0 +1,7 @@
+from app.models.models import AppealHistory, Attachment
+
+
+def test_user_uuid_columns_have_no_foreign_key():
+    # users.id — integer: такой ключ Postgres не создаст, и в миграциях его нет
+    assert not AppealHistory.__table__.c.changed_by_id.foreign_keys
+    assert not Attachment.__table__.c.uploaded_by_id.foreign_keys
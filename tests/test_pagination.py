@@ -0,0 +1,25 @@
+import datetime
+import uuid
+
+import pytest
+
+from app.core.pagination import decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    ts = datetime.datetime(2026, 10, 19, 12, 30, 1, 123456, tzinfo=datetime.timezone.utc)
+    row_id = uuid.uuid4()
+    cursor = encode_cursor(ts, row_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (ts, row_id)
+
+
+def test_empty_cursor():
+    assert decode_cursor(None) is None
+    assert decode_cursor("") is None
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "Zm9v", "MjAyNi0xMC0xOXxub3QtYS11dWlk", "__8"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
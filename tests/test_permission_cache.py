@@ -0,0 +1,42 @@
+import asyncio
+
+from app.services import permission_cache as pc
+from app.settings.config import settings
+
+
+def test_reloads_after_ttl(monkeypatch):
+    cache = pc.PermissionCache()
+    loads = []
+    now = [1000.0]
+
+    async def load():
+        loads.append(now[0])
+        cache._roles = {1: frozenset({f"perm{len(loads)}"})}
+        cache._loaded_at = now[0]
+
+    monkeypatch.setattr(cache, "load", load)
+    monkeypatch.setattr(pc.time, "monotonic", lambda: now[0])
+
+    assert asyncio.run(cache.permissions_for([1])) == {"perm1"}
+    now[0] += settings.AUTH_CACHE_TTL / 2
+    assert asyncio.run(cache.permissions_for([1])) == {"perm1"}
+    # изменение прав в другом воркере видно после истечения TTL
+    now[0] += settings.AUTH_CACHE_TTL
+    assert asyncio.run(cache.permissions_for([1])) == {"perm2"}
+    assert len(loads) == 2
+
+
+def test_invalidate_forces_reload(monkeypatch):
+    cache = pc.PermissionCache()
+    loads = []
+
+    async def load():
+        loads.append(1)
+        cache._loaded_at = pc.time.monotonic()
+
+    monkeypatch.setattr(cache, "load", load)
+    asyncio.run(cache.permissions_for([1]))
+    cache.invalidate()
+    asyncio.run(cache.permissions_for([1]))
+    assert len(loads) == 2
+
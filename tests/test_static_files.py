@@ -0,0 +1,47 @@
+import hashlib
+
+import pytest
+
+from app.services.static_files import IMMUTABLE_CACHE_CONTROL
+from app.settings.config import settings
+
+
+@pytest.fixture
+def upload(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    data = bytes(range(256)) * 4096
+    sha = hashlib.sha256(data).hexdigest()
+    (tmp_path / f"{sha}.bin").write_bytes(data)
+    return f"/uploads/{sha}.bin", sha, data
+
+
+def test_full_body_and_cache_headers(api, upload):
+    url, sha, data = upload
+    resp = api.get(url, headers={"Accept-Encoding": "identity"})
+    assert resp.status_code == 200
+    assert resp.content == data
+    assert resp.headers["etag"] == f'"{sha}"'
+    assert resp.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+
+def test_single_range(api, upload):
+    url, _, data = upload
+    resp = api.get(url, headers={"Range": "bytes=1000-300999", "Accept-Encoding": "identity"})
+    assert resp.status_code == 206
+    assert resp.content == data[1000:301000]
+    assert resp.headers["content-range"] == f"bytes 1000-300999/{len(data)}"
+
+
+def test_head_sends_no_body(api, upload):
+    url, _, data = upload
+    resp = api.head(url)
+    assert resp.status_code == 200
+    assert resp.content == b""
+    assert resp.headers["content-length"] == str(len(data))
+
+
+def test_if_none_match(api, upload):
+    url, sha, _ = upload
+    resp = api.get(url, headers={"If-None-Match": f'W/"{sha}"'})
+    assert resp.status_code == 304
+    assert resp.content == b""
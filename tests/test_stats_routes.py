@@ -0,0 +1,50 @@
+import datetime
+
+import pytest
+
+from app.routes import stats
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    recorded = []
+
+    async def hourly(db, date_from, date_to, *args):
+        recorded.append((date_from, date_to))
+        return []
+
+    async def current(db, groups, at, *args):
+        recorded.append(at)
+        return []
+
+    monkeypatch.setattr(stats, "get_hourly_stats", hourly)
+    monkeypatch.setattr(stats, "get_current_stats", current)
+    return recorded
+
+
+def test_hourly_naive_date_from_is_utc(api, calls):
+    resp = api.get("/stats/hourly", params={"date_from": "2026-10-01T00:00:00"})
+    assert resp.status_code == 200
+    date_from, date_to = calls[0]
+    assert date_from == datetime.datetime(2026, 10, 1, tzinfo=datetime.timezone.utc)
+    assert date_to.tzinfo is not None
+
+
+def test_hourly_mixed_bounds(api, calls):
+    resp = api.get("/stats/hourly", params={
+        "date_from": "2026-10-01T00:00:00+03:00", "date_to": "2026-10-02T00:00:00",
+    })
+    assert resp.status_code == 200
+    assert calls[0][1] == datetime.datetime(2026, 10, 2, tzinfo=datetime.timezone.utc)
+
+
+def test_hourly_reversed_range(api, calls):
+    resp = api.get("/stats/hourly", params={"date_from": "2026-10-02T00:00:00", "date_to": "2026-10-01T00:00:00Z"})
+    assert resp.status_code == 400
+    assert calls == []
+
+
+def test_current_naive_at_is_utc(api, calls):
+    resp = api.get("/stats/current", params={"at": "2026-10-01T12:00:00"})
+    assert resp.status_code == 200
+    assert calls[0] == datetime.datetime(2026, 10, 1, 12, tzinfo=datetime.timezone.utc)